@@ -1,23 +1,80 @@
-from fastapi import FastAPI
+# Imported first so the "imports" startup phase covers every module below.
+from app.utils.startup import startup_tracker
+
+import asyncio
+import os
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.routes import prediction
 from app.routes import lstm_only 
 from app.routes import data_fetcher
+from app.routes import observability
+from app.services.agent_service import subagent_stats, warm_agents
+from app.services.model_registry import registry
+from app.services.forecast_scheduler import forecast_scheduler, FORECAST_SCHEDULER_ENABLED
+from app.services.execution import (
+    ExecutorSaturatedError,
+    executor_stats,
+    shutdown_executors,
+    io_executor,
+)
+from app.services.resilience import CircuitOpenError
+from app.utils.metrics import MetricsMiddleware, set_symbol_label_filter
 
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 
 
-
+startup_tracker.mark_since_start("imports")
 
 load_dotenv()
 
+# Build the agents (and import phidata/Groq) in the background at startup instead
+# of on the first /predict request. Readiness never waits for them.
+AGENT_WARM_ON_STARTUP = os.getenv("AGENT_WARM_ON_STARTUP", "1") == "1"
+
+# Components that must be ready before /ready reports 200.
+READINESS_REQUIRED_COMPONENTS = ("models",)
+
+
+async def _warm_agents():
+    startup_tracker.set_component("agents", "loading")
+    started = time.perf_counter()
+    try:
+        await io_executor.run(warm_agents)
+    except Exception as e:
+        print(f"Agent initialisation failed: {e}")
+        startup_tracker.set_component("agents", "failed", str(e))
+        return
+    startup_tracker.record_phase("agent_init", time.perf_counter() - started)
+    startup_tracker.set_component("agents", "ready")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("FastAPI app starting up...")
+    agent_warmup = None
     try:
-        lstm_only.preload_all_models() 
+        if AGENT_WARM_ON_STARTUP:
+            agent_warmup = asyncio.create_task(_warm_agents())
+        else:
+            startup_tracker.set_component("agents", "lazy")
+
+        startup_tracker.set_component("models", "loading")
+        with startup_tracker.phase("model_preload"):
+            # Model loads run on a thread pool; keep the event loop free meanwhile.
+            await asyncio.to_thread(lstm_only.preload_all_models)
+        startup_tracker.set_component(
+            "models", "ready", {"resident": registry.resident_symbols()}
+        )
+
+        if FORECAST_SCHEDULER_ENABLED:
+            forecast_scheduler.start()
+            startup_tracker.set_component("forecast_scheduler", "ready")
+        startup_tracker.mark_since_start("startup_total")
 
     except Exception as e:
         print(f"Failed during application startup: {e}")
@@ -26,6 +83,10 @@ async def lifespan(app: FastAPI):
         )
     yield
     print("FastAPI app shutting down.")
+    if agent_warmup is not None and not agent_warmup.done():
+        agent_warmup.cancel()
+    await forecast_scheduler.stop()
+    shutdown_executors()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -38,14 +99,52 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last so it is outermost and times the whole request, CORS included.
+app.add_middleware(MetricsMiddleware)
+# Only symbols with a model get their own metrics label; anything else is "other".
+set_symbol_label_filter(registry.has_model)
+
+
+# Saturated worker pools answer immediately instead of queueing without bound
+@app.exception_handler(ExecutorSaturatedError)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturatedError):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 # Include your routers
 app.include_router(prediction.router)
 app.include_router(lstm_only.router) 
 app.include_router(data_fetcher.router, prefix="/api")
+app.include_router(observability.router)
 
 
 @app.get("/")
 async def root():
-    return {"message": "Backend is running!"}
\ No newline at end of file
+    return {"message": "Backend is running!"}
+
+
+@app.get("/ready")
+async def readiness():
+    ready = startup_tracker.is_ready(READINESS_REQUIRED_COMPONENTS)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, **startup_tracker.snapshot()},
+    )
+
+
+@app.get("/executors")
+async def get_executor_stats():
+    return {**executor_stats(), "subagents": subagent_stats()}
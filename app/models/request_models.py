@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Annotated, List, Optional
 
 TIME_STEP = 100
 
@@ -41,4 +41,55 @@ class MultiStepPredictionInput(BaseModel):
         min_length=1,
         max_length=20, # max_length as appropriate for ticker symbols
         description="Stock ticker symbol (e.g., AAPL, BRTI, RELI).",
-    )
\ No newline at end of file
+    )
+    chunk_days: Optional[int] = Field(
+        None,
+        ge=1,
+        le=365,
+        description="Forecast days per line when the response is streamed as application/x-ndjson. Defaults to the server setting."
+    )
+    # Optional probabilistic mode: quantile bands over sampled noisy paths
+    paths: Optional[int] = Field(
+        None,
+        ge=2,
+        le=10000,
+        description="Number of sampled paths for quantile bands (e.g., 1000). Omit for a single deterministic path."
+    )
+    quantiles: list[Annotated[float, Field(ge=0, le=1)]] = Field(
+        default_factory=lambda: [0.05, 0.5, 0.95],
+        min_length=1,
+        max_length=20,
+        description="Quantiles to report when `paths` is set."
+    )
+    seed: Optional[int] = Field(None, description="Random seed for reproducible paths.")
+
+# --- BATCHED MULTI-SYMBOL PREDICTION REQUEST ---
+MAX_BATCH_ITEMS = 256
+
+class BatchPredictionItem(BaseModel):
+    symbol: str = Field(
+        ...,
+        min_length=1,
+        max_length=20,
+        description="Stock ticker symbol (e.g., AAPL, BRTI, RELI).",
+    )
+    # Length is checked per item, so one bad window doesn't reject the whole batch
+    prices: list[float] = Field(
+        ...,
+        description=f"The last {TIME_STEP} historical prices to forecast from."
+    )
+    forecast_days: int = Field(
+        1,
+        gt=0,
+        le=365,
+        description="Number of days to forecast; 1 gives the next-day prediction."
+    )
+
+
+class BatchPredictionInput(BaseModel):
+    items: list[BatchPredictionItem] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_ITEMS,
+        description=f"Up to {MAX_BATCH_ITEMS} (symbol, prices, forecast_days) items.",
+    )
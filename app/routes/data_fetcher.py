@@ -1,72 +1,97 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
-import yfinance as yf
-from datetime import datetime, timedelta
-import pandas as pd
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import List, Optional
 from fastapi.responses import JSONResponse
 
+from app.services.price_store import price_store, NoPriceDataError, PriceSourceError
+from app.services.execution import io_executor, ExecutorSaturatedError
+from app.services.resilience import CircuitOpenError
+from app.utils.metrics import instrument_endpoint, set_symbol_label
+from app.utils.wire_format import FastJSONResponse, encode_array_response
+
 router = APIRouter()
 
 DEFAULT_HISTORICAL_LOOKBACK_DAYS = 250
+MAX_HISTORICAL_SYMBOLS = 50
+
+
+def _history_error(error: Exception) -> dict:
+    if isinstance(error, NoPriceDataError):
+        return {"status_code": 404, "detail": str(error)}
+    if isinstance(error, CircuitOpenError):
+        return {"status_code": 503, "detail": str(error), "retry_after": error.retry_after}
+    if isinstance(error, PriceSourceError):
+        return {"status_code": 502, "detail": str(error)}
+    return {"status_code": 500, "detail": f"Failed to fetch historical data: {error}"}
+
 
 @router.get("/historical_prices")
+@instrument_endpoint
 async def get_historical_prices(
-    symbol: str = Query(..., description="Stock ticker symbol (e.g., AAPL, GOOGL)"),
+    request: Request,
+    symbol: Optional[str] = Query(None, description="Stock ticker symbol (e.g., AAPL, GOOGL)"),
+    symbols: Optional[List[str]] = Query(None, description="Several ticker symbols, repeated or comma-separated (e.g., AAPL,GOOGL). Returns one result per symbol."),
     lookback_days: int = Query(DEFAULT_HISTORICAL_LOOKBACK_DAYS, ge=1, description="Number of past days to fetch historical data for. Minimum 1.")
 ):
     """
     Fetches historical closing prices for a given stock symbol, and returns the prices along with the last available trading date.
+    Prices are served from the local price store, which only fetches the missing tail from the data source.
+
+    With `symbols`, the upstream fetches for all symbols are grouped into as few source requests as possible,
+    and each symbol gets either its prices or an `error`.
     """
+    if symbols:
+        return await _get_many_historical_prices(symbols, lookback_days)
+
     if not symbol:
         raise HTTPException(status_code=400, detail="Stock symbol cannot be empty.")
+    set_symbol_label(symbol)
 
     try:
-        # Extend lookback to ensure we get enough trading days (account for weekends/holidays)
-        start_date = datetime.now() - timedelta(days=lookback_days * 2)
-
-        # Fetch data until the latest available date (don't set end date)
-        data = yf.download(symbol, start=start_date, interval='1d', progress=False)
-
-        if data.empty:
-            raise HTTPException(status_code=404, detail=f"No historical data found for {symbol}.")
+        dates, closes = await io_executor.run(price_store.get_history, symbol, lookback_days)
 
-        close_series = None
+        # Use last available date from actual data
+        last_date_str = str(dates[-1])
 
-        if isinstance(data.columns, pd.MultiIndex):
-            if ('Close', symbol) in data.columns:
-                close_series = data[('Close', symbol)]
-            elif ('Adj Close', symbol) in data.columns:
-                close_series = data[('Adj Close', symbol)]
-            elif 'Close' in data.columns.get_level_values(0):
-                if (data['Close'].columns == symbol).any():
-                    close_series = data['Close'][symbol]
-        if close_series is None and 'Close' in data.columns:
-            close_series = data['Close']
+        # JSON by default; packed floats if the Accept header asks for them
+        return encode_array_response(
+            request,
+            {"historical_prices": closes, "last_date": last_date_str},
+            "historical_prices",
+        )
 
-        if close_series is None:
-            raise HTTPException(status_code=500, detail="Could not extract closing prices.")
+    except NoPriceDataError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PriceSourceError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except (HTTPException, ExecutorSaturatedError, CircuitOpenError):
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to fetch historical data for {symbol}: {str(e)}")
 
-        close_series = pd.to_numeric(close_series, errors='coerce')
-        close_series.dropna(inplace=True)
 
-        if close_series.empty:
-            raise HTTPException(status_code=400, detail="No valid data after cleaning.")
+async def _get_many_historical_prices(symbols: List[str], lookback_days: int):
+    names = list(dict.fromkeys(name.strip() for value in symbols for name in value.split(",") if name.strip()))
+    if not names:
+        raise HTTPException(status_code=400, detail="Stock symbol cannot be empty.")
+    if len(names) > MAX_HISTORICAL_SYMBOLS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_HISTORICAL_SYMBOLS} symbols per request, got {len(names)}.")
 
-        historical_prices = close_series.values[-lookback_days:].tolist()
-        historical_prices = [float(price) for price in historical_prices]
+    histories = await io_executor.run(price_store.get_histories, names, lookback_days)
 
-        # Use last available date from actual data
-        last_date = close_series.index[-1]
-        last_date_str = last_date.strftime("%Y-%m-%d")
+    results = {}
+    for name in names:
+        history = histories[name]
+        if isinstance(history, Exception):
+            results[name] = {"error": _history_error(history)}
+        else:
+            dates, closes = history
+            results[name] = {"historical_prices": closes, "last_date": str(dates[-1])}
+    return FastJSONResponse({"results": results})
 
-        return {
-            "historical_prices": historical_prices,
-            "last_date": last_date_str
-        }
 
-    except HTTPException as http_exc:
-        raise http_exc
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Failed to fetch historical data for {symbol}: {str(e)}")
+@router.get("/price-source-stats")
+async def get_price_source_stats():
+    source = price_store.source
+    return source.stats() if hasattr(source, "stats") else {"source": type(source).__name__}
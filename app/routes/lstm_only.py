@@ -1,114 +1,416 @@
+import asyncio
 import os
-from pathlib import Path
-import tensorflow as tf
-import joblib
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict, Any
+from functools import partial
+from typing import Any, Dict, List
 
-from app.models.request_models import StockPredictionInput, MultiStepPredictionInput
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.models.request_models import StockPredictionInput, MultiStepPredictionInput, BatchPredictionInput
 from app.services.prediction_service import (
-    predict_next_day_price,
-    predict_multi_step_prices,
+    predict_next_day_prices_batch,
     TIME_STEP,
 )
+from app.services.batching_service import get_batcher, batching_stats
+from app.services.model_registry import ModelEntry, registry
+from app.services.forecast_cache import forecast_cache
+from app.services.forecast_pipeline import (
+    forecast_window,
+    forecast_latest,
+    forecast_batch,
+    forecast_quantiles,
+    forecast_stream,
+    load_latest_window,
+    FORECAST_MAX_PATH_STEPS,
+    FORECAST_STREAM_CHUNK_DAYS,
+)
+from app.services.forecast_scheduler import forecast_scheduler
+from app.services.backtest import backtest_series, BACKTEST_LOOKBACK_DAYS, BACKTEST_MAX_HORIZON
+from app.services.price_store import price_store, NoPriceDataError
+from app.services.execution import inference_executor, io_executor, ExecutorSaturatedError
+from app.services.quantization import PRECISIONS
+from app.services.resilience import CircuitOpenError
+from app.utils.metrics import instrument_endpoint, set_symbol_label
+from app.utils.wire_format import (
+    FastJSONResponse,
+    NDJSON_MEDIA_TYPE,
+    dump_ndjson_line,
+    encode_array_response,
+    negotiate_response_type,
+    read_window_input,
+    request_body_openapi,
+)
 
 router = APIRouter(prefix="/lstm", tags=["lstm"])
 
-MODEL_DIR = Path("app/models")
-SCALER_DIR = Path("app/models")
-
-# --- Global dictionaries to hold loaded models and scalers ---
-# These will be populated at application startup
-loaded_models: Dict[str, tf.keras.Model] = {}
-loaded_scalers: Dict[str, Any] = {}
-
-
-SUPPORTED_MODEL_SYMBOLS = [
-    "ADANIPORTS.NS",
-    "BHARTIARTL.NS",
-    "RELIANCE.NS", 
-]
+# Switching a symbol's precision reloads its model, so it is off unless explicitly enabled.
+ENABLE_QUANTIZATION_ENDPOINT = os.getenv("ENABLE_QUANTIZATION_ENDPOINT", "0") == "1"
 
 
 def preload_all_models():
-    print("Preloading LSTM models and scalers for supported stocks...")
-    global loaded_models, loaded_scalers
-    loaded_models = {}
-    loaded_scalers = {}
+    print("Preloading LSTM models and scalers for the configured hot set...")
+    loaded = registry.prewarm()
+
+    if not loaded and not registry.available_symbols():
+        print("🚨 No models found. All predictions will fail.")
 
-    # Loading specific models for BHARTIARTL.NS and RELIANCE.NS
-    for symbol in ["BHARTIARTL.NS", "RELIANCE.NS", "ADANIPORTS.NS"]:
-        try:
-            model_path = MODEL_DIR / f"{symbol}_lstm_model.h5"
-            scaler_path = SCALER_DIR / f"{symbol}_minmax_scaler.pkl"
-
-            if model_path.exists() and scaler_path.exists():
-                print(f"Loading specific model for {symbol}")
-                model = tf.keras.models.load_model(model_path)
-                scaler = joblib.load(scaler_path)
-                loaded_models[symbol] = model
-                loaded_scalers[symbol] = scaler
-                print(f"✅ Loaded model and scaler for {symbol}.")
-            else:
-                print(f"❌ Model or scaler for {symbol} not found.")
-        except Exception as e:
-            print(f"ERROR loading {symbol} model: {e}")
 
-    if not loaded_models:
-        print("🚨 No models loaded. All predictions will fail.")
+def _predict_batch(symbol: str, windows: np.ndarray) -> np.ndarray:
+    """Runs one batched next-day inference for `symbol`; used by the request batcher."""
+    entry = registry.get(symbol)
+    return predict_next_day_prices_batch(entry.model, entry.scaler, windows)
 
 
-@router.post("/predict")
-async def predict_stock_price(input_data: StockPredictionInput):
+@router.post("/predict", openapi_extra=request_body_openapi(StockPredictionInput))
+@instrument_endpoint
+async def predict_stock_price(request: Request):
     # This endpoint is for single-day prediction, ensure your frontend is using multi-predict for forecasting
+    # The body may be JSON or a packed float array; see app/utils/wire_format.py
+    input_data, window = await read_window_input(request, StockPredictionInput, "past_100_prices", TIME_STEP)
     symbol = input_data.symbol.upper()
+    set_symbol_label(symbol)
 
-    if symbol not in loaded_models or symbol not in loaded_scalers:
+    try:
+        entry = await registry.aget(symbol)
+    except ExecutorSaturatedError:
+        raise
+    except KeyError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Prediction model not found for stock symbol: {symbol}. Please ensure it's pre-trained and available."
         )
 
-    model_instance = loaded_models[symbol]
-    scaler_instance = loaded_scalers[symbol]
-
     try:
-        predicted_price = predict_next_day_price(
-            model_instance, scaler_instance, input_data.past_100_prices
-        )
-        return {"symbol": symbol, "predicted_price": predicted_price}
+        # A next-day prediction is the horizon-1 prefix of any cached forecast; the
+        # rollout engine and the batched path agree to float32 precision.
+        cached = forecast_cache.peek(symbol, entry.version, window, 1)
+        if cached is not None:
+            predicted_price = float(cached[0])
+        else:
+            # Concurrent requests for the same symbol are coalesced into one model call.
+            # The result is not stored: the cache holds rollout-engine values only, so
+            # multi-step forecasts never depend on which endpoint ran first.
+            predicted_price = await get_batcher(symbol, _predict_batch).submit(window)
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Prediction failed for {symbol}: {e}"
         )
+    return encode_array_response(request, {"symbol": symbol, "predicted_price": predicted_price}, "predicted_price")
 
 
 
-@router.post("/multi-predict")
-async def predict_multi_day_prices(input_data: MultiStepPredictionInput):
+@router.post("/multi-predict", openapi_extra=request_body_openapi(MultiStepPredictionInput))
+@instrument_endpoint
+async def predict_multi_day_prices(request: Request):
+    input_data, window = await read_window_input(request, MultiStepPredictionInput, "initial_prices", TIME_STEP)
     symbol = input_data.symbol.upper()  # Ensure symbol is uppercase for consistency
+    set_symbol_label(symbol)
 
-    # Get the specific model and scaler for this symbol
-    if symbol not in loaded_models or symbol not in loaded_scalers:
+    # Get the specific model and scaler for this symbol (loaded on first use)
+    try:
+        entry = await registry.aget(symbol)
+    except ExecutorSaturatedError:
+        raise
+    except KeyError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Prediction model not found for stock symbol: {symbol}. Please ensure it's pre-trained and available.",
         )
 
-    model_instance = loaded_models[symbol]
-    scaler_instance = loaded_scalers[symbol]
+    if input_data.paths and input_data.paths * input_data.forecast_days > FORECAST_MAX_PATH_STEPS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"paths x forecast_days must be at most {FORECAST_MAX_PATH_STEPS}.",
+        )
+
+    media_type, _ = negotiate_response_type(request.headers.get("accept"), (NDJSON_MEDIA_TYPE,))
+    if media_type == NDJSON_MEDIA_TYPE and not input_data.paths:
+        return await _stream_multi_day_prices(
+            entry, symbol, window, input_data.forecast_days, input_data.chunk_days or FORECAST_STREAM_CHUNK_DAYS
+        )
 
     try:
-        predicted_prices = predict_multi_step_prices(
-            model_instance,
-            scaler_instance,
-            input_data.initial_prices,
+        # Shorter horizons are sliced from, and longer ones extend, a cached forecast
+        predicted_prices = await inference_executor.run(
+            forecast_cache.get_or_compute,
+            symbol,
+            entry.version,
+            window,
             input_data.forecast_days,
+            partial(forecast_window, entry),
         )
-        return {"symbol": symbol, "predicted_prices": predicted_prices}
+        quantiles = None
+        if input_data.paths:
+            # All paths run as one batched rollout; the bands are not cached
+            quantiles = await inference_executor.run(
+                forecast_quantiles,
+                entry,
+                window,
+                input_data.forecast_days,
+                input_data.paths,
+                input_data.quantiles,
+                input_data.seed,
+            )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Multi-step prediction failed for {symbol}: {e}",
         )
+    if quantiles is not None:
+        # Quantile bands are nested, so this mode always answers in JSON
+        return FastJSONResponse(
+            {"symbol": symbol, "predicted_prices": predicted_prices, "paths": input_data.paths, "quantiles": quantiles}
+        )
+    return encode_array_response(request, {"symbol": symbol, "predicted_prices": predicted_prices}, "predicted_prices")
+
+
+async def _stream_multi_day_prices(
+    entry: ModelEntry, symbol: str, window: np.ndarray, forecast_days: int, chunk_days: int
+) -> StreamingResponse:
+    """
+    Streams a multi-step forecast as NDJSON: a {"symbol", "start_day", "predicted_prices"}
+    line per chunk as soon as the rollout produces it, then a {"symbol", "forecast_days",
+    "done": true} line. A failure after the first line is sent as an {"error": ...} line.
+    """
+    chunks = forecast_stream(entry, window, forecast_days, chunk_days)
+    try:
+        # The first chunk is computed before responding, so early failures keep their status code
+        first_chunk = await inference_executor.run(next, chunks, None)
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Multi-step prediction failed for {symbol}: {e}",
+        )
+
+    async def lines():
+        # Each chunk is pulled on the inference pool only after the previous line is
+        # sent. When the client disconnects the server cancels this generator, and
+        # no further chunks of the abandoned forecast are computed.
+        chunk, start_day = first_chunk, 1
+        try:
+            while chunk is not None:
+                yield dump_ndjson_line({"symbol": symbol, "start_day": start_day, "predicted_prices": chunk})
+                start_day += len(chunk)
+                chunk = await inference_executor.run(next, chunks, None)
+            yield dump_ndjson_line({"symbol": symbol, "forecast_days": forecast_days, "done": True})
+        except ExecutorSaturatedError as e:
+            error = {"status_code": e.status_code, "detail": str(e), "retry_after": e.retry_after}
+            yield dump_ndjson_line({"symbol": symbol, "error": error})
+        except Exception as e:
+            error = {"status_code": 500, "detail": f"Multi-step prediction failed for {symbol}: {e}"}
+            yield dump_ndjson_line({"symbol": symbol, "error": error})
+
+    return StreamingResponse(
+        lines(),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/forecast")
+@instrument_endpoint
+async def forecast_stock_prices(
+    request: Request,
+    symbol: str = Query(..., min_length=1, max_length=20, description="Stock ticker symbol (e.g., RELIANCE.NS)."),
+    forecast_days: int = Query(..., gt=0, le=365, description="Number of days to forecast into the future."),
+):
+    """
+    Forecasts from the latest TIME_STEP closes in the server-side price history, so
+    clients send only a symbol and horizon. Forecasts precomputed by the scheduler
+    after market close are served from the forecast cache.
+    """
+    symbol = symbol.upper()
+    set_symbol_label(symbol)
+
+    try:
+        entry = await registry.aget(symbol)
+    except ExecutorSaturatedError:
+        raise
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Prediction model not found for stock symbol: {symbol}. Please ensure it's pre-trained and available.",
+        )
+
+    try:
+        last_date, window = await io_executor.run(load_latest_window, symbol)
+        predicted_prices = await inference_executor.run(forecast_latest, entry, window, forecast_days)
+    except NoPriceDataError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except (ExecutorSaturatedError, CircuitOpenError):
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Forecast failed for {symbol}: {e}",
+        )
+    return encode_array_response(
+        request,
+        {"symbol": symbol, "last_date": last_date, "predicted_prices": predicted_prices},
+        "predicted_prices",
+    )
+
+
+def _batch_item_error(symbol: str, status_code: int, detail: str, **extra: Any) -> Dict[str, Any]:
+    return {"symbol": symbol, "error": {"status_code": status_code, "detail": detail, **extra}}
+
+
+@router.post("/batch-predict")
+@instrument_endpoint
+async def predict_batch(input_data: BatchPredictionInput):
+    """
+    Forecasts a whole watchlist in one call. Items are grouped by symbol and each
+    group runs as one batched rollout, mixed horizons included. Every item gets
+    either `predicted_prices` or an `error`; a failing item or symbol doesn't fail
+    the rest of the batch.
+    """
+    results: List[Any] = [None] * len(input_data.items)
+    groups: Dict[str, List[int]] = {}
+    for index, item in enumerate(input_data.items):
+        symbol = item.symbol.upper()
+        if len(item.prices) != TIME_STEP:
+            results[index] = _batch_item_error(
+                symbol,
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                f"Expected {TIME_STEP} prices, got {len(item.prices)}.",
+            )
+        else:
+            groups.setdefault(symbol, []).append(index)
+
+    async def run_group(symbol: str, indices: List[int]) -> None:
+        try:
+            entry = await registry.aget(symbol)
+            windows = np.array([input_data.items[index].prices for index in indices], dtype=np.float64)
+            horizons = [input_data.items[index].forecast_days for index in indices]
+            forecasts = await inference_executor.run(forecast_batch, entry, windows, horizons)
+        except KeyError:
+            error = _batch_item_error(
+                symbol, status.HTTP_404_NOT_FOUND, f"Prediction model not found for stock symbol: {symbol}."
+            )
+        except ExecutorSaturatedError as e:
+            error = _batch_item_error(symbol, e.status_code, str(e), retry_after=e.retry_after)
+        except Exception as e:
+            error = _batch_item_error(
+                symbol, status.HTTP_500_INTERNAL_SERVER_ERROR, f"Prediction failed for {symbol}: {e}"
+            )
+        else:
+            for index, predictions in zip(indices, forecasts):
+                results[index] = {"symbol": symbol, "predicted_prices": predictions}
+            return
+        for index in indices:
+            results[index] = error
+
+    await asyncio.gather(*(run_group(symbol, indices) for symbol, indices in groups.items()))
+    return FastJSONResponse({"results": results})
+
+
+@router.get("/backtest")
+@instrument_endpoint
+async def backtest_model(
+    symbol: str = Query(..., min_length=1, max_length=20, description="Stock ticker symbol (e.g., RELIANCE.NS)."),
+    horizon: int = Query(5, ge=1, le=BACKTEST_MAX_HORIZON, description="Also score k-step forecasts for this k."),
+    lookback_days: int = Query(BACKTEST_LOOKBACK_DAYS, ge=TIME_STEP + 1, le=10000, description="Trading days of history to replay."),
+    stride: int = Query(1, ge=1, le=100, description="Evaluate every stride-th window."),
+):
+    """
+    Walk-forward backtest of the symbol's model over its stored price history.
+    Returns MAE, RMSE, MAPE and directional accuracy for 1-step and `horizon`-step forecasts.
+    """
+    symbol = symbol.upper()
+    set_symbol_label(symbol)
+
+    try:
+        entry = await registry.aget(symbol)
+    except ExecutorSaturatedError:
+        raise
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Prediction model not found for stock symbol: {symbol}. Please ensure it's pre-trained and available.",
+        )
+
+    try:
+        dates, closes = await io_executor.run(price_store.get_history, symbol, lookback_days)
+        result = await inference_executor.run(backtest_series, entry, closes, (1, horizon), stride)
+        return {**result, "from_date": str(dates[0]), "to_date": str(dates[-1])}
+    except NoPriceDataError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except (ExecutorSaturatedError, CircuitOpenError):
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Backtest failed for {symbol}: {e}",
+        )
+
+
+@router.get("/forecast-schedule")
+async def get_forecast_schedule():
+    return forecast_scheduler.status()
+
+
+@router.get("/batching-stats")
+async def get_batching_stats():
+    return batching_stats()
+
+
+@router.get("/forecast-cache-stats")
+async def get_forecast_cache_stats():
+    return forecast_cache.stats()
+
+
+@router.get("/models")
+async def list_models():
+    return {
+        "available": registry.available_symbols(),
+        "registry": registry.stats(),
+    }
+
+
+@router.get("/quantization")
+async def get_quantization_status():
+    return registry.quantization_status()
+
+
+@router.put("/quantization/{symbol}")
+async def set_model_precision(
+    symbol: str,
+    precision: str = Query(..., description=f"One of {', '.join(PRECISIONS)}."),
+):
+    """
+    Selects the inference precision for a symbol and reloads its model. A quantized
+    model is validated against the float32 one first; the returned report says
+    whether it was activated or refused.
+    """
+    if not ENABLE_QUANTIZATION_ENDPOINT:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quantization endpoint is disabled.")
+    symbol = symbol.upper()
+    precision = precision.lower()
+    if precision not in PRECISIONS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown precision '{precision}'; use one of {', '.join(PRECISIONS)}.",
+        )
+
+    if not registry.has_model(symbol):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Prediction model not found for stock symbol: {symbol}. Please ensure it's pre-trained and available.",
+        )
+
+    registry.set_precision(symbol, precision)
+    entry = await registry.aget(symbol)
+    return {
+        "symbol": symbol,
+        "requested": precision,
+        "active": entry.precision,
+        "report": registry.quantization_status()["reports"].get(symbol),
+    }
@@ -0,0 +1,53 @@
+import os
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.utils.metrics import metrics
+from app.utils.profiler import profile_trigger
+
+# The profiler endpoints expose stack traces, so they are off unless explicitly enabled.
+ENABLE_PROFILER_ENDPOINT = os.getenv("ENABLE_PROFILER_ENDPOINT", "0") == "1"
+
+router = APIRouter(tags=["observability"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request and per-stage latency histograms in Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def _require_profiler_enabled() -> None:
+    if not ENABLE_PROFILER_ENDPOINT:
+        raise HTTPException(status_code=404, detail="Profiler endpoint is disabled.")
+
+
+@router.post("/debug/profile")
+async def arm_profiler(
+    path_prefix: str = Query("/", description="Only requests whose path starts with this are profiled."),
+    min_duration_ms: float = Query(0.0, ge=0, description="Keep the first profiled request slower than this."),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="Stack sampling interval."),
+):
+    """
+    Arms the sampling profiler for the next matching slow request. The profile is
+    kept as collapsed stacks and the profiler disarms itself afterwards.
+    """
+    _require_profiler_enabled()
+    profile_trigger.arm(path_prefix, min_duration_ms, interval_ms)
+    return profile_trigger.status()
+
+
+@router.get("/debug/profile")
+async def get_profile():
+    _require_profiler_enabled()
+    return profile_trigger.status()
+
+
+@router.delete("/debug/profile")
+async def disarm_profiler():
+    _require_profiler_enabled()
+    profile_trigger.disarm()
+    return profile_trigger.status()
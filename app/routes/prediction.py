@@ -1,15 +1,136 @@
+import asyncio
+import threading
+import time
+from typing import AsyncIterator
+
 from fastapi import APIRouter, HTTPException
-from app.services.agent_service import query_aggregator_agent
+from fastapi.responses import StreamingResponse
+from app.services.agent_service import (
+    query_aggregator_agent,
+    stream_aggregator_agent,
+    MarkdownStreamCleaner,
+)
+from app.services.execution import agent_executor, ExecutorSaturatedError
+from app.services.report_cache import ReportCache
 from app.models.request_models import StockRequest
 from app.models.response_models import StockResponse
+from app.utils.metrics import instrument_endpoint
 
 router = APIRouter(prefix="/predict", tags=["Prediction"])
 
 
+async def _generate_report(stock_name: str) -> str:
+    # The agent run blocks for seconds, so it runs on the bounded agent pool.
+    return await agent_executor.run(query_aggregator_agent, stock_name)
+
+
+report_cache = ReportCache(loader=_generate_report)
+
+
 @router.post("/", response_model=StockResponse)
+@instrument_endpoint
 async def predict_stock(request: StockRequest):
     try:
-        result = query_aggregator_agent(request.stock_name)
+        result = await report_cache.get(request.stock_name)
         return StockResponse(content=result)
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _sse_event(event: str, data: str) -> str:
+    data_lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+    return f"event: {event}\n{data_lines}\n"
+
+
+def _pump_report_chunks(
+    stock_name: str,
+    loop: asyncio.AbstractEventLoop,
+    queue: "asyncio.Queue",
+    stop_event: threading.Event,
+) -> None:
+    """
+    Runs on an agent worker thread: forwards streamed chunks to `queue` until the
+    stream ends or the client goes away, then closes the agent stream.
+    """
+    chunks = stream_aggregator_agent(stock_name, stop_event)
+    try:
+        for chunk in chunks:
+            if stop_event.is_set():
+                break
+            loop.call_soon_threadsafe(queue.put_nowait, chunk)
+    except Exception as e:
+        loop.call_soon_threadsafe(queue.put_nowait, e)
+    finally:
+        # Closing the generator closes the upstream LLM stream as well.
+        chunks.close()
+        loop.call_soon_threadsafe(queue.put_nowait, None)
+
+
+async def _report_events(stock_name: str) -> AsyncIterator[str]:
+    # The producer starts on first iteration, so a client that disconnects before
+    # the response starts streaming never costs an agent run.
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop_event = threading.Event()
+    try:
+        agent_executor.submit(_pump_report_chunks, stock_name, loop, queue, stop_event)
+    except ExecutorSaturatedError as e:
+        # The response headers are already sent, so saturation is reported in-stream.
+        yield _sse_event("error", str(e))
+        return
+
+    cleaner = MarkdownStreamCleaner()
+    parts = []
+    started = time.monotonic()
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                yield _sse_event("error", str(item))
+                return
+            cleaned = cleaner.feed(item)
+            if cleaned:
+                parts.append(cleaned)
+                yield _sse_event("chunk", cleaned)
+
+        if parts:
+            report_cache.put(stock_name, "".join(parts), generation_seconds=time.monotonic() - started)
+        yield _sse_event("done", "")
+    finally:
+        # Runs on normal completion and when the server cancels the stream
+        # because the client disconnected.
+        stop_event.set()
+
+
+async def _cached_report_events(content: str) -> AsyncIterator[str]:
+    yield _sse_event("chunk", content)
+    yield _sse_event("done", "")
+
+
+@router.post("/stream")
+@instrument_endpoint
+async def predict_stock_stream(request: StockRequest):
+    """
+    Streams the Markdown report as Server-Sent Events ("chunk" events, then "done",
+    or "error"). A fresh cached report is sent as a single chunk.
+    """
+    cached = report_cache.peek(request.stock_name)
+    if cached is not None:
+        events = _cached_report_events(cached)
+    else:
+        events = _report_events(request.stock_name)
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/cache-stats")
+async def get_report_cache_stats():
+    return report_cache.stats()
@@ -1,114 +1,137 @@
+import contextvars
 import os
 import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Iterator, NamedTuple, Optional
 from dotenv import load_dotenv
-from phi.agent import Agent
-from phi.model.groq import Groq
-from phi.tools.duckduckgo import DuckDuckGo
-from phi.tools.yfinance import YFinanceTools
+
+from app.utils.metrics import observe_stage, timed
 
 load_dotenv()
-groq_api_key = os.environ["GROQ_API_KEY"]
-print(f"DEBUG: GROQ_API_KEY loaded: {groq_api_key[:5]}...{groq_api_key[-5:]}")
+
+# "groq" uses the real phidata agents; "fake" uses local stand-ins (no API key or
+# network needed) so orchestration latency can be measured offline.
+AGENT_BACKEND = os.getenv("AGENT_BACKEND", "groq").lower()
+
+# "delegate": the aggregator calls the News and Finance agents one after another
+# through tool calls. "parallel": both sub-agents run concurrently and the report
+# agent is called once with their results.
+AGENT_ORCHESTRATION = os.getenv("AGENT_ORCHESTRATION", "delegate").lower()
+SUBAGENT_TIMEOUT_SECONDS = float(os.getenv("SUBAGENT_TIMEOUT_SECONDS", "60"))
+
+SUBAGENT_WORKERS = int(os.getenv("SUBAGENT_WORKERS", "8"))
+
+_subagent_pool = ThreadPoolExecutor(max_workers=SUBAGENT_WORKERS, thread_name_prefix="subagent")
+
+# A sub-agent run that times out can't be interrupted: it keeps its worker thread
+# until the agent returns. Each run holds one slot until it really finishes, and
+# when stuck runs hold every slot, new runs are skipped instead of queueing
+# behind them.
+_subagent_slots = threading.BoundedSemaphore(SUBAGENT_WORKERS)
+_subagent_stats_lock = threading.Lock()
+_subagent_counts = {"timed_out": 0, "skipped": 0, "cancelled": 0, "abandoned_running": 0}
+
+# How often a wait for sub-agents checks whether the report was cancelled.
+SUBAGENT_STOP_POLL_SECONDS = 0.1
+
 
 # Utility to clean markdown
+def _normalize_newlines(text: str) -> str:
+    text = re.sub(r'\r\n|\r', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text
+
+
 def clean_markdown(text: str) -> str:
     """Cleans and normalizes markdown output for better formatting."""
-    text = re.sub(r'\r\n|\r', '\n', text)  
-    text = re.sub(r'\n{3,}', '\n\n', text)  
-    return text.strip()
-
-
-# News Agent
-news_agent = Agent(
-    name="News Agent",
-    model=Groq(id="llama-3.3-70b-versatile"),
-    tools=[DuckDuckGo()],
-    instructions=[
-        "Fetch and summarize the latest financial news for the company.",
-        "Highlight points affecting stock performance.",
-        "Include credible sources."
-    ]
-)
-
-# Finance Agent
-finance_agent = Agent(
-    name="Finance Agent",
-    model=Groq(id="llama-3.3-70b-versatile"),
-    tools=[
-        YFinanceTools(
-            stock_price=True,
-            analyst_recommendations=True,
-            stock_fundamentals=True,
-        )
-    ],
-    instructions=[
-        "Retrieve key financial metrics, including Revenue, Net Income, Gross Margin, Operating Expenses, Earnings Per Share (EPS), P/E ratio, Market Cap, Dividend Yield, Beta, and Alpha.",
-        "For relevant metrics (e.g., Revenue, Net Income, EPS), also retrieve and provide their Year-over-Year (YoY) change percentages.",
-        "Use tables for clarity.",
-        "Focus on how these metrics impact stock performance."
-    ]
-)
-
-# Aggregator Agent
-aggregator_agent = Agent(
-    model=Groq(id="llama-3.3-70b-versatile"),
-    agents=[news_agent, finance_agent],
-    # instructions=[
-    #     "You are a sophisticated AI financial analyst. Your task is to combine the inputs from the News Agent and Finance Agent into a comprehensive, well-structured stock report.",
-    #     "The report MUST be presented entirely in Markdown format.",
-    #     "**Strictly follow this numbered section structure and formatting:**",
-    #     "",
-    #     "# [Stock Name] Stock Analysis: Key Insights for Investors",
-    #     "",
-    #     "## 1. Introduction to [Stock Name]",
-    #     "   - Provide a concise introduction to the company, its business, and its market position.",
-    #     "",
-    #     "## 2. Critical News & Market Factors",
-    #     "   - Use clear bullet points for each critical news item or market factor identified.",
-    #     "   - Explain how these factors are impacting or could impact the stock performance.",
-    #     "   - Example factors: product launches, supply chain issues, competitive landscape.",
-    #     "",
-    #     "## 3. Key Financial Metrics (e.g., Fiscal Year End 2023 or Latest Reporting Period)",
-    #     "   - **IMPORTANT: Present ALL financial metrics in a strict Markdown table format with a header and separator line.**",
-    #     "   - The table MUST have exactly these three columns: `Metric`, `Value`, and `Change (YoY)`.",
-    #     "   - If a 'Change (YoY)' value is not available for a specific metric, display 'N/A' or '-'.",
-    #     "   - **Example of the REQUIRED table structure (including header and separator):**",
-    #     "     ```",
-    #     "     | Metric     |  Value    | Change (YoY) |",
-    #     "     | :-----     |  :----    | :----------- |",
-    #     "     | Revenue    |  $394.33B |    7.8%      |",
-    #     "     | Net Income |  $99.8B   |    5.4%      |",
-    #     "     | EPS | $5.67|  9.1%     |      -       |",
-    #     "     | P/E Ratio  |  29.56    |     N/A      |",
-    #     "     | Market Cap |  $2.97T   |      -       |",
-    #     "     ```",
-    #     "   - Include metrics such as: Revenue, Net Income, Gross Margin, Operating Expenses, Earnings Per Share (EPS), P/E ratio, Market Cap, Dividend Yield, Beta, and Alpha. Add others if available and relevant, ensuring all three columns are populated.",
-    #     "",
-    #     "## 4. Investment Recommendations",
-    #     "   - Provide distinct sections for long-term and short-term investment outlooks.",
-    #     "",
-    #     "   ### A. Long-term Outlook:",
-    #     "      - Use clear bullet points for each recommendation (Buy/Hold) and the detailed reasons supporting it.",
-    #     "      - **Buy Recommendation:** Focus on aspects like strong brand loyalty, diversified product portfolio, continuous innovation, and growth potential (e.g., services segment).",
-    #     "      - **Hold Recommendation:** Focus on factors like historical ability to navigate market fluctuations and commitment to shareholder value (dividends, buybacks).",
-    #     "",
-    #     "   ### B. Short-term Outlook:",
-    #     "      - Use clear bullet points for each recommendation (Neutral/Sell) and the detailed reasons supporting it.",
-    #     "      - **Neutral Recommendation:** Focus on volatility, product launch cycles, quarterly earnings, and global economic conditions.",
-    #     "      - **Sell Recommendation:** Focus on realizing short-term profits or adjusting portfolio based on risk tolerance.",
-    #     "",
-    #     "## 5. Conclusion",
-    #     "   - Provide a concise summary of the key takeaways for both long-term and short-term investors.",
-    #     "   - **Crucially, include the following disclaimer at the very end of the conclusion:** 'Always conduct thorough personal research or consult with a qualified financial advisor before making any investment decisions.'",
-    #     "",
-    #     "**General Formatting Guidelines:**",
-    #     "   - Use bolding (`**text**`) for emphasis where appropriate (e.g., recommendation types).",
-    #     "   - Ensure consistent Markdown headings and lists throughout the report.",
-    #     "   - Avoid any introductory or concluding sentences outside the specified Markdown structure.",
-    #     "   - Do NOT include any code blocks or examples in the final output, unless specifically part of the requested Markdown table example.",
-    #     "   - Make sure the report is well-organized and easy to read."
-    # ]
-instructions = [
+    return _normalize_newlines(text).strip()
+
+
+class MarkdownStreamCleaner:
+    """
+    Applies clean_markdown to a stream of chunks. The concatenated output equals
+    clean_markdown() of the full text.
+    """
+
+    def __init__(self):
+        self._held = ""
+        self._started = False
+
+    def feed(self, chunk: str) -> str:
+        text = self._held + chunk
+        body = text.rstrip()
+        # Trailing whitespace is held back: it may merge with the next chunk's
+        # newlines or be stripped at the end of the report.
+        self._held = text[len(body):]
+        if not body:
+            return ""
+        if not self._started:
+            body = body.lstrip()
+            self._started = True
+        return _normalize_newlines(body)
+
+
+# instructions=[
+#     "You are a sophisticated AI financial analyst. Your task is to combine the inputs from the News Agent and Finance Agent into a comprehensive, well-structured stock report.",
+#     "The report MUST be presented entirely in Markdown format.",
+#     "**Strictly follow this numbered section structure and formatting:**",
+#     "",
+#     "# [Stock Name] Stock Analysis: Key Insights for Investors",
+#     "",
+#     "## 1. Introduction to [Stock Name]",
+#     "   - Provide a concise introduction to the company, its business, and its market position.",
+#     "",
+#     "## 2. Critical News & Market Factors",
+#     "   - Use clear bullet points for each critical news item or market factor identified.",
+#     "   - Explain how these factors are impacting or could impact the stock performance.",
+#     "   - Example factors: product launches, supply chain issues, competitive landscape.",
+#     "",
+#     "## 3. Key Financial Metrics (e.g., Fiscal Year End 2023 or Latest Reporting Period)",
+#     "   - **IMPORTANT: Present ALL financial metrics in a strict Markdown table format with a header and separator line.**",
+#     "   - The table MUST have exactly these three columns: `Metric`, `Value`, and `Change (YoY)`.",
+#     "   - If a 'Change (YoY)' value is not available for a specific metric, display 'N/A' or '-'.",
+#     "   - **Example of the REQUIRED table structure (including header and separator):**",
+#     "     ```",
+#     "     | Metric     |  Value    | Change (YoY) |",
+#     "     | :-----     |  :----    | :----------- |",
+#     "     | Revenue    |  $394.33B |    7.8%      |",
+#     "     | Net Income |  $99.8B   |    5.4%      |",
+#     "     | EPS | $5.67|  9.1%     |      -       |",
+#     "     | P/E Ratio  |  29.56    |     N/A      |",
+#     "     | Market Cap |  $2.97T   |      -       |",
+#     "     ```",
+#     "   - Include metrics such as: Revenue, Net Income, Gross Margin, Operating Expenses, Earnings Per Share (EPS), P/E ratio, Market Cap, Dividend Yield, Beta, and Alpha. Add others if available and relevant, ensuring all three columns are populated.",
+#     "",
+#     "## 4. Investment Recommendations",
+#     "   - Provide distinct sections for long-term and short-term investment outlooks.",
+#     "",
+#     "   ### A. Long-term Outlook:",
+#     "      - Use clear bullet points for each recommendation (Buy/Hold) and the detailed reasons supporting it.",
+#     "      - **Buy Recommendation:** Focus on aspects like strong brand loyalty, diversified product portfolio, continuous innovation, and growth potential (e.g., services segment).",
+#     "      - **Hold Recommendation:** Focus on factors like historical ability to navigate market fluctuations and commitment to shareholder value (dividends, buybacks).",
+#     "",
+#     "   ### B. Short-term Outlook:",
+#     "      - Use clear bullet points for each recommendation (Neutral/Sell) and the detailed reasons supporting it.",
+#     "      - **Neutral Recommendation:** Focus on volatility, product launch cycles, quarterly earnings, and global economic conditions.",
+#     "      - **Sell Recommendation:** Focus on realizing short-term profits or adjusting portfolio based on risk tolerance.",
+#     "",
+#     "## 5. Conclusion",
+#     "   - Provide a concise summary of the key takeaways for both long-term and short-term investors.",
+#     "   - **Crucially, include the following disclaimer at the very end of the conclusion:** 'Always conduct thorough personal research or consult with a qualified financial advisor before making any investment decisions.'",
+#     "",
+#     "**General Formatting Guidelines:**",
+#     "   - Use bolding (`**text**`) for emphasis where appropriate (e.g., recommendation types).",
+#     "   - Ensure consistent Markdown headings and lists throughout the report.",
+#     "   - Avoid any introductory or concluding sentences outside the specified Markdown structure.",
+#     "   - Do NOT include any code blocks or examples in the final output, unless specifically part of the requested Markdown table example.",
+#     "   - Make sure the report is well-organized and easy to read."
+# ]
+
+# Aggregator instructions, shared by the delegating aggregator agent and the
+# report agent used for parallel orchestration.
+AGGREGATOR_INSTRUCTIONS = [
     "You are a sophisticated AI financial analyst. Your task is to generate a professional Markdown stock analysis report based on inputs from News Agent and Finance Agent.",
     "Always use accurate financial terminology and clearly explain stock market actions, trends, and metrics. The output should serve both retail and institutional investors.",
     "",
@@ -180,20 +203,255 @@ instructions = [
     "- Do not include raw JSON, HTML, or XML.",
     "- Use consistent formatting for lists, tables, and bold/italic text.",
 ]
-)
 
-# Final Query Function
-def query_aggregator_agent(stock_name: str) -> str:
-    """Fetches the full markdown stock analysis report from the aggregator agent."""
-    response = aggregator_agent.run(message=f"Analyze {stock_name} stock.")
 
+class AgentTeam(NamedTuple):
+    news: Any
+    finance: Any
+    aggregator: Any
+    report: Any
+
+
+def _build_groq_agents() -> AgentTeam:
+    from phi.agent import Agent
+    from phi.model.groq import Groq
+    from phi.tools.duckduckgo import DuckDuckGo
+    from phi.tools.yfinance import YFinanceTools
+
+    # News Agent
+    news_agent = Agent(
+        name="News Agent",
+        model=Groq(id="llama-3.3-70b-versatile"),
+        tools=[DuckDuckGo()],
+        instructions=[
+            "Fetch and summarize the latest financial news for the company.",
+            "Highlight points affecting stock performance.",
+            "Include credible sources."
+        ]
+    )
+
+    # Finance Agent
+    finance_agent = Agent(
+        name="Finance Agent",
+        model=Groq(id="llama-3.3-70b-versatile"),
+        tools=[
+            YFinanceTools(
+                stock_price=True,
+                analyst_recommendations=True,
+                stock_fundamentals=True,
+            )
+        ],
+        instructions=[
+            "Retrieve key financial metrics, including Revenue, Net Income, Gross Margin, Operating Expenses, Earnings Per Share (EPS), P/E ratio, Market Cap, Dividend Yield, Beta, and Alpha.",
+            "For relevant metrics (e.g., Revenue, Net Income, EPS), also retrieve and provide their Year-over-Year (YoY) change percentages.",
+            "Use tables for clarity.",
+            "Focus on how these metrics impact stock performance."
+        ]
+    )
+
+    # Aggregator Agent: delegates to the sub-agents through tool calls
+    aggregator_agent = Agent(
+        model=Groq(id="llama-3.3-70b-versatile"),
+        agents=[news_agent, finance_agent],
+        instructions=AGGREGATOR_INSTRUCTIONS,
+    )
+
+    # Report Agent: writes the report from sub-agent results gathered in parallel
+    report_agent = Agent(
+        model=Groq(id="llama-3.3-70b-versatile"),
+        instructions=AGGREGATOR_INSTRUCTIONS,
+    )
+    return AgentTeam(news_agent, finance_agent, aggregator_agent, report_agent)
+
+
+def _build_fake_agents() -> AgentTeam:
+    from app.services.fake_agents import FakeAgent
+
+    news_agent = FakeAgent(name="News Agent")
+    finance_agent = FakeAgent(name="Finance Agent")
+    aggregator_agent = FakeAgent(name="Aggregator Agent", team=[news_agent, finance_agent])
+    report_agent = FakeAgent(name="Report Agent")
+    return AgentTeam(news_agent, finance_agent, aggregator_agent, report_agent)
+
+
+def build_agents() -> AgentTeam:
+    """
+    Builds a fresh agent team. phidata Agents keep memory and run state per instance,
+    so report runs, which execute concurrently, each build their own team.
+    """
+    return _build_fake_agents() if AGENT_BACKEND == "fake" else _build_groq_agents()
+
+
+# phidata/Groq are imported on the first build rather than at import time, so
+# importing this module stays cheap; warm_agents does that first build at startup.
+_agents_warm = False
+_agents_lock = threading.Lock()
+
+
+def warm_agents() -> None:
+    global _agents_warm
+    if _agents_warm:
+        return
+    with _agents_lock:
+        if not _agents_warm:
+            build_agents()
+            if AGENT_BACKEND != "fake":
+                groq_api_key = os.environ["GROQ_API_KEY"]
+                print(f"DEBUG: GROQ_API_KEY loaded: {groq_api_key[:5]}...{groq_api_key[-5:]}")
+            _agents_warm = True
+
+
+def _response_content(response) -> str:
     if isinstance(response, dict) and "content" in response:
-        content = response["content"]
+        return response["content"]
     elif hasattr(response, "content"):
-        content = response.content
+        return response.content
     elif isinstance(response, str):
-        content = response
+        return response
+    raise ValueError("Failed to get response content.")
+
+
+def _run_subagent(agent, message: str, stage: str) -> str:
+    with timed(stage):
+        return _response_content(agent.run(message=message))
+
+
+def _count_subagent(counter: str, delta: int = 1) -> None:
+    with _subagent_stats_lock:
+        _subagent_counts[counter] += delta
+
+
+def _submit_subagent(agent, message: str, stage: str) -> Optional[Future]:
+    """Starts a sub-agent run, or returns None when every worker is still held by earlier runs."""
+    if not _subagent_slots.acquire(blocking=False):
+        _count_subagent("skipped")
+        return None
+    try:
+        future = _subagent_pool.submit(contextvars.copy_context().run, _run_subagent, agent, message, stage)
+    except BaseException:
+        _subagent_slots.release()
+        raise
+    future.add_done_callback(lambda _: _subagent_slots.release())
+    return future
+
+
+def _abandon_subagent(future: Future) -> None:
+    """Drops a run's result; a run that already started keeps going in the background."""
+    if future.cancel():
+        return
+    _count_subagent("abandoned_running")
+    future.add_done_callback(lambda _: _count_subagent("abandoned_running", -1))
+
+
+def _collect_subagent(
+    future: Optional[Future],
+    agent_name: str,
+    deadline: float,
+    stop_event: Optional[threading.Event] = None,
+) -> Optional[str]:
+    """
+    Waits for a sub-agent run until `deadline`. When `stop_event` is set while
+    waiting, the run is abandoned and None returned straight away.
+    """
+    if future is None:
+        print(f"{agent_name} skipped: all {SUBAGENT_WORKERS} sub-agent workers are busy; continuing without it.")
+        return None
+    try:
+        while True:
+            remaining = max(0.0, deadline - time.monotonic())
+            if stop_event is not None and stop_event.is_set():
+                _count_subagent("cancelled")
+                _abandon_subagent(future)
+                return None
+            try:
+                timeout = remaining if stop_event is None else min(remaining, SUBAGENT_STOP_POLL_SECONDS)
+                return future.result(timeout=timeout)
+            except FutureTimeoutError:
+                if timeout >= remaining:
+                    raise
+    except FutureTimeoutError:
+        _count_subagent("timed_out")
+        _abandon_subagent(future)
+        print(
+            f"{agent_name} timed out after {SUBAGENT_TIMEOUT_SECONDS}s; continuing without it "
+            "while the abandoned run finishes in the background."
+        )
+    except Exception as e:
+        print(f"{agent_name} failed: {e}; continuing without it.")
+    return None
+
+
+def subagent_stats() -> Dict[str, int]:
+    with _subagent_stats_lock:
+        return {"workers": SUBAGENT_WORKERS, **_subagent_counts}
+
+
+def _parallel_report_prompt(
+    stock_name: str, agents: AgentTeam, stop_event: Optional[threading.Event] = None
+) -> Optional[str]:
+    """
+    Runs the News and Finance agents concurrently and builds the report agent's prompt.
+    Returns None when `stop_event` is set before both results are in.
+    """
+    if stop_event is not None and stop_event.is_set():
+        return None
+    news_future = _submit_subagent(
+        agents.news, f"Fetch and summarize the latest financial news for {stock_name}.", "news_agent_run"
+    )
+    finance_future = _submit_subagent(
+        agents.finance, f"Retrieve the key financial metrics for {stock_name}.", "finance_agent_run"
+    )
+    deadline = time.monotonic() + SUBAGENT_TIMEOUT_SECONDS
+    news = _collect_subagent(news_future, "News Agent", deadline, stop_event)
+    finance = _collect_subagent(finance_future, "Finance Agent", deadline, stop_event)
+
+    if stop_event is not None and stop_event.is_set():
+        return None
+    if news is None and finance is None:
+        raise RuntimeError(f"Both News and Finance agents failed for {stock_name}.")
+
+    unavailable = "Not available for this report; say so where this input would be used."
+    return (
+        f"Analyze {stock_name} stock.\n\n"
+        f"### News Agent findings\n{news or unavailable}\n\n"
+        f"### Finance Agent findings\n{finance or unavailable}"
+    )
+
+
+# Final Query Function
+def query_aggregator_agent(stock_name: str) -> str:
+    """Fetches the full markdown stock analysis report from the aggregator agent."""
+    agents = build_agents()
+    with timed("agent_run"):
+        if AGENT_ORCHESTRATION == "parallel":
+            response = agents.report.run(message=_parallel_report_prompt(stock_name, agents))
+        else:
+            response = agents.aggregator.run(message=f"Analyze {stock_name} stock.")
+
+    return clean_markdown(_response_content(response))
+
+
+def stream_aggregator_agent(stock_name: str, stop_event: Optional[threading.Event] = None) -> Iterator[str]:
+    """
+    Yields raw markdown chunks of the report as the aggregator agent generates them.
+    Once `stop_event` is set, no further agent run is started and the stream ends.
+    """
+    agents = build_agents()
+    started = time.perf_counter()
+    if AGENT_ORCHESTRATION == "parallel":
+        prompt = _parallel_report_prompt(stock_name, agents, stop_event)
+        if prompt is None:
+            return
+        chunks = agents.report.run(message=prompt, stream=True)
     else:
-        raise ValueError("Failed to get response content.")
+        if stop_event is not None and stop_event.is_set():
+            return
+        chunks = agents.aggregator.run(message=f"Analyze {stock_name} stock.", stream=True)
 
-    return clean_markdown(content)
+    try:
+        for chunk in chunks:
+            content = chunk.content if hasattr(chunk, "content") else chunk
+            if isinstance(content, str) and content:
+                yield content
+    finally:
+        observe_stage("agent_run", time.perf_counter() - started)
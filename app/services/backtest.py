@@ -0,0 +1,137 @@
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.services.forecast_engine import get_forecast_engine
+from app.services.model_registry import ModelEntry
+from app.services.prediction_service import TIME_STEP
+from app.services.price_store import price_store, NoPriceDataError
+from app.utils.metrics import timed
+
+# Windows per model call. Large batches amortize per-call overhead; the rollout
+# buffer is batch x (TIME_STEP + horizon) float32.
+BACKTEST_BATCH_SIZE = int(os.getenv("BACKTEST_BATCH_SIZE", "1024"))
+BACKTEST_LOOKBACK_DAYS = int(os.getenv("BACKTEST_LOOKBACK_DAYS", "1000"))
+BACKTEST_MAX_HORIZON = 30
+
+
+def error_metrics(predicted: np.ndarray, actual: np.ndarray, last: np.ndarray) -> Dict[str, Any]:
+    """MAE, RMSE, MAPE (%) and directional accuracy of `predicted` against `actual`, relative to the last known price `last`."""
+    errors = predicted - actual
+    nonzero = actual != 0
+    return {
+        "samples": int(len(actual)),
+        "mae": float(np.mean(np.abs(errors))),
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "mape": float(np.mean(np.abs(errors[nonzero] / actual[nonzero])) * 100) if nonzero.any() else None,
+        "directional_accuracy": float(np.mean(np.sign(predicted - last) == np.sign(actual - last))),
+        # Error of the "tomorrow equals today" forecast, for scale.
+        "naive_mae": float(np.mean(np.abs(last - actual))),
+    }
+
+
+def backtest_series(
+    entry: ModelEntry,
+    closes: np.ndarray,
+    horizons: Sequence[int] = (1,),
+    stride: int = 1,
+    batch_size: int = BACKTEST_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Walk-forward backtest over every TIME_STEP-day window of `closes` (every
+    `stride`-th window). Each window is rolled forward max(horizons) steps and the
+    h-step prediction is scored against the close h days after the window.
+
+    The series is scaled once, and windows are strided views into it, so the only
+    copies are the per-batch rollout buffers.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    horizons = sorted({int(h) for h in horizons})
+    max_horizon = horizons[-1]
+    # Windows with at least one future close to score against.
+    window_count = len(closes) - TIME_STEP
+    if window_count <= 0:
+        raise NoPriceDataError(
+            f"Backtesting needs more than {TIME_STEP} prices; only {len(closes)} are available."
+        )
+
+    engine = get_forecast_engine(entry.model, entry.scaler)
+    with timed("scaler_transform"):
+        scaled_closes = engine.to_scaled(closes)
+    scaled_windows = sliding_window_view(scaled_closes, TIME_STEP)[:window_count:stride]
+    starts = np.arange(0, window_count, stride)
+
+    started = time.perf_counter()
+    scaled_predictions = np.empty((len(starts), max_horizon), dtype=np.float32)
+    with timed("model_inference"):
+        for begin in range(0, len(starts), batch_size):
+            end = begin + batch_size
+            scaled_predictions[begin:end] = engine.rollout_scaled(scaled_windows[begin:end], max_horizon)
+    predictions = engine.to_prices(scaled_predictions)
+    inference_seconds = time.perf_counter() - started
+
+    last_known = closes[starts + TIME_STEP - 1]
+    results: Dict[str, Any] = {}
+    for horizon in horizons:
+        target_index = starts + TIME_STEP + horizon - 1
+        scored = target_index < len(closes)
+        if not scored.any():
+            results[str(horizon)] = None
+            continue
+        results[str(horizon)] = error_metrics(
+            predictions[scored, horizon - 1], closes[target_index[scored]], last_known[scored]
+        )
+
+    return {
+        "symbol": entry.symbol,
+        "model_version": entry.version,
+        "prices": int(len(closes)),
+        "windows": int(len(starts)),
+        "stride": stride,
+        "horizons": results,
+        "inference_seconds": round(inference_seconds, 4),
+    }
+
+
+def backtest_symbol(
+    entry: ModelEntry,
+    horizons: Sequence[int] = (1,),
+    lookback_days: int = BACKTEST_LOOKBACK_DAYS,
+    stride: int = 1,
+) -> Dict[str, Any]:
+    """Backtests `entry` over the last `lookback_days` closes from the price store."""
+    dates, closes = price_store.get_history(entry.symbol, lookback_days)
+    result = backtest_series(entry, closes, horizons, stride)
+    result["from_date"] = str(dates[0])
+    result["to_date"] = str(dates[-1])
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Backtests every available model and prints one JSON report, e.g. as a deploy check."""
+    import argparse
+
+    from app.services.model_registry import registry
+
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the bundled LSTM models.")
+    parser.add_argument("symbols", nargs="*", help="Symbols to backtest (default: every available model).")
+    parser.add_argument("--horizons", nargs="+", type=int, default=[1, 5])
+    parser.add_argument("--lookback-days", type=int, default=BACKTEST_LOOKBACK_DAYS)
+    parser.add_argument("--stride", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    report = {}
+    for symbol in args.symbols or registry.available_symbols():
+        try:
+            report[symbol] = backtest_symbol(registry.get(symbol), args.horizons, args.lookback_days, args.stride)
+        except Exception as e:
+            report[symbol] = {"error": str(e)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.execution import inference_executor
+
+# Requests for the same symbol that arrive within BATCH_MAX_WAIT_MS of each other
+# are run through the model as a single batch of up to BATCH_MAX_SIZE windows.
+BATCH_MAX_SIZE = int(os.getenv("LSTM_BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_MS = float(os.getenv("LSTM_BATCH_MAX_WAIT_MS", "5"))
+
+# batch_fn(symbol, windows) -> predictions, with windows of shape (batch, TIME_STEP)
+BatchFunction = Callable[[str, np.ndarray], np.ndarray]
+
+
+class PredictionBatcher:
+    """
+    Collects concurrent next-day prediction requests for one symbol and runs them
+    as one batched inference, then hands each caller its own result.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        batch_fn: BatchFunction,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+    ):
+        self.symbol = symbol
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._batch_fn = batch_fn
+        self._pending: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running_tasks: set = set()
+        self.batches_run = 0
+        self.requests_served = 0
+
+    async def submit(self, window: Any) -> float:
+        """Queues one price window and waits for its prediction."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((np.asarray(window, dtype=np.float64), future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._running_tasks.add(task)
+        task.add_done_callback(self._running_tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[np.ndarray, asyncio.Future]]) -> None:
+        # Requests whose clients already went away don't need to be computed.
+        batch = [(window, future) for window, future in batch if not future.done()]
+        if not batch:
+            return
+
+        windows = np.stack([window for window, _ in batch])
+        try:
+            predictions = await inference_executor.run(self._batch_fn, self.symbol, windows)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.requests_served += len(batch)
+        for (_, future), prediction in zip(batch, predictions):
+            if not future.done():
+                future.set_result(float(prediction))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches_run": self.batches_run,
+            "requests_served": self.requests_served,
+            "average_batch_size": (
+                self.requests_served / self.batches_run if self.batches_run else 0.0
+            ),
+            "pending": len(self._pending),
+        }
+
+
+# --- One batcher per symbol, created on first use ---
+_batchers: Dict[str, PredictionBatcher] = {}
+
+
+def get_batcher(symbol: str, batch_fn: BatchFunction) -> PredictionBatcher:
+    batcher = _batchers.get(symbol)
+    if batcher is None:
+        batcher = PredictionBatcher(symbol, batch_fn)
+        _batchers[symbol] = batcher
+    return batcher
+
+
+def batching_stats() -> Dict[str, Dict[str, Any]]:
+    return {symbol: batcher.stats() for symbol, batcher in _batchers.items()}
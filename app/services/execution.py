@@ -0,0 +1,125 @@
+import asyncio
+import contextvars
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised instead of queueing work when an executor's queue is full."""
+
+    def __init__(self, pool_name: str, retry_after: int, status_code: int):
+        super().__init__(f"The {pool_name} workers are saturated. Retry after {retry_after}s.")
+        self.pool_name = pool_name
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a hard cap on queued work.
+
+    At most `max_workers` calls run at once and at most `max_queue` more wait for a
+    worker; anything beyond that is rejected immediately with ExecutorSaturatedError
+    so latency stays bounded instead of growing with the backlog.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, reject_status: int = 503):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.reject_status = reject_status
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{name}-worker")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._average_seconds = 0.0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return await self.submit(fn, *args, **kwargs)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> "asyncio.Future[Any]":
+        """Schedules `fn` and returns an awaitable future; raises at once if saturated."""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturatedError(self.name, self._retry_after_locked(), self.reject_status)
+            self._in_flight += 1
+
+        started = time.perf_counter()
+        # Run in a copy of the caller's context so per-request metric labels follow the work.
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, fn, *args, **kwargs)
+        # Counted down when the work really finishes, even if the awaiting request is cancelled.
+        future.add_done_callback(lambda f: self._on_done(started))
+        return asyncio.wrap_future(future)
+
+    def _on_done(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+            # Exponentially weighted average, used for the Retry-After estimate.
+            self._average_seconds = elapsed if self.completed == 1 else 0.8 * self._average_seconds + 0.2 * elapsed
+
+    def _retry_after_locked(self) -> int:
+        backlog_rounds = self._in_flight / self.max_workers
+        return max(1, math.ceil(self._average_seconds * backlog_rounds))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "average_seconds": round(self._average_seconds, 4),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+# CPU-bound model inference. NumPy and TensorFlow release the GIL, and the models
+# live in this process, so threads rather than processes.
+inference_executor = BoundedExecutor(
+    "inference",
+    max_workers=_env_int("EXEC_INFERENCE_WORKERS", os.cpu_count() or 2),
+    max_queue=_env_int("EXEC_INFERENCE_MAX_QUEUE", 64),
+)
+
+# Blocking network and disk I/O (yfinance, price store, model file loads).
+io_executor = BoundedExecutor(
+    "io",
+    max_workers=_env_int("EXEC_IO_WORKERS", 16),
+    max_queue=_env_int("EXEC_IO_MAX_QUEUE", 128),
+)
+
+# Long-running LLM agent reports. Rejections are 429 since each run costs tokens.
+agent_executor = BoundedExecutor(
+    "agent",
+    max_workers=_env_int("EXEC_AGENT_WORKERS", 4),
+    max_queue=_env_int("EXEC_AGENT_MAX_QUEUE", 16),
+    reject_status=429,
+)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    return {
+        executor.name: executor.stats()
+        for executor in (inference_executor, io_executor, agent_executor)
+    }
+
+
+def shutdown_executors() -> None:
+    for executor in (inference_executor, io_executor, agent_executor):
+        executor.shutdown()
@@ -0,0 +1,53 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Union
+
+# Simulated per-agent latency for AGENT_BACKEND=fake. Used to compare orchestration
+# modes offline, without Groq, DuckDuckGo or Yahoo.
+FAKE_AGENT_LATENCY_SECONDS = float(os.getenv("FAKE_AGENT_LATENCY_SECONDS", "0.5"))
+FAKE_AGENT_CHUNK_DELAY_SECONDS = float(os.getenv("FAKE_AGENT_CHUNK_DELAY_SECONDS", "0.01"))
+
+
+@dataclass
+class FakeRunResponse:
+    content: str
+
+
+class FakeAgent:
+    """
+    Stand-in for phi.agent.Agent with the same run() surface.
+
+    It sleeps for `latency_seconds`, runs any team members one after another (like
+    tool-call delegation does), and returns a canned Markdown response.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        latency_seconds: float = FAKE_AGENT_LATENCY_SECONDS,
+        team: Optional[List["FakeAgent"]] = None,
+        chunk_delay_seconds: float = FAKE_AGENT_CHUNK_DELAY_SECONDS,
+    ):
+        self.name = name
+        self.latency_seconds = latency_seconds
+        self.team = team or []
+        self.chunk_delay_seconds = chunk_delay_seconds
+
+    def _content(self, message: str) -> str:
+        lines = [f"## {self.name}", "", f"- Response to: {message.splitlines()[0]}"]
+        for member in self.team:
+            lines.append(f"- {member.name}: {member.run(message=message).content.splitlines()[0]}")
+        return "\n".join(lines)
+
+    def run(self, message: str = "", stream: bool = False) -> Union[FakeRunResponse, Iterator[FakeRunResponse]]:
+        if stream:
+            return self._stream(message)
+        time.sleep(self.latency_seconds)
+        return FakeRunResponse(content=self._content(message))
+
+    def _stream(self, message: str) -> Iterator[FakeRunResponse]:
+        time.sleep(self.latency_seconds)
+        for word in self._content(message).split(" "):
+            time.sleep(self.chunk_delay_seconds)
+            yield FakeRunResponse(content=word + " ")
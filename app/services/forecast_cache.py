@@ -0,0 +1,119 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_CACHE_MAX_ENTRIES", "1024"))
+
+# forecast_fn(window, steps) -> 1-D array of `steps` predicted prices
+ForecastFunction = Callable[[np.ndarray, int], np.ndarray]
+CacheKey = Tuple[str, str, str]
+
+
+def window_digest(window: np.ndarray) -> str:
+    return hashlib.blake2b(np.ascontiguousarray(window, dtype=np.float64).tobytes(), digest_size=16).hexdigest()
+
+
+class ForecastCache:
+    """
+    Memoizes deterministic autoregressive forecasts.
+
+    Entries are keyed by (symbol, model version, window digest) and hold the longest
+    horizon computed so far. Shorter horizons are served by slicing it. Longer ones
+    continue the rollout from the cached tail instead of starting over.
+    """
+
+    def __init__(self, max_entries: int = FORECAST_CACHE_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[CacheKey, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.extensions = 0
+        self.misses = 0
+        self.steps_computed = 0
+        self.steps_served = 0
+
+    def _key(self, symbol: str, version: str, window: np.ndarray) -> CacheKey:
+        return symbol, version, window_digest(window)
+
+    def peek(self, symbol: str, version: str, window: Any, steps: int) -> Optional[np.ndarray]:
+        """Returns the first `steps` cached predictions, or None without computing anything."""
+        window = np.asarray(window, dtype=np.float64).reshape(-1)
+        key = self._key(symbol, version, window)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None or len(cached) < steps:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.steps_served += steps
+            return cached[:steps]
+
+    def store(self, symbol: str, version: str, window: Any, predictions: Any) -> None:
+        window = np.asarray(window, dtype=np.float64).reshape(-1)
+        predictions = np.array(predictions, dtype=np.float64).reshape(-1)
+        predictions.setflags(write=False)
+        key = self._key(symbol, version, window)
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None and len(existing) >= len(predictions):
+                return
+            self._entries[key] = predictions
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(
+        self, symbol: str, version: str, window: Any, steps: int, forecast_fn: ForecastFunction
+    ) -> np.ndarray:
+        window = np.asarray(window, dtype=np.float64).reshape(-1)
+        key = self._key(symbol, version, window)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                if len(cached) >= steps:
+                    self.hits += 1
+                    self.steps_served += steps
+                    return cached[:steps]
+
+        if cached is None:
+            predictions = np.asarray(forecast_fn(window, steps), dtype=np.float64)
+            with self._lock:
+                self.misses += 1
+                self.steps_computed += steps
+        else:
+            # The rollout only depends on the current window, so continuing from the
+            # last len(window) values of window + cached matches a full recompute.
+            tail = np.concatenate([window, cached])[-len(window):]
+            extra_steps = steps - len(cached)
+            extension = np.asarray(forecast_fn(tail, extra_steps), dtype=np.float64)
+            predictions = np.concatenate([cached, extension])
+            with self._lock:
+                self.extensions += 1
+                self.steps_computed += extra_steps
+                self.steps_served += len(cached)
+
+        self.store(symbol, version, window, predictions)
+        return predictions
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.extensions + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "extensions": self.extensions,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "steps_computed": self.steps_computed,
+                "steps_served_from_cache": self.steps_served,
+            }
+
+
+# Shared cache used by the LSTM routes.
+forecast_cache = ForecastCache()
@@ -0,0 +1,239 @@
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.metrics import timed
+
+
+def _is_keras_model(model_instance: Any) -> bool:
+    return type(model_instance).__module__.startswith(("keras", "tensorflow"))
+
+
+class ForecastEngine:
+    """
+    Autoregressive multi-step forecaster for one model/scaler pair.
+
+    The MinMax scaling is applied once as an affine transform on the way in and once
+    on the way out; the rollout itself stays in scaled space. For Keras models the
+    whole rollout is a single compiled tf.while_loop, so a 365-day forecast is one
+    graph execution instead of 365 predict() calls.
+    """
+
+    def __init__(self, model_instance: Any, scaler_instance: Any):
+        self.model = model_instance
+        self.scaler = scaler_instance
+        # MinMaxScaler: scaled = price * scale_ + min_
+        self.scale = float(np.ravel(scaler_instance.scale_)[0])
+        self.offset = float(np.ravel(scaler_instance.min_)[0])
+        self._graph_predict, self._graph_rollout, self._graph_noisy_rollout = (
+            self._build_graph_rollouts() if _is_keras_model(model_instance) else (None, None, None)
+        )
+
+    def to_scaled(self, prices: Any) -> np.ndarray:
+        return (np.asarray(prices, dtype=np.float64) * self.scale + self.offset).astype(np.float32)
+
+    def to_prices(self, scaled: Any) -> np.ndarray:
+        return (np.asarray(scaled, dtype=np.float64) - self.offset) / self.scale
+
+    def forecast(self, windows: Any, steps: int) -> np.ndarray:
+        """
+        Forecasts `steps` future prices for each window.
+        `windows` has shape (batch, time_step); the result has shape (batch, steps).
+        """
+        windows_array = np.asarray(windows, dtype=np.float64)
+        if windows_array.ndim == 1:
+            windows_array = windows_array.reshape(1, -1)
+        if steps <= 0:
+            return np.empty((windows_array.shape[0], 0), dtype=np.float64)
+
+        with timed("scaler_transform"):
+            scaled_windows = self.to_scaled(windows_array)
+        with timed("model_inference"):
+            scaled_predictions = self.rollout_scaled(scaled_windows, steps)
+        with timed("inverse_transform"):
+            return self.to_prices(scaled_predictions)
+
+    def forecast_mixed(self, windows: Any, horizons: Sequence[int]) -> List[np.ndarray]:
+        """
+        Forecasts a different number of steps for each window in one batched rollout.
+
+        Rows are ordered longest horizon first, and the rollout runs in stages between
+        consecutive distinct horizons. Each stage only advances the rows that still need
+        steps, so short horizons stop costing compute once they are done. Returns one
+        1-D array per window, in input order.
+        """
+        horizons = np.asarray(horizons, dtype=np.int64)
+        windows_array = np.asarray(windows, dtype=np.float64).reshape(len(horizons), -1)
+        time_step = windows_array.shape[1]
+        order = np.argsort(-horizons, kind="stable")
+        sorted_horizons = horizons[order]
+        max_steps = int(sorted_horizons[0]) if len(horizons) else 0
+
+        with timed("scaler_transform"):
+            current = self.to_scaled(windows_array[order])
+        scaled_predictions = np.empty((len(horizons), max_steps), dtype=np.float32)
+        done = 0
+        with timed("model_inference"):
+            for stage_end in np.unique(sorted_horizons[sorted_horizons > 0]):
+                active = int(np.count_nonzero(sorted_horizons > done))
+                stage = self.rollout_scaled(current[:active], int(stage_end) - done)
+                scaled_predictions[:active, done:stage_end] = stage
+                # The rollout only depends on the last time_step values, so continuing
+                # from them matches an uninterrupted rollout.
+                current = np.concatenate([current[:active], stage], axis=1)[:, -time_step:]
+                done = int(stage_end)
+        with timed("inverse_transform"):
+            prices = self.to_prices(scaled_predictions)
+
+        results: List[np.ndarray] = [np.empty(0)] * len(horizons)
+        for row, index in enumerate(order):
+            results[index] = prices[row, :sorted_horizons[row]]
+        return results
+
+    def forecast_chunks(self, window: Any, steps: int, chunk_size: int) -> Iterator[np.ndarray]:
+        """
+        Forecasts `steps` prices for one window, yielding them `chunk_size` days at a
+        time as the rollout produces them. Each chunk continues from the last
+        time_step values of the one before, so the chunks concatenate to the
+        uninterrupted forecast. Nothing past the current chunk is computed until
+        the next one is requested.
+        """
+        with timed("scaler_transform"):
+            current = self.to_scaled(np.asarray(window, dtype=np.float64).reshape(1, -1))
+        time_step = current.shape[1]
+        done = 0
+        while done < steps:
+            size = min(chunk_size, steps - done)
+            with timed("model_inference"):
+                chunk = self.rollout_scaled(current, size)
+            current = np.concatenate([current, chunk], axis=1)[:, -time_step:]
+            done += size
+            with timed("inverse_transform"):
+                prices = self.to_prices(chunk[0])
+            yield prices
+
+    def forecast_paths(
+        self, window: Any, steps: int, paths: int, noise_std: Optional[float] = None, seed: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Samples `paths` noisy futures of one window as a single batched rollout and
+        returns them as a (paths, steps) price array.
+
+        Each step's prediction gets Gaussian noise in scaled space before it is fed
+        back, so the errors compound along each path. The default `noise_std` is the
+        standard deviation of the window's own day-over-day changes.
+        """
+        with timed("scaler_transform"):
+            scaled_window = self.to_scaled(np.asarray(window, dtype=np.float64).reshape(1, -1))
+        if noise_std is None:
+            noise_std = float(np.std(np.diff(scaled_window[0])))
+        noise = np.random.default_rng(seed).normal(0.0, noise_std, size=(paths, steps)).astype(np.float32)
+        with timed("model_inference"):
+            scaled_paths = self.rollout_scaled(np.repeat(scaled_window, paths, axis=0), steps, noise)
+        with timed("inverse_transform"):
+            return self.to_prices(scaled_paths)
+
+    def predict_scaled(self, scaled_windows: np.ndarray) -> np.ndarray:
+        """
+        One model step for a batch of (batch, time_step, 1) float32 windows in scaled
+        space. Keras models run through a compiled function with a dynamic batch
+        dimension, so micro-batches of varying size don't retrace model.predict.
+        """
+        if self._graph_predict is not None:
+            return self._graph_predict(np.asarray(scaled_windows, dtype=np.float32)).numpy()
+        return np.asarray(self.model.predict(scaled_windows, verbose=0))
+
+    def rollout_scaled(self, scaled_windows: np.ndarray, steps: int, noise: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Rolls (batch, time_step) float32 windows forward `steps` steps, all in scaled space.
+        `noise` of shape (batch, steps), if given, is added to each prediction before it is fed back.
+        """
+        if self._graph_rollout is not None:
+            if noise is not None:
+                return self._graph_noisy_rollout(scaled_windows[:, :, None], noise).numpy()
+            return self._graph_rollout(scaled_windows[:, :, None], np.int32(steps)).numpy()
+        return self._buffer_rollout(scaled_windows, steps, noise)
+
+    def _buffer_rollout(self, scaled_windows: np.ndarray, steps: int, noise: Optional[np.ndarray] = None) -> np.ndarray:
+        # Window and predictions share one preallocated buffer; each step's input is a
+        # view into it, so nothing is copied or shifted between steps.
+        batch, time_step = scaled_windows.shape
+        buffer = np.empty((batch, time_step + steps), dtype=np.float32)
+        buffer[:, :time_step] = scaled_windows
+        for step in range(steps):
+            window = buffer[:, step:step + time_step, None]
+            next_values = self.model.predict(window, verbose=0)
+            buffer[:, time_step + step] = np.asarray(next_values).reshape(batch)
+            if noise is not None:
+                buffer[:, time_step + step] += noise[:, step]
+        return buffer[:, time_step:]
+
+    def _build_graph_rollouts(self):
+        import tensorflow as tf
+
+        model = self.model
+        time_step = model.input_shape[1]
+        window_spec = tf.TensorSpec(shape=[None, time_step, 1], dtype=tf.float32)
+
+        def unrolled(window, steps, noise=None):
+            predictions = tf.TensorArray(tf.float32, size=steps)
+
+            def body(step, window, predictions):
+                next_value = model(window, training=False)[:, :1]
+                if noise is not None:
+                    # A gather keeps the static width of 1 that a slice with a tensor bound loses.
+                    next_value = next_value + tf.gather(noise, step, axis=1)[:, None]
+                predictions = predictions.write(step, next_value[:, 0])
+                window = tf.concat([window[:, 1:, :], next_value[:, :, None]], axis=1)
+                # The loop variable must keep the window's shape from one iteration to the next.
+                window = tf.ensure_shape(window, [None, time_step, 1])
+                return step + 1, window, predictions
+
+            _, _, predictions = tf.while_loop(
+                lambda step, window, predictions: step < steps,
+                body,
+                (tf.constant(0), window, predictions),
+            )
+            # TensorArray stacks to (steps, batch)
+            return tf.transpose(predictions.stack())
+
+        @tf.function(input_signature=[window_spec], reduce_retracing=True)
+        def predict(window):
+            return model(window, training=False)
+
+        @tf.function(input_signature=[window_spec, tf.TensorSpec(shape=[], dtype=tf.int32)], reduce_retracing=True)
+        def rollout(window, steps):
+            return unrolled(window, steps)
+
+        @tf.function(input_signature=[window_spec, tf.TensorSpec(shape=[None, None], dtype=tf.float32)], reduce_retracing=True)
+        def noisy_rollout(window, noise):
+            return unrolled(window, tf.shape(noise)[1], noise)
+
+        return predict, rollout, noisy_rollout
+
+
+# --- One engine per loaded model/scaler pair, built on first use ---
+_engines: Dict[int, ForecastEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_forecast_engine(model_instance: Any, scaler_instance: Any) -> ForecastEngine:
+    engine = _engines.get(id(model_instance))
+    if engine is not None and engine.model is model_instance and engine.scaler is scaler_instance:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(id(model_instance))
+        if engine is None or engine.model is not model_instance or engine.scaler is not scaler_instance:
+            engine = ForecastEngine(model_instance, scaler_instance)
+            _engines[id(model_instance)] = engine
+        return engine
+
+
+def release_forecast_engine(model_instance: Any) -> None:
+    """Drops the cached engine for a model that is being unloaded."""
+    with _engines_lock:
+        engine = _engines.get(id(model_instance))
+        if engine is not None and engine.model is model_instance:
+            del _engines[id(model_instance)]
@@ -0,0 +1,102 @@
+import os
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.forecast_cache import forecast_cache
+from app.services.forecast_engine import get_forecast_engine
+from app.services.model_registry import ModelEntry
+from app.services.prediction_service import predict_multi_step_prices, TIME_STEP
+from app.services.price_store import price_store, NoPriceDataError
+
+# Upper bound on paths x forecast_days for one probabilistic forecast; the rollout
+# buffer is paths x (TIME_STEP + forecast_days) float32.
+FORECAST_MAX_PATH_STEPS = int(os.getenv("FORECAST_MAX_PATH_STEPS", "365000"))
+
+# Forecast days per NDJSON line when a multi-step forecast is streamed.
+FORECAST_STREAM_CHUNK_DAYS = int(os.getenv("FORECAST_STREAM_CHUNK_DAYS", "10"))
+
+
+def forecast_window(entry: ModelEntry, window: np.ndarray, steps: int) -> np.ndarray:
+    """Forecast function handed to the forecast cache for misses and extensions."""
+    return np.asarray(predict_multi_step_prices(entry.model, entry.scaler, window, steps))
+
+
+def load_latest_window(symbol: str, refresh_seconds: Optional[float] = None) -> Tuple[str, np.ndarray]:
+    """
+    Returns (last_date, window) with the latest TIME_STEP closes for `symbol` from the price store.
+    Raises NoPriceDataError if fewer than TIME_STEP prices are available.
+    """
+    dates, closes = price_store.get_history(symbol, TIME_STEP, refresh_seconds=refresh_seconds)
+    if len(closes) < TIME_STEP:
+        raise NoPriceDataError(
+            f"Only {len(closes)} historical prices available for {symbol}; {TIME_STEP} are needed."
+        )
+    return str(dates[-1]), np.asarray(closes, dtype=np.float64)
+
+
+def forecast_latest(entry: ModelEntry, window: np.ndarray, forecast_days: int) -> np.ndarray:
+    """Forecasts from a server-side window through the shared forecast cache."""
+    return forecast_cache.get_or_compute(
+        entry.symbol, entry.version, window, forecast_days, partial(forecast_window, entry)
+    )
+
+
+def forecast_batch(entry: ModelEntry, windows: np.ndarray, horizons: Sequence[int]) -> List[np.ndarray]:
+    """
+    Forecasts many windows with their own horizons for one model. Cached forecasts are
+    sliced; all misses run together as one mixed-horizon rollout and are cached.
+    """
+    results: List[Optional[np.ndarray]] = [
+        forecast_cache.peek(entry.symbol, entry.version, window, steps) for window, steps in zip(windows, horizons)
+    ]
+    misses = [index for index, result in enumerate(results) if result is None]
+    if misses:
+        engine = get_forecast_engine(entry.model, entry.scaler)
+        computed = engine.forecast_mixed(windows[misses], [horizons[index] for index in misses])
+        for index, predictions in zip(misses, computed):
+            forecast_cache.store(entry.symbol, entry.version, windows[index], predictions)
+            results[index] = predictions
+    return results
+
+
+def forecast_stream(
+    entry: ModelEntry, window: np.ndarray, steps: int, chunk_days: int = FORECAST_STREAM_CHUNK_DAYS
+) -> Iterator[np.ndarray]:
+    """
+    Yields the forecast for one window `chunk_days` days at a time. A cached forecast
+    is sliced; otherwise each chunk is rolled out only when it is requested, so a
+    consumer that stops iterating stops the computation. Only a forecast streamed to
+    the end is cached.
+    """
+    cached = forecast_cache.peek(entry.symbol, entry.version, window, steps)
+    if cached is not None:
+        for start in range(0, steps, chunk_days):
+            yield cached[start:start + chunk_days]
+        return
+
+    produced: List[np.ndarray] = []
+    for chunk in get_forecast_engine(entry.model, entry.scaler).forecast_chunks(window, steps, chunk_days):
+        produced.append(chunk)
+        yield chunk
+    forecast_cache.store(entry.symbol, entry.version, window, np.concatenate(produced))
+
+
+def forecast_quantiles(
+    entry: ModelEntry,
+    window: np.ndarray,
+    steps: int,
+    paths: int,
+    quantiles: Sequence[float],
+    seed: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Quantile bands over `paths` noisy rollouts of one window, keyed by quantile
+    (e.g. "0.05"). All paths run together as one batched rollout.
+    """
+    if paths * steps > FORECAST_MAX_PATH_STEPS:
+        raise ValueError(f"paths x forecast_days must be at most {FORECAST_MAX_PATH_STEPS}.")
+    sampled = get_forecast_engine(entry.model, entry.scaler).forecast_paths(window, steps, paths, seed=seed)
+    bands = np.quantile(sampled, quantiles, axis=0)
+    return {f"{quantile:g}": band for quantile, band in zip(quantiles, bands)}
@@ -0,0 +1,105 @@
+import asyncio
+import os
+from datetime import datetime, time as dt_time, timedelta
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from app.services.execution import inference_executor, io_executor
+from app.services.forecast_pipeline import forecast_latest, load_latest_window
+from app.services.model_registry import registry
+
+# Daily precomputation runs on weekdays at this local exchange time (after the NSE close).
+FORECAST_SCHEDULER_ENABLED = os.getenv("FORECAST_SCHEDULER_ENABLED", "1") == "1"
+FORECAST_PRECOMPUTE_TIME = os.getenv("FORECAST_PRECOMPUTE_TIME", "16:00")
+FORECAST_PRECOMPUTE_TIMEZONE = os.getenv("FORECAST_PRECOMPUTE_TIMEZONE", "Asia/Kolkata")
+FORECAST_PRECOMPUTE_DAYS = int(os.getenv("FORECAST_PRECOMPUTE_DAYS", "365"))
+FORECAST_PRECOMPUTE_ON_STARTUP = os.getenv("FORECAST_PRECOMPUTE_ON_STARTUP", "0") == "1"
+
+
+def next_run_after(now: datetime, run_at: dt_time) -> datetime:
+    """Next weekday occurrence of `run_at` strictly after `now` (both in the exchange timezone)."""
+    candidate = now.replace(hour=run_at.hour, minute=run_at.minute, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:  # Saturday/Sunday
+        candidate += timedelta(days=1)
+    return candidate
+
+
+class ForecastScheduler:
+    """
+    Background task that precomputes forecasts for every resident model after the
+    market closes. Results land in the forecast cache, keyed by the fresh price
+    window, so /lstm/forecast becomes a cache lookup for the rest of the day.
+    """
+
+    def __init__(
+        self,
+        run_at: str = FORECAST_PRECOMPUTE_TIME,
+        timezone: str = FORECAST_PRECOMPUTE_TIMEZONE,
+        forecast_days: int = FORECAST_PRECOMPUTE_DAYS,
+    ):
+        hour, minute = (int(part) for part in run_at.split(":"))
+        self.run_at = dt_time(hour, minute)
+        self.timezone = ZoneInfo(timezone)
+        self.forecast_days = forecast_days
+        self._task: Optional[asyncio.Task] = None
+        self.next_run: Optional[datetime] = None
+        self.last_run: Optional[datetime] = None
+        self.last_results: Dict[str, Dict[str, Any]] = {}
+
+    def start(self, run_now: bool = FORECAST_PRECOMPUTE_ON_STARTUP) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop(run_now))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self, run_now: bool) -> None:
+        if run_now:
+            await self.run_once()
+        while True:
+            now = datetime.now(self.timezone)
+            self.next_run = next_run_after(now, self.run_at)
+            await asyncio.sleep((self.next_run - now).total_seconds())
+            await self.run_once()
+
+    async def run_once(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        symbols = symbols if symbols is not None else registry.resident_symbols()
+        print(f"Precomputing {self.forecast_days}-day forecasts for {len(symbols)} models...")
+        results: Dict[str, Dict[str, Any]] = {}
+
+        for symbol in symbols:
+            try:
+                # Bypass the store's staleness window so today's closing bar is used.
+                last_date, window = await io_executor.run(load_latest_window, symbol, 0)
+                entry = await registry.aget(symbol)
+                await inference_executor.run(forecast_latest, entry, window, self.forecast_days)
+                results[symbol] = {"status": "ok", "last_date": last_date}
+            except Exception as e:
+                print(f"ERROR precomputing forecast for {symbol}: {e}")
+                results[symbol] = {"status": "error", "detail": str(e)}
+
+        self.last_run = datetime.now(self.timezone)
+        self.last_results = results
+        return results
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._task is not None,
+            "run_at": self.run_at.strftime("%H:%M"),
+            "timezone": str(self.timezone),
+            "forecast_days": self.forecast_days,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_results": self.last_results,
+        }
+
+
+forecast_scheduler = ForecastScheduler()
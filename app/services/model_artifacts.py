@@ -0,0 +1,179 @@
+"""
+Memory-mapped model artifacts.
+
+An artifact is a directory <SYMBOL>_lstm_artifact/ holding a manifest.json and a
+weights-<digest>.bin file. The manifest holds the Keras model config, the offset,
+dtype and shape of every weight in the .bin file, and the MinMax scaler's affine
+parameters. Loading maps the .bin file read-only, so every uvicorn worker shares
+the same page-cache pages instead of holding its own copy of the weights.
+
+Convert the bundled .h5/.pkl pairs once with:
+
+    python -m app.services.model_artifacts [--model-dir app/models] [SYMBOL ...]
+"""
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.numpy_lstm import NumpyLSTMModel, read_h5_model
+
+ARTIFACT_DIR_SUFFIX = "_lstm_artifact"
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+
+# Weights start on cache-line boundaries inside the .bin file.
+_ALIGNMENT = 64
+
+
+class AffineScaler:
+    """
+    Single-feature MinMaxScaler replacement built from the stored affine parameters
+    (scaled = x * scale_ + min_). It has the same transform/inverse_transform
+    surface, without unpickling scikit-learn objects.
+    """
+
+    def __init__(self, scale: Any, offset: Any, data_min: Any = None, data_max: Any = None):
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        self.min_ = np.asarray(offset, dtype=np.float64)
+        self.data_min_ = None if data_min is None else np.asarray(data_min, dtype=np.float64)
+        self.data_max_ = None if data_max is None else np.asarray(data_max, dtype=np.float64)
+        self.n_features_in_ = self.scale_.shape[0]
+
+    def transform(self, values: Any) -> np.ndarray:
+        return np.asarray(values, dtype=np.float64) * self.scale_ + self.min_
+
+    def inverse_transform(self, values: Any) -> np.ndarray:
+        return (np.asarray(values, dtype=np.float64) - self.min_) / self.scale_
+
+
+def artifact_dir_for(model_dir: Path, symbol: str) -> Path:
+    return Path(model_dir) / f"{symbol}{ARTIFACT_DIR_SUFFIX}"
+
+
+def is_model_artifact(artifact_dir: Path) -> bool:
+    return (artifact_dir / MANIFEST_FILE).is_file()
+
+
+def read_manifest(artifact_dir: Path) -> Dict[str, Any]:
+    with open(artifact_dir / MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact format in {artifact_dir}: {manifest.get('format_version')}")
+    return manifest
+
+
+def load_model_artifact(artifact_dir: Path) -> Tuple[NumpyLSTMModel, AffineScaler]:
+    """Maps the weights read-only and builds the NumPy model and scaler on top of them, without copying."""
+    artifact_dir = Path(artifact_dir)
+    manifest = read_manifest(artifact_dir)
+    mapped = np.memmap(artifact_dir / manifest["weights_file"], dtype=np.uint8, mode="r")
+
+    layer_weights: Dict[str, List[np.ndarray]] = {
+        layer_name: [
+            np.ndarray(tuple(spec["shape"]), dtype=np.dtype(spec["dtype"]), buffer=mapped, offset=spec["offset"])
+            for spec in specs
+        ]
+        for layer_name, specs in manifest["weights"].items()
+    }
+    scaler = manifest["scaler"]
+    return (
+        NumpyLSTMModel.from_config(manifest["model_config"], layer_weights),
+        AffineScaler(scaler["scale"], scaler["min"], scaler.get("data_min"), scaler.get("data_max")),
+    )
+
+
+def file_digest(*paths: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def convert_to_artifact(model_path: Path, scaler_path: Path, artifact_dir: Path) -> Path:
+    """
+    Writes the artifact for one .h5/.pkl pair. The weights file name contains its
+    digest and the manifest is replaced last, so a reader never sees a manifest
+    that points at half-written weights.
+    """
+    import joblib
+
+    model_config, layer_weights = read_h5_model(model_path)
+    scaler = joblib.load(scaler_path)
+
+    blob = bytearray()
+    weight_specs: Dict[str, List[Dict[str, Any]]] = {}
+    for layer_name, weights in layer_weights.items():
+        weight_specs[layer_name] = []
+        for weight in weights:
+            weight = np.ascontiguousarray(weight, dtype="<f4")
+            blob.extend(b"\0" * (-len(blob) % _ALIGNMENT))
+            weight_specs[layer_name].append(
+                {"offset": len(blob), "shape": list(weight.shape), "dtype": weight.dtype.str}
+            )
+            blob.extend(weight.tobytes())
+
+    weights_file = f"weights-{hashlib.blake2b(blob, digest_size=8).hexdigest()}.bin"
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "weights_file": weights_file,
+        "weights": weight_specs,
+        "model_config": model_config,
+        "scaler": {
+            "scale": np.ravel(scaler.scale_).tolist(),
+            "min": np.ravel(scaler.min_).tolist(),
+            "data_min": np.ravel(getattr(scaler, "data_min_", [])).tolist() or None,
+            "data_max": np.ravel(getattr(scaler, "data_max_", [])).tolist() or None,
+        },
+        "source": {"model": Path(model_path).name, "scaler": Path(scaler_path).name, "digest": file_digest(model_path, scaler_path)},
+    }
+
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    weights_path = artifact_dir / weights_file
+    if not weights_path.exists():
+        tmp_path = weights_path.with_suffix(".tmp")
+        tmp_path.write_bytes(bytes(blob))
+        os.replace(tmp_path, weights_path)
+
+    tmp_manifest = artifact_dir / f"{MANIFEST_FILE}.tmp"
+    tmp_manifest.write_text(json.dumps(manifest))
+    os.replace(tmp_manifest, artifact_dir / MANIFEST_FILE)
+
+    # Workers that mapped an older file keep their mapping after it is unlinked.
+    for old_weights in artifact_dir.glob("weights-*.bin"):
+        if old_weights.name != weights_file:
+            old_weights.unlink()
+    return artifact_dir
+
+
+def artifact_source_digest(artifact_dir: Path) -> Optional[str]:
+    try:
+        return read_manifest(artifact_dir)["source"].get("digest")
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from app.services.model_registry import MODEL_DIR, ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Convert .h5/.pkl model pairs into memory-mapped artifacts.")
+    parser.add_argument("symbols", nargs="*", help="Symbols to convert (default: every .h5/.pkl pair).")
+    parser.add_argument("--model-dir", type=Path, default=MODEL_DIR)
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(model_dir=args.model_dir, model_format="h5")
+    for symbol in args.symbols or registry.available_symbols():
+        paths = registry.paths_for(symbol)
+        if paths is None:
+            print(f"❌ No .h5/.pkl pair for {symbol}; skipping.")
+            continue
+        artifact_dir = convert_to_artifact(*paths, artifact_dir_for(args.model_dir, symbol))
+        print(f"✅ {symbol} -> {artifact_dir}")
+
+
+if __name__ == "__main__":
+    main()
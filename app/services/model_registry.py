@@ -0,0 +1,473 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+
+from app.services.execution import io_executor
+from app.services.forecast_engine import release_forecast_engine
+from app.services.model_artifacts import (
+    ARTIFACT_DIR_SUFFIX,
+    MANIFEST_FILE,
+    artifact_dir_for,
+    artifact_source_digest,
+    file_digest,
+    is_model_artifact,
+    load_model_artifact,
+    read_manifest,
+)
+from app.services.prediction_service import load_lstm_model, warm_up_model
+from app.services.quantization import PRECISIONS, QUANTIZED_SYMBOLS, REFERENCE_PRECISION, quantize_model
+
+MODEL_DIR = Path(os.getenv("LSTM_MODEL_DIR", "app/models"))
+MODEL_FILE_SUFFIX = "_lstm_model.h5"
+SCALER_FILE_SUFFIX = "_minmax_scaler.pkl"
+
+# Resident-set bounds. LSTM_MAX_RESIDENT_MB=0 disables the memory bound.
+MAX_RESIDENT_MODELS = int(os.getenv("LSTM_MAX_RESIDENT_MODELS", "32"))
+MAX_RESIDENT_BYTES = int(float(os.getenv("LSTM_MAX_RESIDENT_MB", "0")) * 1024 * 1024)
+
+# Resident models are re-checked against their files at most this often.
+RELOAD_CHECK_SECONDS = float(os.getenv("LSTM_RELOAD_CHECK_SECONDS", "30"))
+
+# Comma-separated symbols to load at startup; "*" loads everything discovered
+# (up to MAX_RESIDENT_MODELS), an empty value loads nothing up front.
+HOT_SYMBOLS = os.getenv("LSTM_HOT_SYMBOLS", "*")
+
+# Hot-set models are loaded concurrently on this many threads at startup.
+LOAD_WORKERS = int(os.getenv("LSTM_LOAD_WORKERS", "4"))
+
+# Run one dummy inference right after loading so graph tracing happens up front.
+WARM_UP_ON_LOAD = os.getenv("LSTM_WARM_UP_ON_LOAD", "1") == "1"
+
+# "h5": Keras .h5 + pickled scaler. "mmap": memory-mapped artifacts only (see
+# app/services/model_artifacts.py). "auto": an artifact when one exists and was
+# converted from the current .h5/.pkl pair, otherwise the .h5 pair.
+MODEL_FORMAT = os.getenv("LSTM_MODEL_FORMAT", "auto").lower()
+
+_SYMBOL_PATTERN = re.compile(r"^[A-Z0-9.\-_^=&]+$")
+
+
+@dataclass
+class ModelEntry:
+    symbol: str
+    model: Any
+    scaler: Any
+    version: str
+    size_bytes: int
+    model_format: str = "h5"
+    precision: str = REFERENCE_PRECISION
+    load_seconds: float = 0.0
+    loaded_at: float = field(default_factory=time.time)
+    last_checked: float = field(default_factory=time.monotonic)
+
+
+def _file_version(*paths: Path) -> str:
+    parts = []
+    for path in paths:
+        stat = path.stat()
+        parts.append(f"{stat.st_mtime_ns}-{stat.st_size}")
+    return ":".join(parts)
+
+
+def _estimate_model_bytes(model: Any, model_path: Path) -> int:
+    size_bytes = getattr(model, "size_bytes", None)
+    if size_bytes is not None:
+        return int(size_bytes)
+    count_params = getattr(model, "count_params", None)
+    if callable(count_params):
+        return int(count_params()) * 4
+    return model_path.stat().st_size
+
+
+class ModelRegistry:
+    """
+    Lazily loads per-symbol LSTM models and scalers from `model_dir`.
+
+    Models are discovered by file name (<SYMBOL>_lstm_model.h5 next to
+    <SYMBOL>_minmax_scaler.pkl), loaded on first use with one load per symbol even
+    under concurrent requests, kept in a bounded LRU, and reloaded when their files
+    change on disk. Converted <SYMBOL>_lstm_artifact/ directories are loaded as
+    memory-mapped NumPy models instead, according to `model_format`. Symbols listed
+    in `precisions` are served by a validated quantized copy of their model (see
+    app/services/quantization.py).
+    """
+
+    def __init__(
+        self,
+        model_dir: Path = MODEL_DIR,
+        max_models: int = MAX_RESIDENT_MODELS,
+        max_bytes: int = MAX_RESIDENT_BYTES,
+        reload_check_seconds: float = RELOAD_CHECK_SECONDS,
+        model_loader: Callable[[Path], Any] = load_lstm_model,
+        scaler_loader: Callable[[Path], Any] = joblib.load,
+        warm_up: bool = WARM_UP_ON_LOAD,
+        model_format: str = MODEL_FORMAT,
+        precisions: Optional[Dict[str, str]] = None,
+    ):
+        self.model_dir = Path(model_dir)
+        self.max_models = max(1, max_models)
+        self.max_bytes = max_bytes
+        self.reload_check_seconds = reload_check_seconds
+        self._model_loader = model_loader
+        self._scaler_loader = scaler_loader
+        self._warm_up = warm_up
+        if model_format not in ("auto", "h5", "mmap"):
+            raise ValueError(f"Unknown LSTM model format: {model_format}")
+        self.model_format = model_format
+        self._precisions = dict(QUANTIZED_SYMBOLS if precisions is None else precisions)
+        self._quantization_reports: Dict[str, Dict[str, Any]] = {}
+
+        self._entries: "OrderedDict[str, ModelEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._source_digests: Dict[str, Tuple[str, str]] = {}
+        # Discovered symbols, so has_model can answer on the event loop without
+        # touching the filesystem. Built on first use (or by prewarm), then rebuilt in
+        # the background every reload_check_seconds.
+        self._index: frozenset = frozenset()
+        self._indexed_at = float("-inf")
+        self._index_refreshing = False
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.load_failures = 0
+        self.total_load_seconds = 0.0
+
+    # --- Discovery ---
+    def paths_for(self, symbol: str) -> Optional[Tuple[Path, Path]]:
+        if not _SYMBOL_PATTERN.match(symbol):
+            return None
+        model_path = self.model_dir / f"{symbol}{MODEL_FILE_SUFFIX}"
+        scaler_path = self.model_dir / f"{symbol}{SCALER_FILE_SUFFIX}"
+        if model_path.exists() and scaler_path.exists():
+            return model_path, scaler_path
+        return None
+
+    def source_digest(self, symbol: str) -> Optional[str]:
+        """Content digest of the .h5/.pkl pair, recomputed only when the files change."""
+        paths = self.paths_for(symbol)
+        if paths is None:
+            return None
+        version = _file_version(*paths)
+        cached = self._source_digests.get(symbol)
+        if cached is None or cached[0] != version:
+            cached = (version, file_digest(*paths))
+            self._source_digests[symbol] = cached
+        return cached[1]
+
+    def artifact_for(self, symbol: str) -> Optional[Path]:
+        """The memory-mapped artifact to load for `symbol` under the configured format, if any."""
+        if self.model_format == "h5" or not _SYMBOL_PATTERN.match(symbol):
+            return None
+        artifact_dir = artifact_dir_for(self.model_dir, symbol)
+        if not is_model_artifact(artifact_dir):
+            return None
+        if self.model_format == "auto":
+            source_digest = self.source_digest(symbol)
+            # A stale artifact (the .h5/.pkl changed after conversion) is ignored.
+            if source_digest is not None and artifact_source_digest(artifact_dir) != source_digest:
+                return None
+        return artifact_dir
+
+    def has_model(self, symbol: str) -> bool:
+        """
+        Whether `symbol` has a model, answered from memory (resident models and the
+        discovery index), so it is cheap enough to call on the event loop.
+        """
+        if self._indexed_at == float("-inf"):
+            # Not prewarmed: scan once here rather than answer from an empty index.
+            self.refresh_index()
+        else:
+            self._refresh_index_if_stale()
+        return symbol in self._entries or symbol in self._index
+
+    def available_symbols(self) -> List[str]:
+        candidates = set()
+        if self.model_format != "mmap":
+            candidates.update(path.name[: -len(MODEL_FILE_SUFFIX)] for path in self.model_dir.glob(f"*{MODEL_FILE_SUFFIX}"))
+        if self.model_format != "h5":
+            candidates.update(path.name[: -len(ARTIFACT_DIR_SUFFIX)] for path in self.model_dir.glob(f"*{ARTIFACT_DIR_SUFFIX}"))
+        symbols = [symbol for symbol in sorted(candidates) if self._source_for(symbol) is not None]
+        with self._lock:
+            self._index = frozenset(symbols)
+            self._indexed_at = time.monotonic()
+        return symbols
+
+    def refresh_index(self) -> None:
+        """Rescans `model_dir` for the discovery index behind has_model."""
+        self.available_symbols()
+
+    def _refresh_index_if_stale(self) -> None:
+        with self._lock:
+            if self._index_refreshing or time.monotonic() - self._indexed_at < self.reload_check_seconds:
+                return
+            self._index_refreshing = True
+        threading.Thread(target=self._refresh_index_in_background, name="model-index", daemon=True).start()
+
+    def _refresh_index_in_background(self) -> None:
+        try:
+            self.refresh_index()
+        except Exception as e:
+            print(f"Could not rescan {self.model_dir} for models: {e}")
+            with self._lock:
+                self._indexed_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._index_refreshing = False
+
+    def _source_for(self, symbol: str) -> Optional[Tuple[str, Tuple[Path, ...]]]:
+        """Returns (format, files) for the model `symbol` would load now, or None."""
+        artifact_dir = self.artifact_for(symbol)
+        if artifact_dir is not None:
+            return "mmap", (artifact_dir,)
+        if self.model_format == "mmap":
+            return None
+        paths = self.paths_for(symbol)
+        return ("h5", paths) if paths is not None else None
+
+    def precision_for(self, symbol: str) -> str:
+        """The precision requested for `symbol`; the served one can differ if quantization was refused."""
+        return self._precisions.get(symbol) or self._precisions.get("*") or REFERENCE_PRECISION
+
+    def set_precision(self, symbol: str, precision: str) -> None:
+        """Selects the precision for `symbol`; a resident model is reconverted on its next lookup."""
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown LSTM precision: {precision}")
+        with self._lock:
+            self._precisions[symbol] = precision
+            entry = self._entries.get(symbol)
+            if entry is not None:
+                entry.last_checked = float("-inf")
+
+    def quantization_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requested": dict(self._precisions),
+                "active": {symbol: entry.precision for symbol, entry in self._entries.items()},
+                "reports": {symbol: dict(report) for symbol, report in self._quantization_reports.items()},
+            }
+
+    def resident_symbols(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    # --- Lookup ---
+    def get(self, symbol: str) -> ModelEntry:
+        """Returns the loaded model for `symbol`, loading it if needed. Raises KeyError if unknown."""
+        entry = self._get_fresh(symbol)
+        if entry is not None:
+            return entry
+        if symbol not in self._entries and self._source_for(symbol) is None:
+            # Checked before taking a load lock, so requests for arbitrary unknown
+            # symbols don't leave a lock behind for each name.
+            raise KeyError(symbol)
+
+        with self._symbol_lock(symbol):
+            # Another thread may have loaded or re-checked it while we waited.
+            entry = self._get_fresh(symbol)
+            if entry is not None:
+                return entry
+            return self._load_or_refresh(symbol)
+
+    async def aget(self, symbol: str) -> ModelEntry:
+        """Async variant of `get` that keeps loads and file checks off the event loop."""
+        entry = self._get_fresh(symbol)
+        if entry is not None:
+            return entry
+        return await io_executor.run(self.get, symbol)
+
+    def _get_fresh(self, symbol: str) -> Optional[ModelEntry]:
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.last_checked >= self.reload_check_seconds:
+                return None
+            self._entries.move_to_end(symbol)
+            self.hits += 1
+            return entry
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(symbol, threading.Lock())
+
+    def _load_or_refresh(self, symbol: str) -> ModelEntry:
+        source = self._source_for(symbol)
+        with self._lock:
+            current = self._entries.get(symbol)
+
+        if source is None:
+            if current is not None:
+                print(f"❌ Model files for {symbol} were removed; unloading.")
+                self._remove(symbol)
+            with self._lock:
+                self._index = self._index - {symbol}
+            raise KeyError(symbol)
+
+        model_format, paths = source
+        if model_format == "mmap":
+            # The manifest is replaced whenever the weights change.
+            version = "mmap:" + _file_version(paths[0] / MANIFEST_FILE)
+        else:
+            version = _file_version(*paths)
+        precision = self.precision_for(symbol)
+        if precision != REFERENCE_PRECISION:
+            # The forecast cache is keyed by version, so quantized and float32 forecasts never mix.
+            version += ":" + precision
+        if current is not None and current.version == version:
+            with self._lock:
+                current.last_checked = time.monotonic()
+                self._entries.move_to_end(symbol)
+                self.hits += 1
+            return current
+
+        if current is None:
+            with self._lock:
+                self.misses += 1
+        else:
+            print(f"Model files for {symbol} changed on disk; reloading.")
+
+        started = time.perf_counter()
+        try:
+            if model_format == "mmap":
+                model, scaler = load_model_artifact(paths[0])
+                size_path = paths[0] / read_manifest(paths[0])["weights_file"]
+            else:
+                model = self._model_loader(paths[0])
+                scaler = self._scaler_loader(paths[1])
+                size_path = paths[0]
+            if precision != REFERENCE_PRECISION:
+                model, report = quantize_model(symbol, model, scaler, precision)
+                with self._lock:
+                    self._quantization_reports[symbol] = report
+                precision = report["active"]
+            if self._warm_up:
+                warm_up_model(model, scaler)
+        except Exception:
+            with self._lock:
+                self.load_failures += 1
+            raise
+        elapsed = time.perf_counter() - started
+
+        entry = ModelEntry(
+            symbol=symbol,
+            model=model,
+            scaler=scaler,
+            version=version,
+            size_bytes=_estimate_model_bytes(model, size_path),
+            load_seconds=elapsed,
+            model_format=model_format,
+            precision=precision,
+        )
+        with self._lock:
+            self.loads += 1
+            self.total_load_seconds += elapsed
+            if current is not None:
+                self.reloads += 1
+            self._entries[symbol] = entry
+            self._entries.move_to_end(symbol)
+            self._index = self._index | {symbol}
+            evicted = self._evict_locked(keep=symbol)
+
+        if current is not None:
+            release_forecast_engine(current.model)
+        for old_entry in evicted:
+            release_forecast_engine(old_entry.model)
+        print(f"✅ Loaded {model_format} {precision} model and scaler for {symbol} in {elapsed:.2f}s.")
+        return entry
+
+    def _evict_locked(self, keep: str) -> List[ModelEntry]:
+        evicted = []
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_models
+            or (self.max_bytes and self._resident_bytes_locked() > self.max_bytes)
+        ):
+            oldest_symbol = next(iter(self._entries))
+            if oldest_symbol == keep:
+                break
+            evicted.append(self._entries.pop(oldest_symbol))
+            self.evictions += 1
+        return evicted
+
+    def _remove(self, symbol: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(symbol, None)
+        if entry is not None:
+            release_forecast_engine(entry.model)
+
+    def _resident_bytes_locked(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    # --- Warm-up and stats ---
+    def prewarm(self, symbols: Optional[List[str]] = None) -> List[str]:
+        """Loads `symbols` (default: the configured hot set) and returns the ones that loaded."""
+        self.refresh_index()
+        if symbols is None:
+            symbols = self.hot_symbols()
+
+        symbols = symbols[: self.max_models]
+        if not symbols:
+            return []
+
+        # Loads are independent per symbol, so run them concurrently.
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(LOAD_WORKERS, len(symbols))), thread_name_prefix="model-loader"
+        ) as pool:
+            outcomes = list(pool.map(self._prewarm_one, symbols))
+        return [symbol for symbol, loaded in zip(symbols, outcomes) if loaded]
+
+    def _prewarm_one(self, symbol: str) -> bool:
+        try:
+            self.get(symbol)
+            return True
+        except KeyError:
+            print(f"❌ Model or scaler for {symbol} not found.")
+        except Exception as e:
+            print(f"ERROR loading {symbol} model: {e}")
+        return False
+
+    def hot_symbols(self) -> List[str]:
+        if HOT_SYMBOLS.strip() == "*":
+            return self.available_symbols()
+        return [s.strip().upper() for s in HOT_SYMBOLS.split(",") if s.strip()]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "resident": list(self._entries),
+                "resident_count": len(self._entries),
+                "resident_bytes": self._resident_bytes_locked(),
+                "max_models": self.max_models,
+                "max_bytes": self.max_bytes,
+                "model_format": self.model_format,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "loads": self.loads,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "load_failures": self.load_failures,
+                "total_load_seconds": round(self.total_load_seconds, 4),
+                "average_load_seconds": (
+                    round(self.total_load_seconds / self.loads, 4) if self.loads else 0.0
+                ),
+                "versions": {symbol: entry.version for symbol, entry in self._entries.items()},
+                "formats": {symbol: entry.model_format for symbol, entry in self._entries.items()},
+                "precisions": {symbol: entry.precision for symbol, entry in self._entries.items()},
+                "load_seconds": {symbol: round(entry.load_seconds, 4) for symbol, entry in self._entries.items()},
+            }
+
+
+# Shared registry used by the routes and background jobs.
+registry = ModelRegistry()
@@ -0,0 +1,186 @@
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # tanh form avoids overflow warnings from np.exp on large negative inputs
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def _hard_sigmoid(x: np.ndarray) -> np.ndarray:
+    return np.clip(x / 6.0 + 0.5, 0.0, 1.0)
+
+
+_ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "linear": lambda x: x,
+}
+
+
+def _activation(name: Optional[str]) -> Callable[[np.ndarray], np.ndarray]:
+    name = name or "linear"
+    if name not in _ACTIVATIONS:
+        raise ValueError(f"Unsupported activation for NumPy backend: {name}")
+    return _ACTIVATIONS[name]
+
+
+class NumpyLSTMLayer:
+    """Keras-compatible LSTM layer (gate order i, f, c, o) evaluated with NumPy."""
+
+    def __init__(
+        self,
+        kernel: np.ndarray,
+        recurrent_kernel: np.ndarray,
+        bias: Optional[np.ndarray],
+        return_sequences: bool = False,
+        activation: str = "tanh",
+        recurrent_activation: str = "sigmoid",
+    ):
+        self.kernel = kernel
+        self.recurrent_kernel = recurrent_kernel
+        self.bias = bias
+        self.units = recurrent_kernel.shape[0]
+        self.return_sequences = return_sequences
+        self.activation = _activation(activation)
+        self.recurrent_activation = _activation(recurrent_activation)
+
+    def __call__(self, inputs: np.ndarray) -> np.ndarray:
+        batch, time_steps, _ = inputs.shape
+        units = self.units
+
+        # Input projections for every timestep in one matmul; only the recurrent
+        # part has to run step by step.
+        projected = inputs @ self.kernel
+        if self.bias is not None:
+            projected += self.bias
+
+        h = np.zeros((batch, units), dtype=projected.dtype)
+        c = np.zeros((batch, units), dtype=projected.dtype)
+        outputs = np.empty((batch, time_steps, units), dtype=projected.dtype) if self.return_sequences else None
+
+        for t in range(time_steps):
+            z = projected[:, t] + h @ self.recurrent_kernel
+            i = self.recurrent_activation(z[:, :units])
+            f = self.recurrent_activation(z[:, units:2 * units])
+            g = self.activation(z[:, 2 * units:3 * units])
+            o = self.recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * self.activation(c)
+            if outputs is not None:
+                outputs[:, t] = h
+
+        return outputs if outputs is not None else h
+
+
+class NumpyDenseLayer:
+    def __init__(self, kernel: np.ndarray, bias: Optional[np.ndarray], activation: str = "linear"):
+        self.kernel = kernel
+        self.bias = bias
+        self.activation = _activation(activation)
+
+    def __call__(self, inputs: np.ndarray) -> np.ndarray:
+        outputs = inputs @ self.kernel
+        if self.bias is not None:
+            outputs = outputs + self.bias
+        return self.activation(outputs)
+
+
+class NumpyLSTMModel:
+    """
+    Sequential LSTM/Dense model executed in NumPy.
+    Exposes the subset of the Keras model API the prediction service uses.
+    """
+
+    def __init__(self, layers: List[Any], input_shape: Tuple[Optional[int], ...], dtype: Any = np.float32):
+        self.layers = layers
+        self.input_shape = input_shape
+        self.dtype = np.dtype(dtype)
+
+    def __call__(self, inputs: Any, training: bool = False) -> np.ndarray:
+        outputs = np.asarray(inputs, dtype=self.dtype)
+        for layer in self.layers:
+            outputs = layer(outputs)
+        return outputs
+
+    def predict(self, inputs: Any, verbose: int = 0, batch_size: Optional[int] = None) -> np.ndarray:
+        return self(inputs)
+
+    @classmethod
+    def from_config(cls, model_config: Dict[str, Any], layer_weights: Dict[str, List[np.ndarray]]) -> "NumpyLSTMModel":
+        """Builds the model from a Keras Sequential config and per-layer weight lists."""
+        if model_config.get("class_name") != "Sequential":
+            raise ValueError(f"NumPy backend only supports Sequential models, got {model_config.get('class_name')}")
+
+        config = model_config["config"]
+        input_shape: Tuple[Optional[int], ...] = tuple(config.get("build_input_shape") or ())
+        layers: List[Any] = []
+
+        for layer in config["layers"]:
+            class_name = layer["class_name"]
+            layer_config = layer["config"]
+
+            if class_name == "InputLayer":
+                shape = layer_config.get("batch_shape") or layer_config.get("batch_input_shape")
+                input_shape = tuple(shape)
+            elif class_name == "LSTM":
+                weights = layer_weights[layer_config["name"]]
+                layers.append(
+                    NumpyLSTMLayer(
+                        kernel=weights[0],
+                        recurrent_kernel=weights[1],
+                        bias=weights[2] if layer_config.get("use_bias", True) else None,
+                        return_sequences=layer_config.get("return_sequences", False),
+                        activation=layer_config.get("activation", "tanh"),
+                        recurrent_activation=layer_config.get("recurrent_activation", "sigmoid"),
+                    )
+                )
+            elif class_name == "Dense":
+                weights = layer_weights[layer_config["name"]]
+                layers.append(
+                    NumpyDenseLayer(
+                        kernel=weights[0],
+                        bias=weights[1] if layer_config.get("use_bias", True) else None,
+                        activation=layer_config.get("activation", "linear"),
+                    )
+                )
+            elif class_name == "Dropout":
+                continue  # no-op at inference time
+            else:
+                raise ValueError(f"Unsupported layer for NumPy backend: {class_name}")
+
+        return cls(layers, input_shape)
+
+    @classmethod
+    def from_h5(cls, model_path: Path) -> "NumpyLSTMModel":
+        """Reads the architecture and weights straight out of a Keras .h5 file."""
+        return cls.from_config(*read_h5_model(model_path))
+
+
+def read_h5_model(model_path: Path) -> Tuple[Dict[str, Any], Dict[str, List[np.ndarray]]]:
+    """Returns (model_config, per-layer weight lists) from a legacy Keras .h5 file."""
+    import h5py
+
+    with h5py.File(model_path, "r") as f:
+        model_config = json.loads(_as_str(f.attrs["model_config"]))
+        weights_root = f["model_weights"] if "model_weights" in f else f
+
+        layer_weights: Dict[str, List[np.ndarray]] = {}
+        for layer_name in weights_root.attrs.get("layer_names", []):
+            layer_name = _as_str(layer_name)
+            group = weights_root[layer_name]
+            layer_weights[layer_name] = [
+                np.asarray(group[_as_str(weight_name)], dtype=np.float32)
+                for weight_name in group.attrs.get("weight_names", [])
+            ]
+
+    return model_config, layer_weights
+
+
+def _as_str(value: Any) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
@@ -1,12 +1,70 @@
+import os
 import numpy as np
-import tensorflow as tf
-import joblib
+from pathlib import Path
 from typing import Any
 
+from app.services.forecast_engine import get_forecast_engine
+from app.utils.metrics import timed
+
 TIME_STEP = 100 # Number of past prices to consider for prediction
 
+# "keras" runs the .h5 models through TensorFlow; "numpy" executes the same weights
+# with the pure-NumPy LSTM in app/services/numpy_lstm.py and never imports TensorFlow.
+INFERENCE_BACKEND = os.getenv("LSTM_INFERENCE_BACKEND", "keras").lower()
+
+
+def load_lstm_model(model_path: Path, backend: str = INFERENCE_BACKEND) -> Any:
+    """
+    Loads an LSTM model from a Keras .h5 file using the configured inference backend.
+    """
+    if backend == "numpy":
+        from app.services.numpy_lstm import NumpyLSTMModel
+
+        return NumpyLSTMModel.from_h5(model_path)
+    if backend == "keras":
+        import tensorflow as tf
+
+        return tf.keras.models.load_model(model_path)
+    raise ValueError(f"Unknown LSTM inference backend: {backend}")
+
+
+def predict_next_day_prices_batch(
+    model_instance: Any,
+    scaler_instance: Any,
+    windows: Any
+) -> np.ndarray:
+    """
+    Predicts the next day's stock price for a batch of price windows in a single model call.
+    `windows` must be array-like with shape (batch, TIME_STEP).
+    """
+    windows_array = np.asarray(windows, dtype=np.float64).reshape(-1, TIME_STEP)
+    # The scaler has a single feature, so the whole batch can be transformed as one column.
+    with timed("scaler_transform"):
+        scaled_input = scaler_instance.transform(windows_array.reshape(-1, 1))
+    scaled_input_reshaped = scaled_input.reshape(-1, TIME_STEP, 1)
+
+    with timed("model_inference"):
+        # Batch sizes vary with every flush of the request batcher; the engine's
+        # compiled step takes any batch size without retracing.
+        engine = get_forecast_engine(model_instance, scaler_instance)
+        scaled_predictions = engine.predict_scaled(scaled_input_reshaped).reshape(-1, 1)
+    with timed("inverse_transform"):
+        predicted_prices_unscaled = scaler_instance.inverse_transform(scaled_predictions)
+    return predicted_prices_unscaled[:, 0]
+
+
+def warm_up_model(model_instance: Any, scaler_instance: Any) -> None:
+    """
+    Runs one dummy inference and traces the forecast graph, so the first real
+    request doesn't pay for graph building.
+    """
+    dummy_window = np.zeros((1, TIME_STEP), dtype=np.float64)
+    predict_next_day_prices_batch(model_instance, scaler_instance, dummy_window)
+    get_forecast_engine(model_instance, scaler_instance).forecast(dummy_window, 1)
+
+
 def predict_next_day_price(
-    model_instance: tf.keras.Model,
+    model_instance: Any,
     scaler_instance: Any,
     past_100_prices: list[float]
 ) -> float:
@@ -14,19 +72,14 @@ def predict_next_day_price(
     Predicts the next day's stock price using the provided LSTM model and scaler.
     Assumes `past_100_prices` contains exactly TIME_STEP (100) prices.
     """
-    input_array = np.array(past_100_prices).reshape(-1, 1)
-    scaled_input = scaler_instance.transform(input_array)
-    scaled_input_reshaped = scaled_input.reshape(1, TIME_STEP, 1) # Uses TIME_STEP here
-
-    scaled_prediction = model_instance.predict(scaled_input_reshaped, verbose=0)[0][0]
-    predicted_price_unscaled = scaler_instance.inverse_transform(
-        np.array([[scaled_prediction]])
-    )[0][0]
-    return float(predicted_price_unscaled)
+    predicted_prices = predict_next_day_prices_batch(
+        model_instance, scaler_instance, [past_100_prices]
+    )
+    return float(predicted_prices[0])
 
 
 def predict_multi_step_prices(
-    model_instance: tf.keras.Model,
+    model_instance: Any,
     scaler_instance: Any,
     initial_prices: list[float],
     forecast_days: int
@@ -37,14 +90,10 @@ def predict_multi_step_prices(
     if len(initial_prices) != TIME_STEP: # Uses TIME_STEP here
         raise ValueError(f"Initial prices must contain exactly {TIME_STEP} entries for multi-step prediction.")
 
-    current_window = list(initial_prices)
-    predicted_future_prices = []
-
-    for _ in range(forecast_days):
-        next_day_prediction = predict_next_day_price(model_instance, scaler_instance, current_window)
-        predicted_future_prices.append(float(next_day_prediction))
-
-        current_window.pop(0)
-        current_window.append(next_day_prediction)
+    # The rollout runs in scaled space as one compiled graph; see ForecastEngine.
+    engine = get_forecast_engine(model_instance, scaler_instance)
+    predicted_future_prices = engine.forecast(
+        np.asarray(initial_prices, dtype=np.float64).reshape(1, TIME_STEP), forecast_days
+    )[0]
 
-    return [float(price) for price in predicted_future_prices]
\ No newline at end of file
+    return [float(price) for price in predicted_future_prices]
@@ -0,0 +1,521 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.services.resilience import CircuitBreaker, SingleFlight, call_with_retries
+from app.utils.metrics import timed
+
+PRICE_STORE_DIR = Path(os.getenv("PRICE_STORE_DIR", "data/price_store"))
+
+# How long stored history is served before the missing tail is fetched again.
+PRICE_REFRESH_SECONDS = float(os.getenv("PRICE_REFRESH_SECONDS", "900"))
+
+# "yfinance" (default) or "http": a JSON price service at PRICE_SOURCE_URL, e.g. a
+# local stand-in (see benchmarks/price_server.py).
+PRICE_SOURCE = os.getenv("PRICE_SOURCE", "yfinance").lower()
+PRICE_SOURCE_URL = os.getenv("PRICE_SOURCE_URL", "http://127.0.0.1:8900")
+UPSTREAM_TIMEOUT_SECONDS = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", "10"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "16"))
+# Threads yfinance may use for one grouped multi-symbol download.
+YFINANCE_DOWNLOAD_THREADS = int(os.getenv("YFINANCE_DOWNLOAD_THREADS", "4"))
+
+# Retry and circuit-breaker policy for upstream fetches.
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "2"))
+UPSTREAM_RETRY_BACKOFF_SECONDS = float(os.getenv("UPSTREAM_RETRY_BACKOFF_SECONDS", "0.5"))
+UPSTREAM_BREAKER_THRESHOLD = int(os.getenv("UPSTREAM_BREAKER_THRESHOLD", "5"))
+UPSTREAM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("UPSTREAM_BREAKER_COOLDOWN_SECONDS", "30"))
+
+Series = Tuple[np.ndarray, np.ndarray]
+
+
+class NoPriceDataError(Exception):
+    """Raised when neither the store nor the data source has prices for a symbol."""
+
+
+class PriceSourceError(Exception):
+    """Raised when the data source fails to answer, as opposed to having no prices."""
+
+
+class PriceSource:
+    """Upstream source of daily closing prices."""
+
+    def fetch(self, symbol: str, start: date, end: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (dates, closes) for trading days in [start, end), sorted ascending.
+        `dates` is datetime64[D] and `closes` is float64; both are empty if there is no data.
+        """
+        raise NotImplementedError
+
+    def fetch_many(
+        self, symbols: Sequence[str], start: date, end: Optional[date] = None
+    ) -> Dict[str, Union[Series, Exception]]:
+        """
+        Fetches several symbols over the same range; sources that can group the request
+        override this. A symbol the source failed for maps to its exception, while a
+        failure of the whole request raises.
+        """
+        return {symbol: self.fetch(symbol, start, end) for symbol in symbols}
+
+
+class YFinanceSource(PriceSource):
+    """
+    Yahoo Finance through yfinance. All downloads share one pooled HTTP session, and
+    fetch_many issues a single grouped download for all symbols.
+    """
+
+    def __init__(self, timeout_seconds: float = UPSTREAM_TIMEOUT_SECONDS, threads: int = YFINANCE_DOWNLOAD_THREADS):
+        self.timeout_seconds = timeout_seconds
+        self.threads = threads
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def _shared_session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    from curl_cffi import requests as curl_requests
+
+                    self._session = curl_requests.Session(impersonate="chrome")
+        return self._session
+
+    def _download(self, symbols: Union[str, List[str]], start: date, end: Optional[date]):
+        import yfinance as yf
+
+        with timed("yfinance_fetch"):
+            return yf.download(
+                symbols,
+                start=start,
+                end=end,
+                interval="1d",
+                progress=False,
+                session=self._shared_session(),
+                timeout=self.timeout_seconds,
+                threads=self.threads,
+            )
+
+    def fetch(self, symbol: str, start: date, end: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+        return _closes_from_frame(self._download(symbol, start, end), symbol)
+
+    def fetch_many(
+        self, symbols: Sequence[str], start: date, end: Optional[date] = None
+    ) -> Dict[str, Union[Series, Exception]]:
+        if len(symbols) == 1:
+            return {symbols[0]: self.fetch(symbols[0], start, end)}
+        data = self._download(list(symbols), start, end)
+        series: Dict[str, Union[Series, Exception]] = {}
+        for symbol in symbols:
+            try:
+                series[symbol] = _closes_from_frame(data, symbol)
+            except PriceSourceError as e:
+                series[symbol] = e
+        if all(isinstance(result, Exception) for result in series.values()):
+            # Nothing came back at all: a failed download, which retries and the breaker should see.
+            raise PriceSourceError(f"yfinance returned no prices for {', '.join(symbols)}.")
+        return series
+
+
+def _closes_from_frame(data, symbol: str) -> Series:
+    import pandas as pd
+
+    close_series = None
+
+    if isinstance(data.columns, pd.MultiIndex):
+        # yfinance labels columns with the upper-cased ticker.
+        for column in (("Close", symbol), ("Close", symbol.upper()), ("Adj Close", symbol), ("Adj Close", symbol.upper())):
+            if column in data.columns:
+                close_series = data[column]
+                break
+    elif "Close" in data.columns:
+        close_series = data["Close"]
+
+    # yf.download logs per-symbol failures and returns an empty frame or an all-NaN
+    # column instead of raising, so no prices is treated as a failed download. A tail
+    # refresh starts at the last stored bar, so a healthy answer is never empty.
+    if close_series is None:
+        raise PriceSourceError(f"yfinance returned no closing prices for {symbol}.")
+    close_series = pd.to_numeric(close_series, errors="coerce").dropna()
+    if close_series.empty:
+        raise PriceSourceError(f"yfinance returned no closing prices for {symbol}.")
+    dates = np.asarray(close_series.index.strftime("%Y-%m-%d"), dtype="datetime64[D]")
+    return dates, close_series.to_numpy(dtype=np.float64)
+
+
+class HttpJsonPriceSource(PriceSource):
+    """
+    Price service speaking JSON over HTTP through one pooled keep-alive client:
+    GET {base_url}/prices?symbols=A,B&start=YYYY-MM-DD[&end=YYYY-MM-DD] returns
+    {"A": {"dates": [...], "closes": [...]}, ...}.
+    """
+
+    def __init__(
+        self,
+        base_url: str = PRICE_SOURCE_URL,
+        timeout_seconds: float = UPSTREAM_TIMEOUT_SECONDS,
+        max_connections: int = UPSTREAM_MAX_CONNECTIONS,
+    ):
+        import httpx
+
+        self.base_url = base_url
+        self._client = httpx.Client(
+            base_url=base_url,
+            timeout=timeout_seconds,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def fetch(self, symbol: str, start: date, end: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+        return self.fetch_many([symbol], start, end)[symbol]
+
+    def fetch_many(self, symbols: Sequence[str], start: date, end: Optional[date] = None) -> Dict[str, Series]:
+        params = {"symbols": ",".join(symbols), "start": start.isoformat()}
+        if end is not None:
+            params["end"] = end.isoformat()
+        with timed("upstream_fetch"):
+            response = self._client.get("/prices", params=params)
+        response.raise_for_status()
+        payload = response.json()
+
+        series = {}
+        for symbol in symbols:
+            item = payload.get(symbol)
+            if not item:
+                series[symbol] = _empty_series()
+                continue
+            series[symbol] = (
+                np.asarray(item["dates"], dtype="datetime64[D]"),
+                np.asarray(item["closes"], dtype=np.float64),
+            )
+        return series
+
+
+class ResilientPriceSource(PriceSource):
+    """
+    Wraps another source with in-flight coalescing of identical fetches, retries
+    with backoff, and a circuit breaker that fails fast while the upstream is down.
+    """
+
+    def __init__(
+        self,
+        inner: PriceSource,
+        retries: int = UPSTREAM_RETRIES,
+        backoff_seconds: float = UPSTREAM_RETRY_BACKOFF_SECONDS,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.inner = inner
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.breaker = breaker or CircuitBreaker(
+            type(inner).__name__, UPSTREAM_BREAKER_THRESHOLD, UPSTREAM_BREAKER_COOLDOWN_SECONDS
+        )
+        self._single_flight = SingleFlight()
+
+    def _call(self, fn: Callable[[], Dict[str, Union[Series, Exception]]]) -> Dict[str, Union[Series, Exception]]:
+        return call_with_retries(fn, self.breaker, self.retries, self.backoff_seconds)
+
+    def fetch(self, symbol: str, start: date, end: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+        result = self.fetch_many([symbol], start, end)[symbol]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def fetch_many(
+        self, symbols: Sequence[str], start: date, end: Optional[date] = None
+    ) -> Dict[str, Union[Series, Exception]]:
+        key = (tuple(sorted(symbols)), start, end)
+        return self._single_flight.do(key, lambda: self._call(lambda: self.inner.fetch_many(list(key[0]), start, end)))
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "source": type(self.inner).__name__,
+            "breaker": self.breaker.stats(),
+            "coalescing": self._single_flight.stats(),
+        }
+
+
+def default_price_source() -> PriceSource:
+    if PRICE_SOURCE == "http":
+        return ResilientPriceSource(HttpJsonPriceSource())
+    if PRICE_SOURCE == "yfinance":
+        return ResilientPriceSource(YFinanceSource())
+    raise ValueError(f"Unknown price source: {PRICE_SOURCE}")
+
+
+def normalize_symbol(symbol: str) -> str:
+    return symbol.strip().upper()
+
+
+def _empty_series() -> Tuple[np.ndarray, np.ndarray]:
+    return np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=np.float64)
+
+
+def _merge(
+    old_dates: np.ndarray, old_closes: np.ndarray, new_dates: np.ndarray, new_closes: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    dates = np.concatenate([old_dates, new_dates])
+    closes = np.concatenate([old_closes, new_closes])
+    # Stable sort keeps old rows before new ones on the same date; keeping the last
+    # row of each run lets freshly fetched bars (e.g. today's close) win.
+    order = np.argsort(dates, kind="stable")
+    dates, closes = dates[order], closes[order]
+    keep = np.ones(len(dates), dtype=bool)
+    keep[:-1] = dates[1:] != dates[:-1]
+    return dates[keep], closes[keep]
+
+
+@dataclass
+class StoredSeries:
+    dates: np.ndarray
+    closes: np.ndarray
+    covered_from: date
+    refreshed_at: float
+
+
+class PriceStore:
+    """
+    On-disk per-symbol store of daily closes.
+
+    Each symbol is a directory holding dates.npy (datetime64[D]), close.npy (float64)
+    and meta.json. Arrays are opened memory-mapped, and only the tail after the last
+    stored date is fetched from the source once the data is older than
+    `refresh_seconds`. Symbols are case-insensitive: "reliance.ns" and "RELIANCE.NS"
+    share one entry.
+    """
+
+    def __init__(
+        self,
+        root: Path = PRICE_STORE_DIR,
+        source: Optional[PriceSource] = None,
+        refresh_seconds: float = PRICE_REFRESH_SECONDS,
+    ):
+        self.root = Path(root)
+        self.source = source or default_price_source()
+        self.refresh_seconds = refresh_seconds
+        self._series: Dict[str, StoredSeries] = {}
+        self._lock = threading.Lock()
+        self._symbol_locks: Dict[str, threading.Lock] = {}
+
+    def get_history(
+        self, symbol: str, lookback_days: int, refresh_seconds: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the last `lookback_days` trading days as (dates, closes).
+        `refresh_seconds` overrides the store's staleness limit for this call.
+        Raises NoPriceDataError if no prices are available for `symbol`.
+        """
+        symbol = normalize_symbol(symbol)
+        # Extend lookback to ensure we get enough trading days (account for weekends/holidays)
+        requested_start = date.today() - timedelta(days=lookback_days * 2)
+
+        with self._symbol_lock(symbol):
+            series = self._series.get(symbol) or self._read(symbol)
+            series = self._refresh(
+                symbol,
+                series,
+                requested_start,
+                self.refresh_seconds if refresh_seconds is None else refresh_seconds,
+            )
+
+        if series is None or len(series.closes) == 0:
+            raise NoPriceDataError(f"No historical data found for {symbol}.")
+        return series.dates[-lookback_days:], series.closes[-lookback_days:]
+
+    def stored_history(self, symbol: str, lookback_days: int) -> Optional[Series]:
+        """The last `lookback_days` stored closes for `symbol`, without contacting the source; None if nothing is stored."""
+        symbol = normalize_symbol(symbol)
+        with self._symbol_lock(symbol):
+            series = self._series.get(symbol) or self._read(symbol)
+        if series is None or len(series.closes) == 0:
+            return None
+        return series.dates[-lookback_days:], series.closes[-lookback_days:]
+
+    def get_histories(
+        self, symbols: Sequence[str], lookback_days: int, refresh_seconds: Optional[float] = None
+    ) -> Dict[str, Union[Series, Exception]]:
+        """
+        Multi-symbol get_history. The upstream fetches of all symbols are grouped by
+        date range, so symbols needing the same range cost one source.fetch_many call.
+        Each symbol, as given, maps to (dates, closes) or to the exception that symbol raised.
+        """
+        requested_start = date.today() - timedelta(days=lookback_days * 2)
+        if refresh_seconds is None:
+            refresh_seconds = self.refresh_seconds
+        requested = list(symbols)
+        symbols = sorted({normalize_symbol(symbol) for symbol in requested})
+        results: Dict[str, Union[Series, Exception]] = {}
+
+        with ExitStack() as stack:
+            # Sorted acquisition order, so concurrent multi-symbol calls can't deadlock.
+            for symbol in symbols:
+                stack.enter_context(self._symbol_lock(symbol))
+
+            now = time.time()
+            stored = {symbol: self._series.get(symbol) or self._read(symbol) for symbol in symbols}
+            groups: Dict[Tuple[date, Optional[date]], List[str]] = {}
+            for symbol in symbols:
+                for span in self._planned_fetches(stored[symbol], requested_start, refresh_seconds, now):
+                    groups.setdefault(span, []).append(symbol)
+
+            fetched: Dict[Tuple[str, date, Optional[date]], Union[Series, Exception]] = {}
+            for (start, end), group in groups.items():
+                try:
+                    batch = self.source.fetch_many(group, start, end)
+                except Exception as e:
+                    batch = {symbol: e for symbol in group}
+                for symbol in group:
+                    fetched[(symbol, start, end)] = batch.get(symbol, _empty_series())
+
+            def prefetched(symbol: str, start: date, end: Optional[date] = None) -> Series:
+                result = fetched.get((symbol, start, end))
+                if result is None:
+                    return self.source.fetch(symbol, start, end)
+                if isinstance(result, Exception):
+                    raise result
+                return result
+
+            for symbol in symbols:
+                try:
+                    series = self._refresh(symbol, stored[symbol], requested_start, refresh_seconds, prefetched, now)
+                except Exception as e:
+                    results[symbol] = e
+                    continue
+                if series is None or len(series.closes) == 0:
+                    results[symbol] = NoPriceDataError(f"No historical data found for {symbol}.")
+                else:
+                    results[symbol] = (series.dates[-lookback_days:], series.closes[-lookback_days:])
+
+        return {symbol: results[normalize_symbol(symbol)] for symbol in requested}
+
+    def _planned_fetches(
+        self, series: Optional[StoredSeries], requested_start: date, refresh_seconds: float, now: float
+    ) -> List[Tuple[date, Optional[date]]]:
+        """The (start, end) ranges _refresh will fetch for `series`; keep the two in sync."""
+        if series is None or len(series.dates) == 0:
+            return [(requested_start, None)]
+        spans = []
+        if requested_start < series.covered_from:
+            spans.append((requested_start, series.covered_from))
+        if now - series.refreshed_at >= refresh_seconds:
+            spans.append((series.dates[-1].astype(object), None))
+        return spans
+
+    def _refresh(
+        self,
+        symbol: str,
+        series: Optional[StoredSeries],
+        requested_start: date,
+        refresh_seconds: float,
+        fetch: Optional[Callable[..., Series]] = None,
+        now: Optional[float] = None,
+    ) -> Optional[StoredSeries]:
+        fetch = fetch or self.source.fetch
+        now = time.time() if now is None else now
+
+        if series is None or len(series.dates) == 0:
+            dates, closes = fetch(symbol, requested_start)
+            if len(dates) == 0:
+                return None
+            series = StoredSeries(dates, closes, requested_start, now)
+            self._write(symbol, series)
+            return series
+
+        dates, closes = series.dates, series.closes
+        covered_from, changed = series.covered_from, False
+
+        # Backfill the head if this request looks further back than anything stored.
+        if requested_start < covered_from:
+            try:
+                head_dates, head_closes = fetch(symbol, requested_start, covered_from)
+            except Exception as e:
+                # E.g. a range before the symbol was listed; the stored prices still serve.
+                print(f"Price backfill for {symbol} failed, serving stored data: {e}")
+            else:
+                dates, closes = _merge(dates, closes, head_dates, head_closes)
+                covered_from, changed = requested_start, True
+
+        refreshed_at = series.refreshed_at
+        if now - refreshed_at >= refresh_seconds:
+            # Refetch from the last stored date so a partial bar for that day is updated too.
+            last_date = dates[-1].astype(object)
+            try:
+                tail_dates, tail_closes = fetch(symbol, last_date)
+            except Exception as e:
+                print(f"Price refresh for {symbol} failed, serving stored data: {e}")
+            else:
+                dates, closes = _merge(dates, closes, tail_dates, tail_closes)
+                refreshed_at, changed = now, True
+
+        if not changed:
+            return series
+
+        series = StoredSeries(dates, closes, covered_from, refreshed_at)
+        self._write(symbol, series)
+        return series
+
+    # --- Disk layout ---
+    def _symbol_dir(self, symbol: str) -> Path:
+        name = re.sub(r"[^A-Za-z0-9.\-_^=]", "_", symbol)
+        if not name.strip("."):
+            name = name.replace(".", "_")  # never "." or ".."
+        return self.root / name
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._lock:
+            return self._symbol_locks.setdefault(symbol, threading.Lock())
+
+    def _read(self, symbol: str) -> Optional[StoredSeries]:
+        symbol_dir = self._symbol_dir(symbol)
+        meta_path = symbol_dir / "meta.json"
+        if not meta_path.exists():
+            return None
+
+        try:
+            meta = json.loads(meta_path.read_text())
+            series = StoredSeries(
+                dates=np.load(symbol_dir / "dates.npy", mmap_mode="r"),
+                closes=np.load(symbol_dir / "close.npy", mmap_mode="r"),
+                covered_from=date.fromisoformat(meta["covered_from"]),
+                refreshed_at=float(meta["refreshed_at"]),
+            )
+            if len(series.dates) != len(series.closes):
+                # Interrupted between the two swaps in _write.
+                raise ValueError("dates.npy and close.npy differ in length")
+        except Exception as e:
+            print(f"Ignoring unreadable price store entry for {symbol}: {e}")
+            return None
+
+        self._series[symbol] = series
+        return series
+
+    def _write(self, symbol: str, series: StoredSeries) -> None:
+        self._series[symbol] = series
+        symbol_dir = self._symbol_dir(symbol)
+        try:
+            symbol_dir.mkdir(parents=True, exist_ok=True)
+            # Write every temporary file before swapping any in, so a failed write
+            # leaves the previous files untouched and readers never see a partial file.
+            arrays = (("dates.npy", series.dates), ("close.npy", series.closes))
+            for name, array in arrays:
+                with open(symbol_dir / f".{name}.tmp", "wb") as f:
+                    np.save(f, np.ascontiguousarray(array))
+            for name, _ in arrays:
+                os.replace(symbol_dir / f".{name}.tmp", symbol_dir / name)
+
+            meta = {"covered_from": series.covered_from.isoformat(), "refreshed_at": series.refreshed_at}
+            tmp_meta = symbol_dir / ".meta.json.tmp"
+            tmp_meta.write_text(json.dumps(meta))
+            os.replace(tmp_meta, symbol_dir / "meta.json")
+        except OSError as e:
+            # The in-memory copy still serves requests; only persistence is lost.
+            print(f"Could not persist price history for {symbol}: {e}")
+
+
+# Shared store used by the routes.
+price_store = PriceStore()
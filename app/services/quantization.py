@@ -0,0 +1,197 @@
+"""
+Reduced-precision inference for the Keras LSTM models.
+
+A model can be converted at load time to TensorFlow Lite with either float16
+weights ("float16") or int8 dynamic-range quantization ("int8": int8 weights,
+activations quantized on the fly). The precision is chosen per symbol with
+LSTM_QUANTIZED_SYMBOLS, e.g. "RELIANCE.NS=int8,TCS.NS=float16" or "*=int8".
+
+Every converted model is validated before it is used. Its forecasts are compared
+with the float32 model's on recent windows: the latest stored price history
+when there is enough (which may overlap the training data; this measures
+agreement with float32, not forecast accuracy), otherwise synthetic random
+walks inside the scaler's fitted range. A model whose mean relative deviation
+exceeds the threshold is not activated, and the float32 model keeps serving.
+"""
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.services.forecast_engine import ForecastEngine
+from app.services.prediction_service import TIME_STEP
+from app.services.price_store import price_store
+
+PRECISIONS = ("float32", "float16", "int8")
+REFERENCE_PRECISION = "float32"
+
+# Mean relative deviation from the float32 model's forecasts above which a
+# quantized model is refused, e.g. 0.005 = 0.5%.
+QUANTIZATION_ERROR_THRESHOLD = float(os.getenv("LSTM_QUANTIZATION_ERROR_THRESHOLD", "0.005"))
+QUANTIZATION_VALIDATION_WINDOWS = int(os.getenv("LSTM_QUANTIZATION_VALIDATION_WINDOWS", "64"))
+# Validation compares whole rollouts, since errors compound over the horizon.
+QUANTIZATION_VALIDATION_HORIZON = int(os.getenv("LSTM_QUANTIZATION_VALIDATION_HORIZON", "10"))
+QUANTIZATION_NUM_THREADS = int(os.getenv("LSTM_QUANTIZATION_NUM_THREADS", "0")) or None
+
+
+def parse_precisions(value: str) -> Dict[str, str]:
+    """
+    Parses "SYM=precision,..." into a symbol -> precision map. "*" matches every
+    symbol, and a bare symbol means int8.
+    """
+    precisions = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        symbol, _, precision = item.partition("=")
+        precision = precision.strip().lower() or "int8"
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown LSTM precision '{precision}' for {symbol.strip()}; use one of {PRECISIONS}.")
+        precisions[symbol.strip().upper()] = precision
+    return precisions
+
+
+QUANTIZED_SYMBOLS = parse_precisions(os.getenv("LSTM_QUANTIZED_SYMBOLS", ""))
+
+
+class TFLiteModel:
+    """
+    A converted model behind the subset of the Keras model API the prediction
+    service uses. One interpreter per model; calls are serialized because
+    interpreters are not thread-safe.
+    """
+
+    def __init__(self, model_content: bytes, input_shape: Tuple[Optional[int], ...], precision: str):
+        import tensorflow as tf
+
+        self.input_shape = input_shape
+        self.precision = precision
+        self.size_bytes = len(model_content)
+        self._interpreter = tf.lite.Interpreter(model_content=model_content, num_threads=QUANTIZATION_NUM_THREADS)
+        self._input_index = self._interpreter.get_input_details()[0]["index"]
+        self._output_index = self._interpreter.get_output_details()[0]["index"]
+        self._input_shape: Optional[Tuple[int, ...]] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, inputs: Any, training: bool = False) -> np.ndarray:
+        return self.predict(inputs)
+
+    def predict(self, inputs: Any, verbose: int = 0, batch_size: Optional[int] = None) -> np.ndarray:
+        inputs = np.ascontiguousarray(inputs, dtype=np.float32)
+        with self._lock:
+            if inputs.shape != self._input_shape:
+                # Resizing reallocates tensors, so it only happens when the batch size changes.
+                self._interpreter.resize_tensor_input(self._input_index, inputs.shape)
+                self._interpreter.allocate_tensors()
+                self._input_shape = inputs.shape
+            self._interpreter.set_tensor(self._input_index, inputs)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output_index).copy()
+
+
+def convert_model(model: Any, precision: str) -> TFLiteModel:
+    """Converts a Keras model to TensorFlow Lite at `precision` ("float16" or "int8")."""
+    import tensorflow as tf
+
+    if precision not in ("float16", "int8"):
+        raise ValueError(f"Cannot quantize to {precision}.")
+
+    with tempfile.TemporaryDirectory(prefix="lstm-tflite-") as export_dir:
+        # from_keras_model aborts the process on Keras 3 LSTMs ("Failed to infer
+        # result type(s)"), so the model goes through a SavedModel export instead.
+        model.export(export_dir, verbose=False)
+        converter = tf.lite.TFLiteConverter.from_saved_model(export_dir)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if precision == "float16":
+            converter.target_spec.supported_types = [tf.float16]
+        # The LSTM loops' TensorList ops have no builtin lowering for a dynamic
+        # batch size, so they run as select TF ops.
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+        converter._experimental_lower_tensor_list_ops = False
+        model_content = converter.convert()
+    return TFLiteModel(model_content, tuple(model.input_shape), precision)
+
+
+def validation_windows(
+    symbol: str, engine: ForecastEngine, count: int = QUANTIZATION_VALIDATION_WINDOWS, seed: int = 0
+) -> Tuple[np.ndarray, str]:
+    """
+    Returns (windows, source): up to `count` TIME_STEP windows from the latest prices
+    already in the local price store, or synthetic random walks within the scaler's
+    fitted range when too little history is stored.
+    """
+    # Only the local store is read: this runs inside a model load, under its load lock.
+    stored = price_store.stored_history(symbol, TIME_STEP + count)
+    if stored is not None and len(stored[1]) >= TIME_STEP + count // 2:
+        closes = np.asarray(stored[1], dtype=np.float64)
+        starts = range(len(closes) - TIME_STEP, -1, -1)
+        return np.stack([closes[start:start + TIME_STEP] for start in starts][:count]), "price_history"
+
+    rng = np.random.default_rng(seed)
+    # Random walks in scaled space, kept inside the [0, 1] range the scaler was fitted to.
+    starts = rng.uniform(0.1, 0.9, size=(count, 1))
+    steps = rng.normal(0.0, 0.01, size=(count, TIME_STEP))
+    scaled = np.clip(starts + np.cumsum(steps, axis=1), 0.0, 1.0)
+    return engine.to_prices(scaled), "synthetic"
+
+
+def validate_quantized(
+    symbol: str,
+    reference: Any,
+    candidate: Any,
+    scaler: Any,
+    horizon: int = QUANTIZATION_VALIDATION_HORIZON,
+    threshold: float = QUANTIZATION_ERROR_THRESHOLD,
+) -> Dict[str, Any]:
+    """Compares `candidate` forecasts with the `reference` model's on `validation_windows`."""
+    # Throwaway engines, so validation leaves nothing behind in the shared engine cache.
+    reference_engine = ForecastEngine(reference, scaler)
+    windows, source = validation_windows(symbol, reference_engine)
+    expected = reference_engine.forecast(windows, horizon)
+    actual = ForecastEngine(candidate, scaler).forecast(windows, horizon)
+
+    relative_error = np.abs(actual - expected) / np.maximum(np.abs(expected), 1e-9)
+    mean_error = float(relative_error.mean())
+    return {
+        "validation_data": source,
+        "windows": len(windows),
+        "horizon": horizon,
+        "mean_relative_error": round(mean_error, 6),
+        "max_relative_error": round(float(relative_error.max()), 6),
+        "threshold": threshold,
+        "passed": mean_error <= threshold,
+    }
+
+
+def quantize_model(symbol: str, model: Any, scaler: Any, precision: str) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Returns (model to serve, report). The quantized model is served only if it
+    converted and passed validation; otherwise the float32 `model` is returned.
+    """
+    report: Dict[str, Any] = {"requested": precision, "active": REFERENCE_PRECISION, "checked_at": time.time()}
+    if not type(model).__module__.startswith(("keras", "tensorflow")):
+        report["error"] = "Quantized inference needs a Keras model (LSTM_INFERENCE_BACKEND=keras, h5 format)."
+        return model, report
+
+    started = time.perf_counter()
+    try:
+        candidate = convert_model(model, precision)
+        report.update(validate_quantized(symbol, model, candidate, scaler))
+    except Exception as e:
+        report["error"] = f"Quantization failed: {e}"
+        print(f"❌ Could not quantize {symbol} to {precision}: {e}")
+        return model, report
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["size_bytes"] = candidate.size_bytes
+
+    if not report["passed"]:
+        print(
+            f"❌ Refusing {precision} model for {symbol}: mean relative error "
+            f"{report['mean_relative_error']:.4%} exceeds {report['threshold']:.4%}."
+        )
+        return model, report
+    report["active"] = precision
+    return candidate, report
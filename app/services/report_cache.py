@@ -0,0 +1,152 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Reports younger than the TTL are served as-is. For another STALE seconds the old
+# report is still served, while a single background run refreshes it.
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "900"))
+REPORT_CACHE_STALE_SECONDS = float(os.getenv("REPORT_CACHE_STALE_SECONDS", "3600"))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "256"))
+
+ReportLoader = Callable[[str], Awaitable[str]]
+
+
+def normalize_stock_name(stock_name: str) -> str:
+    return " ".join(stock_name.split()).upper()
+
+
+@dataclass
+class CachedReport:
+    content: str
+    created_at: float
+    generation_seconds: float
+
+
+class ReportCache:
+    """
+    TTL cache in front of the agent report pipeline.
+
+    Keys are normalized stock names. Concurrent misses for the same key share one
+    `loader` run, and stale entries are refreshed in the background while the old
+    report keeps being served.
+    """
+
+    def __init__(
+        self,
+        loader: ReportLoader,
+        ttl_seconds: float = REPORT_CACHE_TTL_SECONDS,
+        stale_seconds: float = REPORT_CACHE_STALE_SECONDS,
+        max_entries: int = REPORT_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        self._entries: "OrderedDict[str, CachedReport]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refresh_failures = 0
+        self.saved_seconds = 0.0
+        self.generation_seconds_total = 0.0
+        self.generations = 0
+
+    async def get(self, stock_name: str) -> str:
+        key = normalize_stock_name(stock_name)
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            age = self._clock() - entry.created_at
+            if age < self.ttl_seconds:
+                self.hits += 1
+                self.saved_seconds += entry.generation_seconds
+                self._entries.move_to_end(key)
+                return entry.content
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.stale_hits += 1
+                self.saved_seconds += entry.generation_seconds
+                self._entries.move_to_end(key)
+                self._refresh_in_background(key, stock_name)
+                return entry.content
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            started = self._clock()
+            content = await asyncio.shield(task)
+            # The caller only waited for the remainder of the shared run.
+            self.saved_seconds += max(0.0, self._average_generation_seconds() - (self._clock() - started))
+            return content
+
+        self.misses += 1
+        return await asyncio.shield(self._start_load(key, stock_name))
+
+    def peek(self, stock_name: str) -> Optional[str]:
+        """Returns a fresh cached report without triggering a load."""
+        entry = self._entries.get(normalize_stock_name(stock_name))
+        if entry is None or self._clock() - entry.created_at >= self.ttl_seconds:
+            return None
+        self.hits += 1
+        self.saved_seconds += entry.generation_seconds
+        return entry.content
+
+    def _start_load(self, key: str, stock_name: str) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(self._load(key, stock_name))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda t: self._in_flight.pop(key, None))
+        return task
+
+    async def _load(self, key: str, stock_name: str) -> str:
+        started = self._clock()
+        content = await self._loader(stock_name)
+        self.put(key, content, generation_seconds=self._clock() - started)
+        return content
+
+    def _refresh_in_background(self, key: str, stock_name: str) -> None:
+        if key in self._in_flight:
+            return
+        task = self._start_load(key, stock_name)
+        task.add_done_callback(self._log_refresh_failure)
+
+    def _log_refresh_failure(self, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is None:
+            return
+        self.refresh_failures += 1
+        print(f"Background report refresh failed: {task.exception()}")
+
+    def put(self, stock_name: str, content: str, generation_seconds: float = 0.0) -> None:
+        key = normalize_stock_name(stock_name)
+        self._entries[key] = CachedReport(content, self._clock(), generation_seconds)
+        self._entries.move_to_end(key)
+        if generation_seconds > 0:
+            self.generations += 1
+            self.generation_seconds_total += generation_seconds
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _average_generation_seconds(self) -> float:
+        return self.generation_seconds_total / self.generations if self.generations else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        served_from_cache = self.hits + self.stale_hits + self.coalesced
+        lookups = served_from_cache + self.misses
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_ratio": served_from_cache / lookups if lookups else 0.0,
+            "refresh_failures": self.refresh_failures,
+            "average_generation_seconds": round(self._average_generation_seconds(), 3),
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
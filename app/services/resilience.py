@@ -0,0 +1,157 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"Upstream '{name}' is unavailable; retry in {retry_after}s.")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the circuit opens, and calls fail
+    fast with CircuitOpenError for `cooldown_seconds`. After that one trial call is
+    let through (half-open). Success closes the circuit; failure reopens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        cooldown_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at < self.cooldown_seconds:
+            return "open"
+        return "half_open"
+
+    def before_call(self) -> None:
+        with self._lock:
+            state = self._state_locked()
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+            remaining = self.cooldown_seconds - (self._clock() - self._opened_at)
+            raise CircuitOpenError(self.name, max(1, int(remaining + 0.999)))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            tripped = self._opened_at is None and self._consecutive_failures >= self.failure_threshold
+            if tripped or self._trial_in_flight:
+                self.opened += 1
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._state_locked(),
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "cooldown_seconds": self.cooldown_seconds,
+                "times_opened": self.opened,
+                "rejected_calls": self.rejected,
+            }
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers for the same key share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+        return future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"in_flight": len(self._in_flight), "calls": self.calls, "coalesced": self.coalesced}
+
+
+def call_with_retries(
+    fn: Callable[[], T],
+    breaker: CircuitBreaker,
+    retries: int = 2,
+    backoff_seconds: float = 0.5,
+) -> T:
+    """
+    Calls `fn` through `breaker`, retrying failures with jittered exponential backoff.
+    An open circuit stops the retries at once, so slow or failing upstreams don't tie
+    up worker threads.
+    """
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = fn()
+        except Exception:
+            breaker.record_failure()
+            if attempt >= retries:
+                raise
+            time.sleep(backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.5))
+            attempt += 1
+        else:
+            breaker.record_success()
+            return result
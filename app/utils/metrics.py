@@ -0,0 +1,225 @@
+import contextvars
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.utils.profiler import profile_trigger
+
+# Upper bounds in seconds; wide enough for sub-millisecond scaler calls and
+# minute-long agent reports.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+# Symbols outside the filter's known set share this label, so arbitrary ticker
+# strings in requests can't create unbounded label sets.
+OTHER_SYMBOL_LABEL = "other"
+
+
+@dataclass
+class RequestContext:
+    scope: Dict[str, Any]
+    started: float
+    symbol: str = ""
+    handler_finished: Optional[float] = None
+
+    @property
+    def endpoint(self) -> str:
+        """The matched route template (e.g. /lstm/predict), never the raw request path."""
+        return _route_label(self.scope)
+
+
+# Set per request by MetricsMiddleware; copied into executor threads so stage
+# timings recorded in services carry the endpoint and symbol labels.
+_request_context: contextvars.ContextVar[Optional[RequestContext]] = contextvars.ContextVar(
+    "request_context", default=None
+)
+
+
+class MetricsRegistry:
+    """Histograms keyed by metric name and label set, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, LabelSet], Histogram] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            items = sorted(self._histograms.items())
+            snapshot = [(key, list(h.counts), h.total, h.count, h.buckets) for key, h in items]
+
+        lines: List[str] = []
+        current_name = None
+        for (name, labels), counts, total, count, buckets in snapshot:
+            if name != current_name:
+                current_name = name
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + [float("inf")], counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _route_label(scope: Dict[str, Any]) -> str:
+    # The router stores the matched route in the shared scope once routing has run.
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in labels) + "}"
+
+
+metrics = MetricsRegistry()
+metrics.describe("app_request_duration_seconds", "End-to-end HTTP request latency.")
+metrics.describe("app_stage_duration_seconds", "Latency of individual hot-path stages.")
+
+
+# --- Helpers used by routes and services ---
+def observe_stage(stage: str, seconds: float) -> None:
+    context = _request_context.get()
+    metrics.observe(
+        "app_stage_duration_seconds",
+        seconds,
+        stage=stage,
+        endpoint=context.endpoint if context else "background",
+        symbol=context.symbol if context else "",
+    )
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+_symbol_label_filter: Optional[Callable[[str], bool]] = None
+
+
+def set_symbol_label_filter(is_known: Callable[[str], bool]) -> None:
+    """Sets the predicate deciding which symbols get their own label; the rest are OTHER_SYMBOL_LABEL."""
+    global _symbol_label_filter
+    _symbol_label_filter = is_known
+
+
+def set_symbol_label(symbol: str) -> None:
+    context = _request_context.get()
+    if context is not None:
+        known = _symbol_label_filter is not None and _symbol_label_filter(symbol)
+        context.symbol = symbol if known else OTHER_SYMBOL_LABEL
+
+
+def instrument_endpoint(handler: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wraps an async route handler to record request parsing/validation time (request
+    arrival to handler start). It also marks when the handler returned, so the
+    middleware can time response serialization.
+    """
+
+    @functools.wraps(handler)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        context = _request_context.get()
+        if context is not None:
+            observe_stage("parse_validation", time.perf_counter() - context.started)
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            if context is not None:
+                context.handler_finished = time.perf_counter()
+
+    return wrapper
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency and response serialization time. It
+    also runs the sampling profiler around requests when `profile_trigger` is armed.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = RequestContext(scope=scope, started=time.perf_counter())
+        token = _request_context.set(context)
+        status_code = 500
+        profiler = profile_trigger.profiler_for(scope["path"])
+        if profiler is not None:
+            profiler.start()
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if context.handler_finished is not None:
+                    observe_stage("serialization", time.perf_counter() - context.handler_finished)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            duration = time.perf_counter() - context.started
+            if profiler is not None:
+                profile_trigger.finish(scope["path"], duration, profiler.stop())
+            metrics.observe(
+                "app_request_duration_seconds",
+                duration,
+                endpoint=_route_label(scope),
+                method=scope.get("method", ""),
+                status=str(status_code),
+            )
+            _request_context.reset(token)
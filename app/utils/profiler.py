@@ -0,0 +1,103 @@
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all threads (event loop and executor workers) at a fixed
+    interval and counts them in collapsed-stack form, ready for flamegraph tools.
+    """
+
+    def __init__(self, interval_seconds: float = 0.005, max_depth: int = 64):
+        self.interval_seconds = interval_seconds
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.samples
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        thread_names = {}
+        while not self._stop.wait(self.interval_seconds):
+            if len(thread_names) != threading.active_count():
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(thread_names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+
+class ProfileTrigger:
+    """
+    One-shot, runtime-armed profiling of a single slow request.
+
+    Once armed, requests whose path starts with `path_prefix` are profiled. The
+    first one slower than `min_duration_ms` is kept and the trigger disarms itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.armed = False
+        self.path_prefix = "/"
+        self.min_duration_seconds = 0.0
+        self.interval_seconds = 0.005
+        self.last_profile: Optional[Dict[str, Any]] = None
+
+    def arm(self, path_prefix: str = "/", min_duration_ms: float = 0.0, interval_ms: float = 5.0) -> None:
+        with self._lock:
+            self.armed = True
+            self.path_prefix = path_prefix
+            self.min_duration_seconds = min_duration_ms / 1000
+            self.interval_seconds = max(0.001, interval_ms / 1000)
+
+    def disarm(self) -> None:
+        with self._lock:
+            self.armed = False
+
+    def profiler_for(self, path: str) -> Optional[SamplingProfiler]:
+        if not self.armed or not path.startswith(self.path_prefix):
+            return None
+        return SamplingProfiler(self.interval_seconds)
+
+    def finish(self, path: str, duration_seconds: float, samples: Counter) -> None:
+        with self._lock:
+            if not self.armed or duration_seconds < self.min_duration_seconds:
+                return
+            self.armed = False
+            self.last_profile = {
+                "path": path,
+                "duration_ms": round(duration_seconds * 1000, 2),
+                "captured_at": time.time(),
+                "sample_count": sum(samples.values()),
+                "collapsed_stacks": dict(samples.most_common(200)),
+            }
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "armed": self.armed,
+            "path_prefix": self.path_prefix,
+            "min_duration_ms": self.min_duration_seconds * 1000,
+            "last_profile": self.last_profile,
+        }
+
+
+profile_trigger = ProfileTrigger()
@@ -0,0 +1,44 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class StartupTracker:
+    """Records per-phase startup timings and the readiness of each component."""
+
+    def __init__(self):
+        self._created = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.components: Dict[str, Dict[str, Any]] = {}
+
+    def mark_since_start(self, name: str) -> None:
+        """Records a phase that began when this tracker was created (i.e. process import time)."""
+        self.phases[name] = round(time.perf_counter() - self._created, 4)
+
+    def record_phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = round(seconds, 4)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, time.perf_counter() - started)
+
+    def set_component(self, name: str, state: str, detail: Optional[Any] = None) -> None:
+        self.components[name] = {"state": state, "detail": detail}
+
+    def is_ready(self, required: Tuple[str, ...]) -> bool:
+        return all(self.components.get(name, {}).get("state") == "ready" for name in required)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "components": self.components,
+            "phases_seconds": self.phases,
+            "uptime_seconds": round(time.perf_counter() - self._created, 2),
+        }
+
+
+# Created on first import, which main.py does before anything heavy.
+startup_tracker = StartupTracker()
@@ -0,0 +1,247 @@
+"""
+Content negotiation for price windows and forecasts.
+
+Besides JSON, the LSTM and historical-price endpoints accept and return packed
+little-endian float arrays, which skips per-element JSON parsing, Pydantic list
+validation and float-by-float serialization:
+
+* ``application/octet-stream; dtype=float32|float64`` (default float64): the body
+  is the raw array. In requests the scalar fields (symbol, forecast_days) go in
+  the query string; in responses they are sent as ``X-...`` headers.
+* ``application/msgpack``: a map with the usual field names, where arrays may be
+  ``bin`` values holding the packed floats, with their dtype under ``"dtype"``.
+
+Long multi-step forecasts can also be streamed as ``application/x-ndjson``, one
+JSON object per line as the rollout produces them.
+
+JSON stays the default and keeps the original contract; it is encoded with
+``orjson``. Both ``orjson`` and ``msgpack`` are in requirements.txt; without them
+JSON falls back to the standard library and msgpack requests get 415.
+"""
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+from fastapi import HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
+from pydantic import BaseModel, ValidationError
+
+from app.utils.metrics import timed
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional binary format
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+BINARY_MEDIA_TYPE = "application/octet-stream"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Wire dtypes are always little-endian.
+WIRE_DTYPES = {"float64": np.dtype("<f8"), "float32": np.dtype("<f4")}
+DEFAULT_WIRE_DTYPE = "float64"
+
+
+def _parse_media_type(value: str) -> Tuple[str, Dict[str, str]]:
+    media_type, *raw_params = value.split(";")
+    params = {}
+    for raw_param in raw_params:
+        key, _, param_value = raw_param.partition("=")
+        params[key.strip().lower()] = param_value.strip().strip('"')
+    return media_type.strip().lower(), params
+
+
+def _wire_dtype(params: Dict[str, str]) -> Tuple[str, np.dtype]:
+    name = str(params.get("dtype", DEFAULT_WIRE_DTYPE)).lower()
+    if name not in WIRE_DTYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported dtype '{name}'; use one of {sorted(WIRE_DTYPES)}.",
+        )
+    return name, WIRE_DTYPES[name]
+
+
+def _supported_response_types() -> List[str]:
+    supported = [JSON_MEDIA_TYPE, BINARY_MEDIA_TYPE]
+    if msgpack is not None:
+        supported.extend(MSGPACK_MEDIA_TYPES)
+    return supported
+
+
+def negotiate_response_type(accept: Optional[str], extra_types: Sequence[str] = ()) -> Tuple[str, Dict[str, str]]:
+    """
+    Picks the response media type from an Accept header; JSON unless a binary type is
+    preferred. `extra_types` are further types the calling route can produce.
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE, {}
+    supported = _supported_response_types() + list(extra_types)
+    best: Tuple[float, int, str, Dict[str, str]] = (0.0, 0, JSON_MEDIA_TYPE, {})
+    for position, item in enumerate(accept.split(",")):
+        media_type, params = _parse_media_type(item)
+        try:
+            quality = float(params.pop("q", "1"))
+        except ValueError:
+            quality = 0.0
+        if media_type in ("*/*", "application/*"):
+            media_type = JSON_MEDIA_TYPE
+        if media_type in supported and (quality, -position) > best[:2]:
+            best = (quality, -position, media_type, params)
+    return best[2], best[3]
+
+
+def _validation_error(errors: List[Dict[str, Any]]) -> RequestValidationError:
+    return RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in errors])
+
+
+def _decode_array(data: bytes, dtype: np.dtype, field: str, length: int) -> np.ndarray:
+    if len(data) != length * dtype.itemsize:
+        raise _validation_error([{
+            "type": "value_error",
+            "loc": (field,),
+            "msg": f"Expected {length} {dtype.name} values ({length * dtype.itemsize} bytes), got {len(data)} bytes.",
+            "input": None,
+        }])
+    return np.frombuffer(data, dtype=dtype)
+
+
+def _validate_fields(model_cls: Type[BaseModel], fields: Dict[str, Any], array_field: str, length: int) -> BaseModel:
+    # The array was already checked while decoding; a placeholder of the right
+    # length lets the model check only the scalar fields' constraints.
+    try:
+        return model_cls.model_validate({**fields, array_field: [0.0] * length})
+    except ValidationError as e:
+        raise _validation_error(e.errors(include_url=False))
+
+
+async def read_window_input(
+    request: Request, model_cls: Type[BaseModel], array_field: str, length: int
+) -> Tuple[BaseModel, np.ndarray]:
+    """
+    Parses a request body in any supported format into the validated model and the
+    price window as a NumPy array. For binary formats the model's array field holds
+    a placeholder; use the returned array instead.
+    """
+    media_type, params = _parse_media_type(request.headers.get("content-type", JSON_MEDIA_TYPE))
+    body = await request.body()
+
+    with timed("request_decoding"):
+        if media_type == BINARY_MEDIA_TYPE:
+            window = _decode_array(body, _wire_dtype(params)[1], array_field, length)
+            return _validate_fields(model_cls, dict(request.query_params), array_field, length), window
+
+        if media_type in MSGPACK_MEDIA_TYPES:
+            if msgpack is None:
+                raise HTTPException(
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    detail="msgpack is not installed on this server.",
+                )
+            try:
+                fields = msgpack.unpackb(body, raw=False)
+            except Exception as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid msgpack body: {e}")
+            if not isinstance(fields, dict):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="msgpack body must be a map.")
+            values = fields.pop(array_field, None)
+            if isinstance(values, bytes):
+                dtype = _wire_dtype({"dtype": fields.pop("dtype", DEFAULT_WIRE_DTYPE)})[1]
+                window = _decode_array(values, dtype, array_field, length)
+                return _validate_fields(model_cls, fields, array_field, length), window
+            try:
+                input_data = model_cls.model_validate({**fields, array_field: values})
+            except ValidationError as e:
+                raise _validation_error(e.errors(include_url=False))
+            return input_data, np.asarray(getattr(input_data, array_field), dtype=np.float64)
+
+        if media_type not in (JSON_MEDIA_TYPE, "") and not media_type.endswith("+json"):
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Unsupported Content-Type '{media_type}'.",
+            )
+        try:
+            # Parsed and validated in one pass by pydantic-core.
+            input_data = model_cls.model_validate_json(body)
+        except ValidationError as e:
+            raise _validation_error(e.errors(include_url=False))
+        return input_data, np.asarray(getattr(input_data, array_field), dtype=np.float64)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dump_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_json_default, separators=(",", ":")).encode()
+
+
+def dump_ndjson_line(content: Any) -> bytes:
+    return dump_json(content) + b"\n"
+
+
+class FastJSONResponse(Response):
+    """JSON response that serializes NumPy arrays directly, via orjson when available."""
+
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def _header_name(field: str) -> str:
+    return "X-" + "-".join(part.capitalize() for part in field.split("_"))
+
+
+def encode_array_response(request: Request, content: Dict[str, Any], array_field: str) -> Response:
+    """
+    Encodes `content` in the format the client's Accept header asks for. In binary
+    formats `content[array_field]` becomes packed floats (a scalar becomes a
+    one-element array); the JSON contract is unchanged.
+    """
+    media_type, params = negotiate_response_type(request.headers.get("accept"))
+
+    with timed("response_encoding"):
+        if media_type == JSON_MEDIA_TYPE:
+            return FastJSONResponse(content)
+
+        dtype_name, dtype = _wire_dtype(params)
+        packed = np.ascontiguousarray(np.atleast_1d(content[array_field]), dtype=dtype).tobytes()
+
+        if media_type == BINARY_MEDIA_TYPE:
+            headers = {_header_name(field): str(value) for field, value in content.items() if field != array_field}
+            headers["X-Array-Dtype"] = dtype_name
+            return Response(packed, media_type=f"{BINARY_MEDIA_TYPE}; dtype={dtype_name}", headers=headers)
+
+        fields = {**content, array_field: packed, "dtype": dtype_name}
+        return Response(msgpack.packb(fields, use_bin_type=True), media_type=media_type)
+
+
+def request_body_openapi(model_cls: Type[BaseModel]) -> Dict[str, Any]:
+    """`openapi_extra` documenting the JSON and binary request bodies of a route that parses its own body."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON_MEDIA_TYPE: {"schema": model_cls.model_json_schema()},
+                BINARY_MEDIA_TYPE: {
+                    "schema": {
+                        "type": "string",
+                        "format": "binary",
+                        "description": "Packed little-endian floats (dtype=float32|float64); other fields in the query string.",
+                    }
+                },
+            },
+        }
+    }
@@ -0,0 +1,199 @@
+"""
+Offline load test and micro-benchmarks.
+
+Boots the FastAPI app in-process with the bundled .h5 models, a synthetic price
+source instead of Yahoo Finance and the fake agent backend, then drives the main
+endpoints over an ASGI transport. Run from the repository root:
+
+    python -m benchmarks --requests 500 --concurrency 32 --output bench.json
+    python -m benchmarks --baseline bench.json --tolerance 0.15
+
+With --baseline the exit status is 1 if any metric regressed beyond the tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+# Must be set before the app modules read their configuration at import time.
+os.environ.setdefault("AGENT_BACKEND", "fake")
+os.environ.setdefault("FAKE_AGENT_LATENCY_SECONDS", "0.05")
+os.environ.setdefault("FAKE_AGENT_CHUNK_DELAY_SECONDS", "0")
+os.environ.setdefault("FORECAST_SCHEDULER_ENABLED", "0")
+# A throwaway price store unless one is given; removed when the run ends.
+_price_store_dir = None
+if "PRICE_STORE_DIR" not in os.environ:
+    _price_store_dir = tempfile.TemporaryDirectory(prefix="bench-price-store-")
+    os.environ["PRICE_STORE_DIR"] = _price_store_dir.name
+
+import httpx  # noqa: E402
+
+from app.services.model_registry import registry  # noqa: E402
+from app.services.prediction_service import INFERENCE_BACKEND, TIME_STEP  # noqa: E402
+from app.services.price_store import price_store  # noqa: E402
+from benchmarks.compare import compare_reports  # noqa: E402
+from benchmarks.load_test import BenchRequest, Scenario, run_scenario  # noqa: E402
+from benchmarks.micro import run_micro_benchmarks, run_path_scaling  # noqa: E402
+from benchmarks.stand_ins import SyntheticPriceSource  # noqa: E402
+
+SCENARIOS = ("lstm_predict", "lstm_multi_predict", "historical_prices", "historical_prices_multi", "agent_report")
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+
+def build_scenarios(args: argparse.Namespace, source: SyntheticPriceSource):
+    symbols = args.symbols
+    windows = {symbol: source.window(symbol, TIME_STEP) for symbol in symbols}
+
+    def window_for(i: int):
+        symbol = symbols[i % len(symbols)]
+        window = windows[symbol]
+        if args.unique_windows:
+            # Shift each window slightly so the forecast cache doesn't answer everything.
+            window = window * (1 + (i % 997) * 1e-5)
+        return symbol, [float(price) for price in window]
+
+    def lstm_predict(i: int) -> BenchRequest:
+        symbol, window = window_for(i)
+        return BenchRequest("POST", "/lstm/predict", json={"symbol": symbol, "past_100_prices": window})
+
+    def lstm_multi_predict(i: int) -> BenchRequest:
+        symbol, window = window_for(i)
+        return BenchRequest(
+            "POST",
+            "/lstm/multi-predict",
+            json={"symbol": symbol, "initial_prices": window, "forecast_days": args.forecast_days},
+        )
+
+    def historical_prices(i: int) -> BenchRequest:
+        return BenchRequest(
+            "GET", "/api/historical_prices", params={"symbol": symbols[i % len(symbols)], "lookback_days": 250}
+        )
+
+    def historical_prices_multi(i: int) -> BenchRequest:
+        return BenchRequest("GET", "/api/historical_prices", params={"symbols": ",".join(symbols), "lookback_days": 250})
+
+    def agent_report(i: int) -> BenchRequest:
+        return BenchRequest("POST", "/predict/", json={"stock_name": f"BENCH {i % args.report_names}"})
+
+    factories = {
+        "lstm_predict": lstm_predict,
+        "lstm_multi_predict": lstm_multi_predict,
+        "historical_prices": historical_prices,
+        "historical_prices_multi": historical_prices_multi,
+        "agent_report": agent_report,
+    }
+    return [Scenario(name, factories[name]) for name in args.scenarios]
+
+
+async def run_load_test(args: argparse.Namespace, source: SyntheticPriceSource):
+    from app.main import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for scenario in build_scenarios(args, source):
+                print(f"▶ {scenario.name}: {args.requests} requests at concurrency {args.concurrency}")
+                results[scenario.name] = await run_scenario(
+                    client, scenario, args.requests, args.concurrency, warmup_requests=args.warmup
+                )
+                print(f"  {json.dumps(results[scenario.name])}")
+    return results
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once.")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each scenario.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--symbols", nargs="+", default=None, help="Defaults to every bundled model.")
+    parser.add_argument("--forecast-days", type=int, default=30)
+    parser.add_argument("--report-names", type=int, default=20, help="Distinct stock names for /predict/.")
+    parser.add_argument("--no-unique-windows", dest="unique_windows", action="store_false")
+    parser.add_argument("--micro-repeats", type=int, default=50)
+    parser.add_argument("--micro-horizons", nargs="+", type=int, default=[1, 30, 365])
+    parser.add_argument("--path-counts", nargs="+", type=int, default=[1, 10, 100, 1000])
+    parser.add_argument("--path-horizon", type=int, default=30, help="Horizon of the probabilistic path benchmark.")
+    parser.add_argument("--skip-load-test", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--base-price", type=float, default=1500.0, help="Level of the synthetic prices.")
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--baseline", help="Earlier report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown, e.g. 0.1 = 10%%.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    source = SyntheticPriceSource(base_price=args.base_price)
+    price_store.source = source
+    args.symbols = args.symbols or registry.available_symbols()
+    if not args.symbols:
+        print("No models found; nothing to benchmark.")
+        return 2
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "inference_backend": INFERENCE_BACKEND,
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+    }
+
+    if not args.skip_load_test:
+        report["load_test"] = asyncio.run(run_load_test(args, source))
+
+    if not args.skip_micro:
+        symbol = args.symbols[0]
+        entry = registry.get(symbol)
+        print(f"▶ micro-benchmarks on {symbol}")
+        report["micro"] = run_micro_benchmarks(
+            entry.model, entry.scaler, source.window(symbol, TIME_STEP), args.micro_repeats, args.micro_horizons
+        )
+        print(f"  {json.dumps(report['micro'])}")
+
+        print(f"▶ probabilistic path scaling on {symbol}")
+        report["path_scaling"] = run_path_scaling(
+            entry.model, entry.scaler, source.window(symbol, TIME_STEP), args.path_horizon, args.path_counts
+        )
+        print(f"  {json.dumps(report['path_scaling'])}")
+
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["comparison"] = compare_reports(report, baseline, args.tolerance)
+        for row in report["comparison"]["regressions"]:
+            print(f"❌ {row['section']}/{row['name']} {row['metric']}: {row['baseline']} → {row['current']} ({row['change_pct']:+}%)")
+        if report["comparison"]["regressions"]:
+            exit_code = 1
+        else:
+            print(f"✅ No regressions beyond {args.tolerance:.0%} across {report['comparison']['metrics_compared']} metrics.")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output} (peak RSS {report['peak_rss_mb']} MB).")
+    return exit_code
+
+
+if __name__ == "__main__":
+    try:
+        exit_code = main()
+    finally:
+        if _price_store_dir is not None:
+            _price_store_dir.cleanup()
+    sys.exit(exit_code)
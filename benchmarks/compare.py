@@ -0,0 +1,62 @@
+from typing import Any, Dict, Iterator, List, Tuple
+
+# (section, name, metric, higher_is_better)
+MetricKey = Tuple[str, str, str, bool]
+
+LOAD_TEST_METRICS = (("throughput_rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False))
+MICRO_METRICS = (("median_ms", False), ("p95_ms", False))
+
+
+def _metric_values(report: Dict[str, Any]) -> Iterator[Tuple[MetricKey, float]]:
+    for name, result in report.get("load_test", {}).items():
+        for metric, higher_is_better in LOAD_TEST_METRICS:
+            value = result.get(metric, result.get("latency", {}).get(metric))
+            if value is not None:
+                yield ("load_test", name, metric, higher_is_better), value
+    for name, result in report.get("micro", {}).items():
+        for metric, higher_is_better in MICRO_METRICS:
+            if metric in result:
+                yield ("micro", name, metric, higher_is_better), result[metric]
+    for paths, result in report.get("path_scaling", {}).get("timings", {}).items():
+        yield ("path_scaling", f"paths={paths}", "median_ms", False), result["median_ms"]
+    if "peak_rss_mb" in report:
+        yield ("process", "peak_rss", "peak_rss_mb", False), report["peak_rss_mb"]
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """
+    Compares every metric present in both reports. A metric regresses when it is
+    worse than the baseline by more than `tolerance` (a fraction, e.g. 0.1 = 10%).
+    """
+    baseline_values = dict(_metric_values(baseline))
+    regressions: List[Dict[str, Any]] = []
+    improvements: List[Dict[str, Any]] = []
+    compared = 0
+
+    for key, value in _metric_values(current):
+        base = baseline_values.get(key)
+        if not base:
+            continue
+        compared += 1
+        section, name, metric, higher_is_better = key
+        change = (value - base) / base
+        worse = -change if higher_is_better else change
+        row = {
+            "section": section,
+            "name": name,
+            "metric": metric,
+            "baseline": base,
+            "current": value,
+            "change_pct": round(change * 100, 2),
+        }
+        if worse > tolerance:
+            regressions.append(row)
+        elif worse < -tolerance:
+            improvements.append(row)
+
+    return {
+        "tolerance_pct": round(tolerance * 100, 2),
+        "metrics_compared": compared,
+        "regressions": regressions,
+        "improvements": improvements,
+    }
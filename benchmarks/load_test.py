@@ -0,0 +1,95 @@
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+# Builds the request for the i-th call: (method, url, query params, JSON body)
+RequestFactory = Callable[[int], "BenchRequest"]
+
+
+@dataclass
+class BenchRequest:
+    method: str
+    url: str
+    params: Optional[Dict[str, Any]] = None
+    json: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    build_request: RequestFactory
+
+
+def latency_summary(latencies_seconds: List[float]) -> Dict[str, float]:
+    if not latencies_seconds:
+        return {}
+    latencies_ms = np.asarray(latencies_seconds) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(latencies_ms.mean()), 3),
+        "max_ms": round(float(latencies_ms.max()), 3),
+    }
+
+
+async def _send(client: httpx.AsyncClient, request: BenchRequest) -> int:
+    response = await client.request(request.method, request.url, params=request.params, json=request.json)
+    await response.aread()
+    return response.status_code
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    total_requests: int,
+    concurrency: int,
+    warmup_requests: int = 0,
+) -> Dict[str, Any]:
+    """
+    Sends `total_requests` requests with at most `concurrency` in flight and
+    summarizes throughput and latency. Only 2xx responses count towards latency.
+    """
+    for i in range(warmup_requests):
+        await _send(client, scenario.build_request(-1 - i))
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index
+        while next_index < total_requests:
+            index = next_index
+            next_index += 1
+            request = scenario.build_request(index)
+            started = time.perf_counter()
+            try:
+                status_code = await _send(client, request)
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                continue
+            statuses[str(status_code)] += 1
+            if 200 <= status_code < 300:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "succeeded": len(latencies),
+        "errors": total_requests - len(latencies),
+        "statuses": dict(statuses),
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+        "latency": latency_summary(latencies),
+    }
@@ -0,0 +1,67 @@
+import time
+from typing import Any, Callable, Dict, Iterable
+
+import numpy as np
+
+from app.services.forecast_engine import get_forecast_engine
+from app.services.prediction_service import predict_multi_step_prices, predict_next_day_price
+
+
+def time_calls(fn: Callable[[], Any], repeats: int, warmup: int = 3) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - started
+    timings *= 1000
+    return {
+        "repeats": repeats,
+        "min_ms": round(float(timings.min()), 4),
+        "median_ms": round(float(np.median(timings)), 4),
+        "mean_ms": round(float(timings.mean()), 4),
+        "p95_ms": round(float(np.percentile(timings, 95)), 4),
+    }
+
+
+def run_micro_benchmarks(
+    model: Any, scaler: Any, window: np.ndarray, repeats: int, horizons: Iterable[int]
+) -> Dict[str, Dict[str, float]]:
+    """Times the prediction functions directly, without HTTP, batching or caches."""
+    prices = [float(price) for price in window]
+    results = {
+        "predict_next_day_price": time_calls(lambda: predict_next_day_price(model, scaler, prices), repeats)
+    }
+    for horizon in horizons:
+        # Long rollouts are slow on the eager path; scale repeats down with the horizon.
+        horizon_repeats = max(3, repeats // max(1, horizon // 10))
+        results[f"predict_multi_step_prices[{horizon}]"] = time_calls(
+            lambda: predict_multi_step_prices(model, scaler, prices, horizon), horizon_repeats
+        )
+    return results
+
+
+def run_path_scaling(
+    model: Any, scaler: Any, window: np.ndarray, horizon: int, path_counts: Iterable[int], repeats: int = 5
+) -> Dict[str, Any]:
+    """
+    Times probabilistic forecasts for growing path counts. Since all paths share one
+    batched rollout, cost should grow much more slowly than the path count.
+    """
+    engine = get_forecast_engine(model, scaler)
+    path_counts = sorted(path_counts)
+    timings = {
+        str(paths): time_calls(lambda: engine.forecast_paths(window, horizon, paths, seed=0), repeats, warmup=1)
+        for paths in path_counts
+    }
+    smallest, largest = str(path_counts[0]), str(path_counts[-1])
+    cost_ratio = timings[largest]["median_ms"] / timings[smallest]["median_ms"]
+    path_ratio = path_counts[-1] / path_counts[0]
+    return {
+        "horizon": horizon,
+        "timings": timings,
+        "path_ratio": path_ratio,
+        "cost_ratio": round(cost_ratio, 3),
+        "sublinear": cost_ratio < path_ratio,
+    }
@@ -0,0 +1,64 @@
+"""
+Local stand-in for an upstream price service, for exercising PRICE_SOURCE=http
+without network access. Serves SyntheticPriceSource prices in the format
+HttpJsonPriceSource expects, with optional latency and injected failures:
+
+    python -m benchmarks.price_server --port 8900 --latency 0.2 --failure-rate 0.1
+    PRICE_SOURCE=http PRICE_SOURCE_URL=http://127.0.0.1:8900 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import random
+from datetime import date
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Query
+
+from benchmarks.stand_ins import SyntheticPriceSource
+
+
+def create_app(latency_seconds: float = 0.0, failure_rate: float = 0.0, base_price: float = 1500.0) -> FastAPI:
+    source = SyntheticPriceSource(base_price=base_price)
+    app = FastAPI(title="Synthetic price service")
+    app.state.requests = 0
+
+    @app.get("/prices")
+    async def get_prices(
+        symbols: str = Query(..., description="Comma-separated ticker symbols."),
+        start: date = Query(...),
+        end: Optional[date] = Query(None),
+    ):
+        app.state.requests += 1
+        if latency_seconds:
+            await asyncio.sleep(latency_seconds)
+        if random.random() < failure_rate:
+            raise HTTPException(status_code=503, detail="Injected upstream failure.")
+
+        payload = {}
+        for symbol in filter(None, (name.strip() for name in symbols.split(","))):
+            dates, closes = source.fetch(symbol, start, end)
+            payload[symbol] = {"dates": [str(day) for day in dates], "closes": closes.tolist()}
+        return payload
+
+    @app.get("/stats")
+    async def get_stats():
+        return {"requests": app.state.requests, "symbol_fetches": source.fetches}
+
+    return app
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.price_server", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+    parser.add_argument("--base-price", type=float, default=1500.0)
+    args = parser.parse_args(argv)
+    uvicorn.run(create_app(args.latency, args.failure_rate, args.base_price), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import hashlib
+from datetime import date
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.services.price_store import PriceSource
+
+EPOCH = np.datetime64("2000-01-03", "D")
+
+
+class SyntheticPriceSource(PriceSource):
+    """
+    Deterministic stand-in for Yahoo Finance.
+
+    Each weekday's close is a fixed function of the symbol and the date, so any
+    range fetch gives the same values across runs and the price store's tail
+    refetch merges cleanly. Prices oscillate around `base_price`.
+    """
+
+    def __init__(self, base_price: float = 1500.0, amplitude: float = 0.15):
+        self.base_price = base_price
+        self.amplitude = amplitude
+        self.fetches = 0
+
+    def fetch(self, symbol: str, start: date, end: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+        self.fetches += 1
+        end = end or date.today()
+        dates = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D"), dtype="datetime64[D]")
+        dates = dates[np.is_busday(dates)]
+        return dates, self.closes_for(symbol, dates)
+
+    def closes_for(self, symbol: str, dates: np.ndarray) -> np.ndarray:
+        seed = int.from_bytes(hashlib.blake2b(symbol.encode(), digest_size=4).digest(), "little")
+        phase = (seed % 1000) / 1000 * 2 * np.pi
+        day = (dates - EPOCH).astype(np.float64)
+        wave = np.sin(day / 40 + phase) + 0.3 * np.sin(day / 6.5 + 2 * phase)
+        return self.base_price * (1 + self.amplitude * wave / 1.3)
+
+    def window(self, symbol: str, length: int, end: Optional[date] = None) -> np.ndarray:
+        """The last `length` closes before `end` (default today)."""
+        end = np.datetime64(end or date.today(), "D")
+        dates = np.busday_offset(end, -np.arange(length, 0, -1), roll="backward")
+        return self.closes_for(symbol, dates)
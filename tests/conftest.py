@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+
+MODELS_DIR = Path(__file__).resolve().parent.parent / "app" / "models"
+SYMBOL = "RELIANCE.NS"
+
+
+@pytest.fixture(scope="session")
+def model_path() -> Path:
+    return MODELS_DIR / f"{SYMBOL}_lstm_model.h5"
+
+
+@pytest.fixture(scope="session")
+def keras_model(model_path):
+    from app.services.prediction_service import load_lstm_model
+
+    return load_lstm_model(model_path, backend="keras")
+
+
+@pytest.fixture(scope="session")
+def scaler():
+    return joblib.load(MODELS_DIR / f"{SYMBOL}_minmax_scaler.pkl")
+
+
+def random_walk_windows(scaler, count: int = 8, seed: int = 0) -> np.ndarray:
+    """Random-walk price windows inside `scaler`'s fitted range, shape (count, TIME_STEP)."""
+    from app.services.prediction_service import TIME_STEP
+
+    rng = np.random.default_rng(seed)
+    starts = rng.uniform(0.2, 0.8, size=(count, 1))
+    scaled = np.clip(starts + np.cumsum(rng.normal(0.0, 0.01, size=(count, TIME_STEP)), axis=1), 0.0, 1.0)
+    return scaler.inverse_transform(scaled.reshape(-1, 1)).reshape(count, TIME_STEP)
+
+
+@pytest.fixture
+def price_windows(scaler):
+    return random_walk_windows(scaler)
+
+
+@pytest.fixture(scope="session")
+def model_registry():
+    """A registry over the bundled models, shared by the route tests so each model loads once."""
+    from app.services.model_registry import ModelRegistry
+
+    return ModelRegistry(model_dir=MODELS_DIR, model_format="h5", precisions={}, warm_up=False)
+
+
+@pytest.fixture
+def lstm_client(monkeypatch, model_registry, tmp_path):
+    """TestClient for the /lstm routes with the shared registry and a fresh forecast cache and price store."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.routes import lstm_only
+    from app.services import quantization
+    from app.services.forecast_cache import ForecastCache
+    from app.services.price_store import PriceStore
+    from benchmarks.stand_ins import SyntheticPriceSource
+
+    monkeypatch.setattr(lstm_only, "registry", model_registry)
+    monkeypatch.setattr(lstm_only, "forecast_cache", ForecastCache())
+    store = PriceStore(root=tmp_path / "prices", source=SyntheticPriceSource(base_price=2500.0))
+    monkeypatch.setattr(lstm_only, "price_store", store)
+    monkeypatch.setattr(quantization, "price_store", store)
+
+    app = FastAPI()
+    app.include_router(lstm_only.router)
+    return TestClient(app)
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from app.services import agent_service
+from app.services.agent_service import AgentTeam, MarkdownStreamCleaner, clean_markdown
+from app.services.fake_agents import FakeAgent
+
+MARKDOWN = "\r\n  # Report\r\n\r\n\r\n\r\n## 1. Intro\n- a  \n\n\n\n- b\r\rend \n\n\n"
+
+
+class CountingAgent(FakeAgent):
+    def __init__(self, name, latency_seconds, team=None):
+        super().__init__(name, latency_seconds=latency_seconds, team=team, chunk_delay_seconds=0.0)
+        self.runs = 0
+
+    def run(self, message="", stream=False):
+        self.runs += 1
+        return super().run(message=message, stream=stream)
+
+
+def _team(subagent_latency=0.2, latency=0.2):
+    news = CountingAgent("News Agent", subagent_latency)
+    finance = CountingAgent("Finance Agent", subagent_latency)
+    return AgentTeam(
+        news=news,
+        finance=finance,
+        aggregator=CountingAgent("Aggregator Agent", latency, team=[news, finance]),
+        report=CountingAgent("Report Agent", latency),
+    )
+
+
+@pytest.fixture
+def team(monkeypatch):
+    def use(orchestration, **latencies):
+        agents = _team(**latencies)
+        monkeypatch.setattr(agent_service, "build_agents", lambda: agents)
+        monkeypatch.setattr(agent_service, "AGENT_ORCHESTRATION", orchestration)
+        return agents
+
+    return use
+
+
+@pytest.mark.parametrize("split", range(len(MARKDOWN) + 1))
+def test_stream_cleaner_matches_clean_markdown_at_any_split(split):
+    cleaner = MarkdownStreamCleaner()
+
+    streamed = cleaner.feed(MARKDOWN[:split]) + cleaner.feed(MARKDOWN[split:])
+
+    assert streamed == clean_markdown(MARKDOWN)
+
+
+def test_stream_cleaner_matches_clean_markdown_one_character_at_a_time():
+    cleaner = MarkdownStreamCleaner()
+
+    assert "".join(cleaner.feed(char) for char in MARKDOWN) == clean_markdown(MARKDOWN)
+
+
+def test_parallel_orchestration_overlaps_the_subagents(team):
+    elapsed = {}
+    reports = {}
+    for orchestration in ("delegate", "parallel"):
+        agents = team(orchestration, subagent_latency=0.3, latency=0.1)
+        started = time.perf_counter()
+        reports[orchestration] = agent_service.query_aggregator_agent("TCS")
+        elapsed[orchestration] = time.perf_counter() - started
+        assert agents.news.runs == agents.finance.runs == 1
+
+    # Delegation runs the sub-agents one after another (~0.7s); parallel overlaps them (~0.4s).
+    assert elapsed["parallel"] < elapsed["delegate"] - 0.15
+    assert reports["delegate"].startswith("## Aggregator Agent")
+    assert reports["parallel"].startswith("## Report Agent")
+    for report in reports.values():
+        assert "Analyze TCS stock." in report
+
+
+@pytest.mark.parametrize("orchestration", ["delegate", "parallel"])
+def test_streamed_report_cleans_to_the_full_report(team, orchestration):
+    team(orchestration, subagent_latency=0.0, latency=0.0)
+    cleaner = MarkdownStreamCleaner()
+    chunks = list(agent_service.stream_aggregator_agent("TCS"))
+
+    assert len(chunks) > 1
+    assert "".join(cleaner.feed(chunk) for chunk in chunks) == clean_markdown("".join(chunks))
+
+
+def test_stop_event_abandons_the_subagent_wait(team):
+    agents = team("parallel", subagent_latency=1.0, latency=0.0)
+    before = agent_service.subagent_stats()["cancelled"]
+    stop_event = threading.Event()
+    threading.Timer(0.1, stop_event.set).start()
+
+    started = time.perf_counter()
+    chunks = list(agent_service.stream_aggregator_agent("TCS", stop_event))
+
+    assert chunks == []
+    assert time.perf_counter() - started < 0.6
+    assert agents.report.runs == 0
+    assert agent_service.subagent_stats()["cancelled"] == before + 2
+
+
+@pytest.mark.parametrize("orchestration", ["delegate", "parallel"])
+def test_stopped_report_starts_no_agent_run(team, orchestration):
+    agents = team(orchestration)
+    stop_event = threading.Event()
+    stop_event.set()
+
+    assert list(agent_service.stream_aggregator_agent("TCS", stop_event)) == []
+    assert sum(agent.runs for agent in agents) == 0
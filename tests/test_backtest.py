@@ -0,0 +1,81 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.services.backtest import backtest_series, error_metrics
+from app.services.model_registry import ModelEntry
+from app.services.prediction_service import TIME_STEP
+from app.services.price_store import NoPriceDataError
+
+
+class IdentityScaler:
+    scale_ = np.array([1.0])
+    min_ = np.array([0.0])
+
+
+class StepModel:
+    """Predicts the window's last value plus `step`."""
+
+    def __init__(self, step: float):
+        self.step = step
+
+    def predict(self, windows, verbose=0):
+        return windows[:, -1, :] + self.step
+
+
+def _entry(step: float) -> ModelEntry:
+    return ModelEntry(symbol="TEST", model=StepModel(step), scaler=IdentityScaler(), version="v1", size_bytes=0)
+
+
+def test_error_metrics_on_a_hand_computed_series():
+    predicted = np.array([11.0, 9.0, 12.0, 10.0])
+    actual = np.array([10.0, 10.0, 11.0, 12.0])
+    last = np.array([10.0, 10.0, 10.0, 11.0])
+
+    metrics = error_metrics(predicted, actual, last)
+
+    assert metrics["samples"] == 4
+    assert metrics["mae"] == pytest.approx(1.25)
+    assert metrics["rmse"] == pytest.approx(math.sqrt(1.75))
+    assert metrics["mape"] == pytest.approx((0.1 + 0.1 + 1 / 11 + 2 / 12) / 4 * 100)
+    # Up/down/up/down predicted against flat/flat/up/up: only the third agrees.
+    assert metrics["directional_accuracy"] == pytest.approx(0.25)
+    assert metrics["naive_mae"] == pytest.approx(0.5)
+
+
+def test_error_metrics_skip_zero_actuals_in_mape():
+    metrics = error_metrics(np.array([1.0, 2.0]), np.array([0.0, 4.0]), np.array([1.0, 3.0]))
+
+    assert metrics["mape"] == pytest.approx(50.0)
+    assert error_metrics(np.array([1.0]), np.array([0.0]), np.array([1.0]))["mape"] is None
+
+
+def test_backtest_scores_every_window_at_each_horizon():
+    closes = np.arange(1.0, TIME_STEP + 6.0)  # 105 rising prices: 5 windows
+
+    result = backtest_series(_entry(step=1.0), closes, horizons=(1, 3))
+
+    assert result["windows"] == 5 and result["prices"] == 105
+    one_step, three_step = result["horizons"]["1"], result["horizons"]["3"]
+    # A +1 per step model is exact on a +1 per day series.
+    assert one_step["samples"] == 5 and one_step["mae"] == 0.0 and one_step["directional_accuracy"] == 1.0
+    assert one_step["naive_mae"] == 1.0
+    # Only windows with a close three days after them are scored.
+    assert three_step["samples"] == 3 and three_step["mae"] == 0.0 and three_step["naive_mae"] == 3.0
+
+
+def test_backtest_of_a_persistence_model_matches_the_naive_baseline():
+    closes = np.arange(1.0, TIME_STEP + 6.0)
+
+    one_step = backtest_series(_entry(step=0.0), closes, horizons=(1,), stride=2)["horizons"]["1"]
+
+    assert one_step["samples"] == 3
+    assert one_step["mae"] == one_step["rmse"] == one_step["naive_mae"] == 1.0
+    assert one_step["mape"] == pytest.approx(np.mean([1 / 101, 1 / 103, 1 / 105]) * 100)
+    assert one_step["directional_accuracy"] == 0.0
+
+
+def test_backtest_needs_more_than_one_window_of_prices():
+    with pytest.raises(NoPriceDataError):
+        backtest_series(_entry(step=1.0), np.arange(1.0, TIME_STEP + 1.0))
@@ -0,0 +1,73 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.batching_service import PredictionBatcher
+from app.services.prediction_service import predict_next_day_price, predict_next_day_prices_batch
+
+
+def test_concurrent_requests_match_single_predictions(keras_model, scaler, price_windows):
+    batch_sizes = []
+
+    def batch_fn(symbol, windows):
+        batch_sizes.append(len(windows))
+        return predict_next_day_prices_batch(keras_model, scaler, windows)
+
+    async def submit_all():
+        batcher = PredictionBatcher("RELIANCE.NS", batch_fn, max_batch_size=5, max_wait_ms=50)
+        return batcher, await asyncio.gather(*(batcher.submit(window) for window in price_windows))
+
+    batcher, results = asyncio.run(submit_all())
+
+    expected = [predict_next_day_price(keras_model, scaler, list(window)) for window in price_windows]
+    np.testing.assert_allclose(results, expected, rtol=1e-5)
+    # Eight concurrent requests with a batch limit of five: one full batch, then the rest.
+    assert sorted(batch_sizes) == [3, 5]
+    assert batcher.stats()["requests_served"] == len(price_windows)
+
+
+def test_batch_failure_reaches_every_caller(price_windows):
+    def batch_fn(symbol, windows):
+        raise RuntimeError("model unavailable")
+
+    async def submit_all():
+        batcher = PredictionBatcher("RELIANCE.NS", batch_fn, max_wait_ms=50)
+        return await asyncio.gather(*(batcher.submit(window) for window in price_windows[:3]), return_exceptions=True)
+
+    results = asyncio.run(submit_all())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_request_is_left_out_of_the_batch(keras_model, scaler, price_windows):
+    batch_sizes = []
+
+    def batch_fn(symbol, windows):
+        batch_sizes.append(len(windows))
+        return predict_next_day_prices_batch(keras_model, scaler, windows)
+
+    async def submit_and_cancel():
+        batcher = PredictionBatcher("RELIANCE.NS", batch_fn, max_wait_ms=50)
+        cancelled = asyncio.ensure_future(batcher.submit(price_windows[0]))
+        kept = asyncio.ensure_future(batcher.submit(price_windows[1]))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept
+
+    result = asyncio.run(submit_and_cancel())
+
+    assert result == pytest.approx(predict_next_day_price(keras_model, scaler, list(price_windows[1])), rel=1e-5)
+    assert batch_sizes == [1]
+
+
+def test_varying_batch_sizes_share_one_compiled_step(keras_model, scaler, price_windows):
+    from app.services.forecast_engine import get_forecast_engine
+
+    for size in (1, 2, 3, 5, 8):
+        predictions = predict_next_day_prices_batch(keras_model, scaler, price_windows[:size])
+        scaled = scaler.transform(price_windows[:size].reshape(-1, 1)).reshape(size, -1, 1)
+        expected = scaler.inverse_transform(keras_model.predict(scaled, verbose=0))[:, 0]
+        np.testing.assert_allclose(predictions, expected, rtol=1e-5)
+
+    assert get_forecast_engine(keras_model, scaler)._graph_predict.experimental_get_tracing_count() == 1
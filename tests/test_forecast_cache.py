@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from app.services.forecast_cache import ForecastCache, window_digest
+from app.services.forecast_engine import ForecastEngine
+from app.services.prediction_service import predict_next_day_price
+
+
+class CountingForecast:
+    """Deterministic stand-in rollout: each step is the mean of the last five values plus one."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, window, steps):
+        self.calls.append((window.copy(), steps))
+        values = list(window)
+        for _ in range(steps):
+            values.append(np.mean(values[-5:]) + 1.0)
+        return np.array(values[len(window):])
+
+
+@pytest.fixture
+def window():
+    return np.linspace(100.0, 120.0, 20)
+
+
+def test_window_digest_depends_on_values_not_identity(window):
+    assert window_digest(window) == window_digest(window.copy())
+    changed = window.copy()
+    changed[-1] += 1e-9
+    assert window_digest(changed) != window_digest(window)
+
+
+def test_shorter_horizon_is_sliced_from_the_cached_forecast(window):
+    cache, forecast = ForecastCache(), CountingForecast()
+    full = cache.get_or_compute("AAA", "v1", window, 10, forecast)
+
+    prefix = cache.get_or_compute("AAA", "v1", window.copy(), 4, forecast)
+
+    np.testing.assert_array_equal(prefix, full[:4])
+    assert len(forecast.calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_longer_horizon_extends_from_the_cached_tail(window):
+    cache, forecast = ForecastCache(), CountingForecast()
+    cache.get_or_compute("AAA", "v1", window, 4, forecast)
+
+    extended = cache.get_or_compute("AAA", "v1", window, 10, forecast)
+
+    np.testing.assert_allclose(extended, CountingForecast()(window, 10))
+    tail, steps = forecast.calls[1]
+    assert steps == 6
+    np.testing.assert_array_equal(tail, np.concatenate([window, extended[:4]])[-len(window):])
+    assert cache.stats()["extensions"] == 1
+
+
+def test_entries_are_separate_per_symbol_window_and_model_version(window):
+    cache, forecast = ForecastCache(), CountingForecast()
+    cache.get_or_compute("AAA", "v1", window, 5, forecast)
+
+    cache.get_or_compute("AAA", "v2", window, 5, forecast)
+    cache.get_or_compute("BBB", "v1", window, 5, forecast)
+    cache.get_or_compute("AAA", "v1", window + 1.0, 5, forecast)
+
+    assert len(forecast.calls) == 4
+    assert cache.peek("AAA", "v3", window, 1) is None
+    assert cache.peek("AAA", "v1", window, 6) is None
+    assert cache.peek("AAA", "v1", window, 5) is not None
+
+
+def test_store_keeps_the_longest_forecast(window):
+    cache = ForecastCache()
+    cache.store("AAA", "v1", window, [1.0, 2.0, 3.0])
+    cache.store("AAA", "v1", window, [9.0])
+
+    np.testing.assert_array_equal(cache.peek("AAA", "v1", window, 3), [1.0, 2.0, 3.0])
+
+
+def test_least_recently_used_entry_is_evicted(window):
+    cache = ForecastCache(max_entries=2)
+    for version in ("v1", "v2", "v3"):
+        cache.store("AAA", version, window, [1.0])
+
+    assert cache.peek("AAA", "v1", window, 1) is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_rollout_horizon_one_matches_the_batched_next_day_prediction(keras_model, scaler, price_windows):
+    """/predict serves a cached horizon-1 rollout value in place of the batched path's."""
+    rollout = ForecastEngine(keras_model, scaler).forecast(price_windows, 1)[:, 0]
+    batched = [predict_next_day_price(keras_model, scaler, list(window)) for window in price_windows]
+
+    np.testing.assert_allclose(rollout, batched, rtol=1e-5)
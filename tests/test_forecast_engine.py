@@ -0,0 +1,27 @@
+import numpy as np
+
+from app.services.forecast_engine import ForecastEngine
+
+
+def test_graph_rollout_matches_step_by_step_predict(keras_model, scaler, price_windows):
+    engine = ForecastEngine(keras_model, scaler)
+    scaled = engine.to_scaled(price_windows)
+
+    expected = engine._buffer_rollout(scaled, 5)
+    np.testing.assert_allclose(engine.rollout_scaled(scaled, 5), expected, rtol=1e-4, atol=1e-5)
+
+
+def test_graph_noisy_rollout_matches_step_by_step_predict(keras_model, scaler, price_windows):
+    engine = ForecastEngine(keras_model, scaler)
+    scaled = engine.to_scaled(price_windows)
+    noise = np.random.default_rng(1).normal(0.0, 0.01, size=(len(scaled), 5)).astype(np.float32)
+
+    expected = engine._buffer_rollout(scaled, 5, noise)
+    np.testing.assert_allclose(engine.rollout_scaled(scaled, 5, noise), expected, rtol=1e-4, atol=1e-5)
+
+
+def test_forecast_paths_returns_one_row_per_path(keras_model, scaler, price_windows):
+    paths = ForecastEngine(keras_model, scaler).forecast_paths(price_windows[0], steps=7, paths=16, seed=0)
+
+    assert paths.shape == (16, 7)
+    assert np.isfinite(paths).all()
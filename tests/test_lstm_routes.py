@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from app.routes import lstm_only
+
+
+def _predict(client, window, symbol="RELIANCE.NS"):
+    return client.post("/lstm/predict", json={"symbol": symbol, "past_100_prices": list(window)})
+
+
+def test_predict_serves_the_horizon_one_prefix_of_a_cached_forecast(lstm_client, price_windows):
+    window = price_windows[0]
+    computed = _predict(lstm_client, window).json()["predicted_price"]
+
+    multi = lstm_client.post(
+        "/lstm/multi-predict", json={"symbol": "RELIANCE.NS", "initial_prices": list(window), "forecast_days": 5}
+    ).json()["predicted_prices"]
+    served = _predict(lstm_client, window).json()["predicted_price"]
+
+    assert served == multi[0]
+    np.testing.assert_allclose(served, computed, rtol=1e-5)
+    assert lstm_only.forecast_cache.stats()["hits"] == 1
+
+
+def test_predict_results_are_not_stored_in_the_forecast_cache(lstm_client, price_windows):
+    _predict(lstm_client, price_windows[1])
+
+    assert lstm_only.forecast_cache.stats()["entries"] == 0
+
+
+def test_predict_unknown_symbol_is_404(lstm_client, price_windows):
+    assert _predict(lstm_client, price_windows[0], symbol="NOPE.NS").status_code == 404
+
+
+def test_batch_predict_mixed_horizons_and_per_item_errors(lstm_client, model_registry, price_windows):
+    from app.services.forecast_engine import get_forecast_engine
+
+    items = [
+        {"symbol": "RELIANCE.NS", "prices": list(price_windows[0]), "forecast_days": 3},
+        {"symbol": "nope.ns", "prices": list(price_windows[1]), "forecast_days": 2},
+        {"symbol": "reliance.ns", "prices": list(price_windows[2])},
+        {"symbol": "RELIANCE.NS", "prices": list(price_windows[3][:99]), "forecast_days": 2},
+        {"symbol": "RELIANCE.NS", "prices": list(price_windows[4]), "forecast_days": 7},
+    ]
+
+    response = lstm_client.post("/lstm/batch-predict", json={"items": items})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["symbol"] for result in results] == ["RELIANCE.NS", "NOPE.NS", "RELIANCE.NS", "RELIANCE.NS", "RELIANCE.NS"]
+    assert results[1]["error"]["status_code"] == 404
+    assert results[3]["error"]["status_code"] == 422
+
+    entry = model_registry.get("RELIANCE.NS")
+    engine = get_forecast_engine(entry.model, entry.scaler)
+    for index, steps in ((0, 3), (2, 1), (4, 7)):
+        assert len(results[index]["predicted_prices"]) == steps
+        np.testing.assert_allclose(
+            results[index]["predicted_prices"], engine.forecast(price_windows[index], steps)[0], rtol=1e-5
+        )
+
+
+def test_batch_predict_rejects_an_empty_batch(lstm_client):
+    assert lstm_client.post("/lstm/batch-predict", json={"items": []}).status_code == 422
+
+
+@pytest.fixture
+def quantization_client(lstm_client, monkeypatch):
+    from app.services.model_registry import ModelRegistry
+    from tests.conftest import MODELS_DIR
+
+    # A registry of its own, so precision changes don't leak into the shared one.
+    monkeypatch.setattr(
+        lstm_only, "registry", ModelRegistry(model_dir=MODELS_DIR, model_format="h5", precisions={}, warm_up=False)
+    )
+    monkeypatch.setattr(lstm_only, "ENABLE_QUANTIZATION_ENDPOINT", True)
+    return lstm_client
+
+
+def test_quantization_accepts_a_precision_that_passes_validation(quantization_client):
+    response = quantization_client.put("/lstm/quantization/reliance.ns", params={"precision": "FLOAT16"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["symbol"] == "RELIANCE.NS" and body["requested"] == "float16"
+    assert body["active"] == "float16" and body["report"]["passed"]
+    assert body["report"]["validation_data"] == "synthetic"
+    assert lstm_only.registry.get("RELIANCE.NS").precision == "float16"
+
+
+def test_quantization_refuses_a_precision_that_fails_validation(quantization_client):
+    response = quantization_client.put("/lstm/quantization/RELIANCE.NS", params={"precision": "int8"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["requested"] == "int8" and body["active"] == "float32"
+    assert not body["report"]["passed"]
+    assert body["report"]["mean_relative_error"] > body["report"]["threshold"]
+
+
+@pytest.mark.parametrize(
+    "symbol, precision, status_code",
+    [("RELIANCE.NS", "bfloat16", 422), ("NOPE.NS", "float16", 404)],
+)
+def test_quantization_rejects_bad_requests(quantization_client, symbol, precision, status_code):
+    response = quantization_client.put(f"/lstm/quantization/{symbol}", params={"precision": precision})
+
+    assert response.status_code == status_code
+    assert lstm_only.registry.resident_symbols() == []
+
+
+def test_quantization_endpoint_is_disabled_by_default(lstm_client, monkeypatch):
+    monkeypatch.setattr(lstm_only, "ENABLE_QUANTIZATION_ENDPOINT", False)
+
+    response = lstm_client.put("/lstm/quantization/RELIANCE.NS", params={"precision": "float16"})
+
+    assert response.status_code == 404
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+
+import pytest
+
+from app.services.model_registry import MODEL_FILE_SUFFIX, SCALER_FILE_SUFFIX, ModelRegistry
+
+
+class StubModel:
+    def __init__(self, path):
+        self.path = path
+
+    def count_params(self):
+        return 10
+
+
+class CountingLoader:
+    """Stands in for the Keras loader: counts loads and takes `delay` seconds each."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.loads = []
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        time.sleep(self.delay)
+        with self._lock:
+            self.loads.append(path.name)
+        return StubModel(path)
+
+
+def _add_model(model_dir, symbol, content=b"weights"):
+    (model_dir / f"{symbol}{MODEL_FILE_SUFFIX}").write_bytes(content)
+    (model_dir / f"{symbol}{SCALER_FILE_SUFFIX}").write_bytes(b"scaler")
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    for symbol in ("AAA.NS", "BBB.NS", "CCC.NS"):
+        _add_model(tmp_path, symbol)
+    return tmp_path
+
+
+def _registry(model_dir, loader, **options):
+    options.setdefault("reload_check_seconds", 60)
+    return ModelRegistry(
+        model_dir=model_dir,
+        model_loader=loader,
+        scaler_loader=lambda path: object(),
+        warm_up=False,
+        model_format="h5",
+        precisions={},
+        **options,
+    )
+
+
+def test_concurrent_gets_share_one_load(model_dir):
+    loader = CountingLoader(delay=0.2)
+    registry = _registry(model_dir, loader)
+    barrier = threading.Barrier(8)
+    entries = []
+
+    def get():
+        barrier.wait()
+        entries.append(registry.get("AAA.NS"))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.loads == [f"AAA.NS{MODEL_FILE_SUFFIX}"]
+    assert len({id(entry) for entry in entries}) == 1
+    assert registry.stats()["loads"] == 1
+
+
+def test_least_recently_used_model_is_evicted(model_dir):
+    registry = _registry(model_dir, CountingLoader(), max_models=2)
+
+    registry.get("AAA.NS")
+    registry.get("BBB.NS")
+    registry.get("AAA.NS")
+    registry.get("CCC.NS")
+
+    assert registry.resident_symbols() == ["AAA.NS", "CCC.NS"]
+    assert registry.stats()["evictions"] == 1
+
+
+def test_changed_files_trigger_a_reload(model_dir):
+    loader = CountingLoader()
+    registry = _registry(model_dir, loader, reload_check_seconds=0)
+    first = registry.get("AAA.NS")
+
+    assert registry.get("AAA.NS") is first
+    model_path = model_dir / f"AAA.NS{MODEL_FILE_SUFFIX}"
+    model_path.write_bytes(b"retrained weights")
+    stat = model_path.stat()
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    reloaded = registry.get("AAA.NS")
+    assert reloaded is not first and reloaded.version != first.version
+    assert len(loader.loads) == 2
+    assert registry.stats()["reloads"] == 1
+
+
+def test_removed_files_unload_the_model(model_dir):
+    registry = _registry(model_dir, CountingLoader(), reload_check_seconds=0)
+    registry.get("AAA.NS")
+
+    (model_dir / f"AAA.NS{MODEL_FILE_SUFFIX}").unlink()
+
+    with pytest.raises(KeyError):
+        registry.get("AAA.NS")
+    assert registry.resident_symbols() == []
+    assert not registry.has_model("AAA.NS")
+
+
+def test_unknown_symbols_raise_without_leaving_load_locks(model_dir):
+    registry = _registry(model_dir, CountingLoader())
+
+    for index in range(100):
+        with pytest.raises(KeyError):
+            registry.get(f"UNKNOWN{index}")
+
+    assert registry._load_locks == {}
+
+
+def test_has_model_answers_from_the_discovery_index(model_dir, monkeypatch):
+    registry = _registry(model_dir, CountingLoader())
+    registry.refresh_index()
+
+    def no_disk_access(*args):
+        raise AssertionError("has_model touched the filesystem")
+
+    monkeypatch.setattr(registry, "paths_for", no_disk_access)
+    monkeypatch.setattr(registry, "artifact_for", no_disk_access)
+
+    assert registry.has_model("AAA.NS")
+    assert not registry.has_model("ZZZ.NS")
+
+
+def test_stale_index_is_rebuilt_in_the_background(model_dir):
+    registry = _registry(model_dir, CountingLoader(), reload_check_seconds=0.05)
+    registry.refresh_index()
+    _add_model(model_dir, "DDD.NS")
+
+    assert not registry.has_model("DDD.NS")
+    time.sleep(0.1)
+    deadline = time.monotonic() + 5
+    while not registry.has_model("DDD.NS") and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert registry.has_model("DDD.NS")
+
+
+def test_has_model_builds_the_index_on_first_use(model_dir):
+    registry = _registry(model_dir, CountingLoader())
+
+    assert registry.has_model("AAA.NS")
+    assert not registry.has_model("ZZZ.NS")
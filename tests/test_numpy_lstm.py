@@ -0,0 +1,35 @@
+import joblib
+import numpy as np
+import pytest
+
+from app.services.forecast_engine import ForecastEngine
+from app.services.numpy_lstm import NumpyLSTMModel
+from tests.conftest import MODELS_DIR, random_walk_windows
+
+
+@pytest.mark.parametrize("seed, symbol", enumerate(["RELIANCE.NS", "ADANIPORTS.NS", "BHARTIARTL.NS"]))
+def test_numpy_model_matches_keras(seed, symbol):
+    from app.services.prediction_service import load_lstm_model
+
+    model_path = MODELS_DIR / f"{symbol}_lstm_model.h5"
+    keras_model = load_lstm_model(model_path, backend="keras")
+    numpy_model = NumpyLSTMModel.from_h5(model_path)
+    # Each model with its own scaler, on windows inside that scaler's price range.
+    scaler = joblib.load(MODELS_DIR / f"{symbol}_minmax_scaler.pkl")
+    price_windows = random_walk_windows(scaler, seed=seed)
+    scaled = scaler.transform(price_windows.reshape(-1, 1)).reshape(len(price_windows), -1, 1)
+
+    assert numpy_model.input_shape[1:] == tuple(keras_model.input_shape[1:])
+    np.testing.assert_allclose(numpy_model.predict(scaled), keras_model.predict(scaled, verbose=0), rtol=1e-4, atol=1e-5)
+    np.testing.assert_allclose(
+        ForecastEngine(numpy_model, scaler).forecast(price_windows, 5),
+        ForecastEngine(keras_model, scaler).forecast(price_windows, 5),
+        rtol=1e-4,
+    )
+
+
+def test_numpy_rollout_matches_keras(keras_model, model_path, scaler, price_windows):
+    numpy_model = NumpyLSTMModel.from_h5(model_path)
+
+    expected = ForecastEngine(keras_model, scaler).forecast(price_windows, 10)
+    np.testing.assert_allclose(ForecastEngine(numpy_model, scaler).forecast(price_windows, 10), expected, rtol=1e-4)
@@ -0,0 +1,255 @@
+import threading
+import time
+from datetime import date, timedelta
+
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.price_store import (
+    HttpJsonPriceSource,
+    PriceSource,
+    PriceSourceError,
+    ResilientPriceSource,
+    YFinanceSource,
+)
+from app.services.resilience import CircuitBreaker, CircuitOpenError
+from benchmarks.price_server import create_app
+
+START = date(2024, 1, 1)
+END = date(2024, 1, 31)
+
+
+@pytest.fixture
+def price_server():
+    """Runs benchmarks/price_server.py on a free local port; yields a factory taking its options."""
+    import uvicorn
+
+    servers = []
+
+    def start(**options) -> str:
+        config = uvicorn.Config(create_app(**options), host="127.0.0.1", port=0, log_level="warning")
+        server = uvicorn.Server(config)
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        servers.append((server, thread))
+        port = server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    yield start
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+class ScriptedSource(PriceSource):
+    """Fails the first `failures` calls, then returns one day of prices per symbol."""
+
+    def __init__(self, failures: int = 0, delay: float = 0.0):
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def fetch_many(self, symbols, start, end=None):
+        with self._lock:
+            self.calls += 1
+            failing = self.calls <= self.failures
+        time.sleep(self.delay)
+        if failing:
+            raise PriceSourceError("upstream down")
+        return {symbol: (np.array([start], dtype="datetime64[D]"), np.array([100.0])) for symbol in symbols}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _resilient(inner, retries=0, threshold=2, cooldown=30.0, clock=None):
+    breaker = CircuitBreaker("test", failure_threshold=threshold, cooldown_seconds=cooldown, clock=clock or FakeClock())
+    return ResilientPriceSource(inner, retries=retries, backoff_seconds=0.0, breaker=breaker)
+
+
+# --- HttpJsonPriceSource against the local stand-in ---
+
+def test_http_source_fetches_grouped_symbols(price_server):
+    source = HttpJsonPriceSource(base_url=price_server())
+
+    series = source.fetch_many(["AAA", "BBB"], START, END)
+
+    for symbol in ("AAA", "BBB"):
+        dates, closes = series[symbol]
+        assert len(dates) == np.busday_count(START, END)
+        assert dates[0] == np.datetime64(START) and closes.dtype == np.float64
+    assert not np.array_equal(series["AAA"][1], series["BBB"][1])
+
+
+def test_http_source_failures_open_the_breaker(price_server):
+    clock = FakeClock()
+    source = _resilient(HttpJsonPriceSource(base_url=price_server(failure_rate=1.0)), retries=1, threshold=2, clock=clock)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        source.fetch("AAA", START, END)
+    assert source.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        source.fetch("AAA", START, END)
+
+
+# --- ResilientPriceSource ---
+
+def test_retries_recover_from_transient_failures():
+    inner = ScriptedSource(failures=2)
+    source = _resilient(inner, retries=2, threshold=5)
+
+    dates, closes = source.fetch("AAA", START)
+
+    assert inner.calls == 3
+    assert closes.tolist() == [100.0]
+    assert source.breaker.state == "closed"
+
+
+def test_retries_give_up_after_the_limit():
+    inner = ScriptedSource(failures=10)
+    source = _resilient(inner, retries=1, threshold=5)
+
+    with pytest.raises(PriceSourceError):
+        source.fetch("AAA", START)
+    assert inner.calls == 2
+
+
+def test_breaker_opens_then_lets_one_trial_through_after_cooldown():
+    clock = FakeClock()
+    inner = ScriptedSource(failures=2)
+    source = _resilient(inner, retries=0, threshold=2, cooldown=30.0, clock=clock)
+
+    for _ in range(2):
+        with pytest.raises(PriceSourceError):
+            source.fetch("AAA", START)
+    assert source.breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as opened:
+        source.fetch("AAA", START)
+    assert opened.value.retry_after == 30
+    assert inner.calls == 2
+
+    clock.now = 31.0
+    assert source.breaker.state == "half_open"
+    source.fetch("AAA", START)
+    assert source.breaker.state == "closed"
+    assert inner.calls == 3
+
+
+def test_failed_half_open_trial_reopens_the_breaker():
+    clock = FakeClock()
+    source = _resilient(ScriptedSource(failures=3), retries=0, threshold=2, cooldown=30.0, clock=clock)
+    for _ in range(2):
+        with pytest.raises(PriceSourceError):
+            source.fetch("AAA", START)
+
+    clock.now = 31.0
+    with pytest.raises(PriceSourceError):
+        source.fetch("AAA", START)
+
+    assert source.breaker.state == "open"
+    assert source.breaker.stats()["times_opened"] == 2
+
+
+def test_concurrent_identical_fetches_are_coalesced():
+    inner = ScriptedSource(delay=0.2)
+    source = _resilient(inner)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def fetch():
+        barrier.wait()
+        results.append(source.fetch_many(["BBB", "AAA"], START))
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert inner.calls == 1
+    assert len(results) == 8 and all(set(result) == {"AAA", "BBB"} for result in results)
+    assert source.stats()["coalescing"]["coalesced"] == 7
+
+
+def test_symbol_failure_in_a_grouped_fetch_raises_for_that_symbol_only():
+    class PartlyFailing(PriceSource):
+        def fetch_many(self, symbols, start, end=None):
+            return {"AAA": (np.array([start], dtype="datetime64[D]"), np.array([1.0])), "BBB": PriceSourceError("no BBB")}
+
+    source = _resilient(PartlyFailing())
+
+    assert source.fetch("AAA", START)[1].tolist() == [1.0]
+    with pytest.raises(PriceSourceError):
+        source.fetch("BBB", START)
+    assert source.breaker.state == "closed"
+
+
+# --- YFinanceSource failure detection from the returned frame ---
+
+def _yfinance_frame(closes_by_symbol):
+    index = pd.date_range("2024-01-01", periods=3, freq="B")
+    columns = pd.MultiIndex.from_product([["Close", "Open"], list(closes_by_symbol)], names=["Price", "Ticker"])
+    data = {
+        (field, symbol): closes for field in ("Close", "Open") for symbol, closes in closes_by_symbol.items()
+    }
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+def _yfinance_source(frame):
+    source = YFinanceSource()
+    source._download = lambda symbols, start, end: frame
+    return source
+
+
+def test_yfinance_source_reads_each_symbols_closes():
+    frame = _yfinance_frame({"AAA.NS": [1.0, 2.0, 3.0], "BBB.NS": [4.0, np.nan, 6.0]})
+
+    series = _yfinance_source(frame).fetch_many(["aaa.ns", "BBB.NS"], START)
+
+    assert series["aaa.ns"][1].tolist() == [1.0, 2.0, 3.0]
+    assert series["BBB.NS"][1].tolist() == [4.0, 6.0]
+    assert series["BBB.NS"][0].tolist() == [date(2024, 1, 1), date(2024, 1, 3)]
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [
+        pd.DataFrame(),
+        _yfinance_frame({"AAA.NS": [np.nan] * 3}),
+        _yfinance_frame({"OTHER.NS": [1.0, 2.0, 3.0]}),
+    ],
+    ids=["empty", "all-nan", "missing-column"],
+)
+def test_yfinance_source_raises_when_a_symbol_got_no_prices(frame):
+    with pytest.raises(PriceSourceError):
+        _yfinance_source(frame).fetch("AAA.NS", START)
+
+
+def test_yfinance_grouped_fetch_fails_only_the_missing_symbols():
+    frame = _yfinance_frame({"AAA.NS": [1.0, 2.0, 3.0], "BBB.NS": [np.nan] * 3})
+
+    series = _yfinance_source(frame).fetch_many(["AAA.NS", "BBB.NS"], START)
+
+    assert series["AAA.NS"][1].tolist() == [1.0, 2.0, 3.0]
+    assert isinstance(series["BBB.NS"], PriceSourceError)
+    with pytest.raises(PriceSourceError):
+        _yfinance_source(pd.DataFrame()).fetch_many(["AAA.NS", "BBB.NS"], START)
+
+
+def test_failed_yfinance_downloads_reach_the_breaker():
+    source = _resilient(_yfinance_source(pd.DataFrame()), retries=1, threshold=2)
+
+    with pytest.raises(PriceSourceError):
+        source.fetch("AAA.NS", START - timedelta(days=30))
+
+    assert source.breaker.state == "open"
@@ -0,0 +1,172 @@
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.price_store import NoPriceDataError, PriceStore, PriceSourceError
+from benchmarks.stand_ins import SyntheticPriceSource
+
+
+class FakeSource(SyntheticPriceSource):
+    """Synthetic prices that records every (symbols, start, end) request."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+        self.missing = set()
+        self.failing = False
+        self._lock = threading.Lock()
+
+    def fetch(self, symbol, start, end=None):
+        return self.fetch_many([symbol], start, end)[symbol]
+
+    def fetch_many(self, symbols, start, end=None):
+        with self._lock:
+            self.requests.append((tuple(symbols), start, end))
+        if self.failing:
+            raise PriceSourceError("upstream down")
+        return {
+            symbol: (np.empty(0, dtype="datetime64[D]"), np.empty(0)) if symbol in self.missing
+            else SyntheticPriceSource.fetch(self, symbol, start, end)
+            for symbol in symbols
+        }
+
+
+@pytest.fixture
+def source():
+    return FakeSource()
+
+
+@pytest.fixture
+def store(tmp_path, source):
+    return PriceStore(root=tmp_path, source=source, refresh_seconds=3600)
+
+
+def test_first_request_fetches_and_persists(store, source, tmp_path):
+    dates, closes = store.get_history("AAA.NS", 50)
+
+    assert len(dates) == len(closes) == 50
+    assert source.requests == [(("AAA.NS",), date.today() - timedelta(days=100), None)]
+    np.testing.assert_allclose(closes, source.closes_for("AAA.NS", dates))
+
+    reopened = PriceStore(root=tmp_path, source=FakeSource(), refresh_seconds=3600)
+    np.testing.assert_array_equal(reopened.stored_history("AAA.NS", 50)[1], closes)
+
+
+def test_fresh_history_is_served_without_fetching(store, source):
+    store.get_history("AAA.NS", 50)
+    store.get_history("AAA.NS", 20)
+
+    assert len(source.requests) == 1
+
+
+def test_longer_lookback_backfills_only_the_head(store, source):
+    store.get_history("AAA.NS", 20)
+    dates, closes = store.get_history("AAA.NS", 100)
+
+    today = date.today()
+    assert source.requests[1] == (("AAA.NS",), today - timedelta(days=200), today - timedelta(days=40))
+    assert len(dates) == 100 and np.all(np.diff(dates.astype(np.int64)) > 0)
+    np.testing.assert_allclose(closes, source.closes_for("AAA.NS", dates))
+
+
+def test_stale_history_refetches_the_tail_from_the_last_stored_day(store, source):
+    dates, _ = store.get_history("AAA.NS", 20)
+    store.get_history("AAA.NS", 20, refresh_seconds=0)
+
+    assert source.requests[1] == (("AAA.NS",), dates[-1].astype(object), None)
+
+
+def test_failed_tail_refresh_serves_stored_prices(store, source):
+    _, stored = store.get_history("AAA.NS", 20)
+    source.failing = True
+
+    _, served = store.get_history("AAA.NS", 20, refresh_seconds=0)
+
+    np.testing.assert_array_equal(served, stored)
+
+
+def test_unknown_symbol_raises_no_price_data(store, source):
+    source.missing.add("NOPE.NS")
+
+    with pytest.raises(NoPriceDataError):
+        store.get_history("NOPE.NS", 20)
+
+
+def test_symbols_are_case_insensitive(store, source, tmp_path):
+    store.get_history("reliance.ns", 20)
+    store.get_history(" RELIANCE.NS", 20)
+
+    assert len(source.requests) == 1
+    assert [path.name for path in tmp_path.iterdir()] == ["RELIANCE.NS"]
+    assert store.stored_history("Reliance.NS", 20) is not None
+
+
+def test_get_histories_groups_fetches_by_range(store, source):
+    store.get_history("AAA.NS", 20)
+    source.requests.clear()
+
+    results = store.get_histories(["aaa.ns", "BBB.NS", "CCC.NS", "NOPE.NS"], 20, refresh_seconds=3600)
+
+    # AAA is fresh; the three new symbols share one grouped fetch.
+    assert source.requests == [(("BBB.NS", "CCC.NS", "NOPE.NS"), date.today() - timedelta(days=40), None)]
+    assert set(results) == {"aaa.ns", "BBB.NS", "CCC.NS", "NOPE.NS"}
+    assert all(len(results[symbol][1]) == 20 for symbol in ("aaa.ns", "BBB.NS", "CCC.NS"))
+    np.testing.assert_array_equal(results["aaa.ns"][1], store.get_history("AAA.NS", 20)[1])
+
+
+def test_get_histories_reports_errors_per_symbol(store, source):
+    source.missing.add("NOPE.NS")
+    results = store.get_histories(["AAA.NS", "NOPE.NS"], 20)
+    assert isinstance(results["NOPE.NS"], NoPriceDataError)
+    assert len(results["AAA.NS"][1]) == 20
+
+    source.failing = True
+    results = store.get_histories(["CCC.NS", "DDD.NS"], 20)
+    assert all(isinstance(result, PriceSourceError) for result in results.values())
+
+
+def test_failed_write_leaves_the_previous_files_intact(store, source, tmp_path, monkeypatch):
+    store.get_history("AAA.NS", 20)
+    symbol_dir = tmp_path / "AAA.NS"
+    on_disk = np.load(symbol_dir / "close.npy")
+    saves = []
+
+    def failing_save(file, array):
+        saves.append(array)
+        if len(saves) == 2:  # dates.npy is written, close.npy fails
+            raise OSError("disk full")
+        original_save(file, array)
+
+    original_save = np.save
+    monkeypatch.setattr(np, "save", failing_save)
+    store.get_history("AAA.NS", 60)
+    monkeypatch.undo()
+
+    # The in-memory copy kept serving, and neither file on disk was replaced.
+    assert len(store.get_history("AAA.NS", 60)[1]) == 60
+    np.testing.assert_array_equal(np.load(symbol_dir / "close.npy"), on_disk)
+    assert len(np.load(symbol_dir / "dates.npy")) == len(on_disk)
+
+
+def test_mismatched_files_on_disk_are_ignored(store, source, tmp_path):
+    store.get_history("AAA.NS", 20)
+    np.save(tmp_path / "AAA.NS" / "close.npy", np.ones(3))
+
+    reopened = PriceStore(root=tmp_path, source=source, refresh_seconds=3600)
+
+    assert reopened.stored_history("AAA.NS", 20) is None
+
+
+def test_write_leaves_matching_files_in_place(store, tmp_path):
+    store.get_history("AAA.NS", 20)
+    store.get_history("AAA.NS", 60)
+
+    symbol_dir = tmp_path / "AAA.NS"
+    assert sorted(path.name for path in symbol_dir.iterdir() if not path.name.startswith(".")) == [
+        "close.npy",
+        "dates.npy",
+        "meta.json",
+    ]
+    assert len(np.load(symbol_dir / "close.npy")) == len(np.load(symbol_dir / "dates.npy"))
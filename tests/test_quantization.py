@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from app.services.quantization import convert_model, quantize_model
+
+
+@pytest.mark.parametrize("precision, tolerance", [("float16", 1e-3), ("int8", 2e-2)])
+def test_converted_model_matches_keras(keras_model, scaler, price_windows, precision, tolerance):
+    converted = convert_model(keras_model, precision)
+    scaled = scaler.transform(price_windows.reshape(-1, 1)).reshape(len(price_windows), -1, 1).astype(np.float32)
+
+    assert converted.precision == precision
+    assert converted.size_bytes > 0
+    np.testing.assert_allclose(converted.predict(scaled), keras_model.predict(scaled, verbose=0), atol=tolerance)
+    # A different batch size resizes the interpreter's input.
+    np.testing.assert_allclose(converted.predict(scaled[:3]), keras_model.predict(scaled[:3], verbose=0), atol=tolerance)
+
+
+def test_quantize_model_reports_validation(keras_model, scaler):
+    model, report = quantize_model("RELIANCE.NS", keras_model, scaler, "float16")
+
+    assert "error" not in report
+    assert report["requested"] == "float16"
+    assert report["windows"] > 0
+    assert report["active"] == ("float16" if report["passed"] else "float32")
+    assert (model is keras_model) != report["passed"]
@@ -0,0 +1,191 @@
+import asyncio
+
+import pytest
+
+from app.services.report_cache import ReportCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class StubLoader:
+    """Stands in for the agent run: counts calls and can be held open or made to fail."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+        self.release.set()
+        self.fail = False
+
+    async def __call__(self, stock_name: str) -> str:
+        self.calls.append(stock_name)
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("agent failed")
+        return f"report {len(self.calls)} for {stock_name}"
+
+
+async def _settle():
+    """Lets pending tasks, such as background refreshes, run to completion."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def _cache(loader, clock, **options):
+    return ReportCache(loader, ttl_seconds=100, stale_seconds=50, clock=clock, **options)
+
+
+def test_fresh_report_is_served_from_cache():
+    async def scenario():
+        clock, loader = FakeClock(), StubLoader()
+        cache = _cache(loader, clock)
+        first = await cache.get("reliance")
+        clock.now += 99
+        second = await cache.get("  Reliance ")
+        return cache, loader, first, second
+
+    cache, loader, first, second = asyncio.run(scenario())
+
+    assert first == second == "report 1 for reliance"
+    assert len(loader.calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_stale_report_is_served_while_refreshing_in_background():
+    async def scenario():
+        clock, loader = FakeClock(), StubLoader()
+        cache = _cache(loader, clock)
+        await cache.get("TCS")
+        clock.now += 120  # past the TTL, inside the stale window
+
+        loader.release.clear()
+        stale = [await cache.get("TCS"), await cache.get("TCS")]
+        await _settle()
+        refreshing = len(loader.calls)
+        loader.release.set()
+        await _settle()
+        return cache, stale, refreshing, await cache.get("TCS")
+
+    cache, stale, refreshing, refreshed = asyncio.run(scenario())
+
+    assert stale == ["report 1 for TCS"] * 2
+    # Two stale hits started a single background run.
+    assert refreshing == 2
+    assert refreshed == "report 2 for TCS"
+    assert cache.stats()["stale_hits"] == 2
+
+
+def test_expired_report_is_regenerated():
+    async def scenario():
+        clock, loader = FakeClock(), StubLoader()
+        cache = _cache(loader, clock)
+        await cache.get("TCS")
+        clock.now += 151  # past TTL + stale window
+        return loader, await cache.get("TCS")
+
+    loader, content = asyncio.run(scenario())
+
+    assert content == "report 2 for TCS"
+    assert len(loader.calls) == 2
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        clock, loader = FakeClock(), StubLoader()
+        cache = _cache(loader, clock)
+        loader.release.clear()
+        waiters = [asyncio.ensure_future(cache.get("INFY")) for _ in range(5)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        return cache, loader, await asyncio.gather(*waiters)
+
+    cache, loader, results = asyncio.run(scenario())
+
+    assert results == ["report 1 for INFY"] * 5
+    assert len(loader.calls) == 1
+    assert cache.stats()["misses"] == 1 and cache.stats()["coalesced"] == 4
+
+
+def test_cancelled_leader_does_not_cancel_the_shared_load():
+    async def scenario():
+        clock, loader = FakeClock(), StubLoader()
+        cache = _cache(loader, clock)
+        loader.release.clear()
+        leader = asyncio.ensure_future(cache.get("INFY"))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get("INFY"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        loader.release.set()
+        return loader, await waiter
+
+    loader, content = asyncio.run(scenario())
+
+    assert content == "report 1 for INFY"
+    assert len(loader.calls) == 1
+
+
+def test_failed_load_reaches_waiters_and_is_not_cached():
+    async def scenario():
+        clock, loader = FakeClock(), StubLoader()
+        cache = _cache(loader, clock)
+        loader.fail = True
+        results = await asyncio.gather(cache.get("INFY"), cache.get("INFY"), return_exceptions=True)
+        loader.fail = False
+        return loader, results, await cache.get("INFY")
+
+    loader, results, retried = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == "report 2 for INFY"
+
+
+def test_failed_background_refresh_keeps_the_stale_report():
+    async def scenario():
+        clock, loader = FakeClock(), StubLoader()
+        cache = _cache(loader, clock)
+        await cache.get("TCS")
+        clock.now += 120
+        loader.fail = True
+        stale = await cache.get("TCS")
+        await _settle()
+        failures = cache.stats()["refresh_failures"]
+        return stale, failures, await cache.get("TCS")
+
+    stale, failures, still_stale = asyncio.run(scenario())
+
+    assert stale == still_stale == "report 1 for TCS"
+    assert failures == 1
+
+
+def test_least_recently_used_report_is_evicted():
+    async def scenario():
+        clock, loader = FakeClock(), StubLoader()
+        cache = _cache(loader, clock, max_entries=2)
+        await cache.get("A")
+        await cache.get("B")
+        await cache.get("A")  # A is now the most recently used
+        await cache.get("C")
+        return cache, loader
+
+    cache, loader = asyncio.run(scenario())
+
+    assert cache.peek("A") is not None and cache.peek("C") is not None
+    assert cache.peek("B") is None
+    assert cache.stats()["entries"] == 2
+    assert loader.calls == ["A", "B", "C"]
+
+
+@pytest.mark.parametrize("age, expected", [(99, "cached"), (100, None)])
+def test_peek_only_returns_fresh_reports(age, expected):
+    clock = FakeClock()
+    cache = _cache(StubLoader(), clock)
+    cache.put("tcs", "cached")
+    clock.now += age
+
+    assert cache.peek("TCS") == expected
@@ -0,0 +1,145 @@
+import msgpack
+import numpy as np
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.models.request_models import StockPredictionInput
+from app.utils import wire_format
+from app.utils.wire_format import encode_array_response, negotiate_response_type, read_window_input
+
+WINDOW = np.linspace(100.0, 199.0, 100)
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        input_data, window = await read_window_input(request, StockPredictionInput, "past_100_prices", len(WINDOW))
+        return encode_array_response(
+            request, {"symbol": input_data.symbol, "prices": window * 2, "count": len(window)}, "prices"
+        )
+
+    return TestClient(app)
+
+
+def test_json_round_trip(client):
+    response = client.post("/echo", json={"symbol": "AAA", "past_100_prices": WINDOW.tolist()})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {"symbol": "AAA", "prices": (WINDOW * 2).tolist(), "count": 100}
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_octet_stream_round_trip(client, dtype):
+    wire = np.dtype(wire_format.WIRE_DTYPES[dtype])
+    response = client.post(
+        "/echo",
+        params={"symbol": "AAA"},
+        content=WINDOW.astype(wire).tobytes(),
+        headers={
+            "Content-Type": f"application/octet-stream; dtype={dtype}",
+            "Accept": f"application/octet-stream; dtype={dtype}",
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == f"application/octet-stream; dtype={dtype}"
+    assert response.headers["x-symbol"] == "AAA"
+    assert response.headers["x-count"] == "100"
+    assert response.headers["x-array-dtype"] == dtype
+    np.testing.assert_allclose(np.frombuffer(response.content, dtype=wire), WINDOW.astype(wire) * 2)
+
+
+def test_msgpack_round_trip_with_packed_array(client):
+    body = msgpack.packb(
+        {"symbol": "AAA", "past_100_prices": WINDOW.astype("<f4").tobytes(), "dtype": "float32"}, use_bin_type=True
+    )
+    response = client.post(
+        "/echo", content=body, headers={"Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    fields = msgpack.unpackb(response.content, raw=False)
+    assert fields["symbol"] == "AAA" and fields["count"] == 100 and fields["dtype"] == "float64"
+    np.testing.assert_allclose(np.frombuffer(fields["prices"], dtype="<f8"), WINDOW.astype("<f4") * 2)
+
+
+def test_msgpack_request_with_list_and_json_response(client):
+    body = msgpack.packb({"symbol": "AAA", "past_100_prices": WINDOW.tolist()}, use_bin_type=True)
+    response = client.post("/echo", content=body, headers={"Content-Type": "application/x-msgpack"})
+
+    assert response.status_code == 200
+    assert response.json()["prices"] == (WINDOW * 2).tolist()
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, "application/json"),
+        ("*/*", "application/json"),
+        ("application/octet-stream", "application/octet-stream"),
+        ("application/json;q=0.5, application/msgpack", "application/msgpack"),
+        ("application/msgpack;q=0.1, application/octet-stream;q=0.9", "application/octet-stream"),
+        ("text/html", "application/json"),
+    ],
+)
+def test_negotiate_response_type(accept, expected):
+    assert negotiate_response_type(accept)[0] == expected
+
+
+def test_unsupported_content_type_is_415(client):
+    response = client.post("/echo", content=b"symbol=AAA", headers={"Content-Type": "text/plain"})
+
+    assert response.status_code == 415
+
+
+def test_unsupported_wire_dtype_is_415(client):
+    response = client.post(
+        "/echo",
+        params={"symbol": "AAA"},
+        content=WINDOW.astype("<f2").tobytes(),
+        headers={"Content-Type": "application/octet-stream; dtype=float16"},
+    )
+
+    assert response.status_code == 415
+
+
+def test_wrong_array_length_is_422(client):
+    response = client.post(
+        "/echo",
+        params={"symbol": "AAA"},
+        content=WINDOW[:99].tobytes(),
+        headers={"Content-Type": "application/octet-stream"},
+    )
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "past_100_prices"]
+
+
+def test_invalid_scalar_field_is_422(client):
+    response = client.post(
+        "/echo",
+        params={"symbol": "X" * 30},
+        content=WINDOW.tobytes(),
+        headers={"Content-Type": "application/octet-stream"},
+    )
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "symbol"]
+
+
+def test_invalid_json_is_422(client):
+    response = client.post("/echo", json={"symbol": "AAA", "past_100_prices": [1.0] * 5})
+
+    assert response.status_code == 422
+
+
+def test_invalid_msgpack_is_400(client):
+    response = client.post("/echo", content=b"\xc1", headers={"Content-Type": "application/msgpack"})
+
+    assert response.status_code == 400